@@ -25,87 +25,293 @@ BandResult = namedtuple(
 )
 
 
-def calculate_band_gap(
-    energies, densities, fermi=0, dtol=1e-8, try_fshifts=(), missing_edge=None
-):
-    """calculate the band gap, given an energy vs density plot
+DOSS_PROCESS_TYPE = "aiida.calculations:crystal17.doss"
+
+
+def calculate_band_gaps(energies, densities, fermi=0, dtol=1e-8, try_fshifts=()):
+    """calculate the band gaps of multiple systems, given their energy vs density plots
+
+    The band edges are found by locating the occupied (non-zero density) points,
+    with ``numpy.flatnonzero``, then searching for the occupied points either side
+    of the fermi energy of each system, with ``numpy.searchsorted``.
 
     Parameters
     ----------
-    energies : list[float]
-    densities : list[float]
-    fermi : float
+    energies : numpy.ndarray
+        shape (n_points,), if shared by all systems, or (n_systems, n_points)
+    densities : numpy.ndarray
+        shape (n_systems, n_points)
+    fermi : float or numpy.ndarray
+        a fermi energy for all systems, or shape (n_systems,)
     dtol : float
         tolerance for checking if density is zero
     try_fshifts : tuple[float]
         if the density at the fermi energy is non-zero,
         try shifting the fermi energy by these values, until a non-zero density is found.
         Useful for dealing with band edges at the fermi energy
-    missing_edge : object
-        the value to return if an edge cannot be determind
 
     Returns
     -------
     BandResult
+        where each field is an array of shape (n_systems,),
+        and edges that cannot be determined are NaN
 
     """
-    energies = np.array(energies, float)
-    densities = np.abs(np.array(densities, float))
-    if not len(energies) == len(densities):
+    densities = np.abs(np.atleast_2d(np.asarray(densities, float)))
+    num_systems, num_points = densities.shape
+    energies = np.asarray(energies, float)
+    if not energies.shape[-1] == num_points:
         raise AssertionError(
             "the energies and densities arrays are of different lengths"
         )
-    if not fermi < energies.max():
+    energies = np.broadcast_to(energies, densities.shape)
+    fermi = np.broadcast_to(np.asarray(fermi, float), (num_systems,))
+    if not (fermi < energies.max(axis=1)).all():
         raise AssertionError("the energies range does not contain the fermi energy")
-    if not fermi > energies.min():
+    if not (fermi > energies.min(axis=1)).all():
         raise AssertionError("the energies range does not contain the fermi energy")
 
     # sort energies
-    order = np.argsort(energies)
-    energies = energies[order]
-    densities = densities[order]
+    order = np.argsort(energies, axis=1)
+    energies = np.take_along_axis(energies, order, axis=1)
+    occupied = np.take_along_axis(densities, order, axis=1) > 0 + dtol
+    rows = np.arange(num_systems)
 
     # find index closest to fermi
-    fermi_idx = (np.abs(energies - fermi)).argmin()
+    fermi_idx = np.abs(energies - fermi[:, None]).argmin(axis=1)
 
     # check density isn't non-zero at fermi
-    fermi_non_zero = densities[fermi_idx] > 0 + dtol
+    fermi_non_zero = occupied[rows, fermi_idx]
 
     # if the density at the fermi is non-zero, try shifting the fermi
     # (useful to deal with band edges at the fermi)
     for fshift in try_fshifts:
-        if not fermi_non_zero:
-            break
-        new_index = np.abs(energies - (fermi + fshift)).argmin()
-        if densities[new_index] <= 0 + dtol:
-            fermi_non_zero = False
-            fermi_idx = new_index
-
-    if fermi_non_zero:
-        return BandResult(energies[fermi_idx], missing_edge, missing_edge, True)
-
-    # find left edge
-    found_left = False
-    for left_idx in reversed(range(0, fermi_idx + 1)):
-        if densities[left_idx] > 0 + dtol:
-            found_left = True
+        if not fermi_non_zero.any():
             break
+        new_idx = np.abs(energies - (fermi + fshift)[:, None]).argmin(axis=1)
+        shifted = fermi_non_zero & ~occupied[rows, new_idx]
+        fermi_idx = np.where(shifted, new_idx, fermi_idx)
+        fermi_non_zero = fermi_non_zero & ~shifted
 
-    # find right edge
-    found_right = False
-    for right_idx in range(fermi_idx, len(densities)):
-        if densities[right_idx] > 0 + dtol:
-            found_right = True
-            break
+    # find the occupied points either side of the fermi index,
+    # in the flattened array (padded, so that every search has a result)
+    flat_occupied = np.concatenate(
+        ([-1], np.flatnonzero(occupied), [num_systems * num_points])
+    )
+    flat_fermi = rows * num_points + fermi_idx
+    left_flat = flat_occupied[
+        np.searchsorted(flat_occupied, flat_fermi, side="right") - 1
+    ]
+    right_flat = flat_occupied[np.searchsorted(flat_occupied, flat_fermi, side="left")]
+    found_left = ~fermi_non_zero & (left_flat >= rows * num_points)
+    found_right = ~fermi_non_zero & (right_flat < (rows + 1) * num_points)
+
+    flat_energies = energies.ravel()
+    left_edge = np.where(found_left, flat_energies[np.maximum(left_flat, 0)], np.nan)
+    right_edge = np.where(
+        found_right,
+        flat_energies[np.minimum(right_flat, flat_energies.size - 1)],
+        np.nan,
+    )
+
+    return BandResult(energies[rows, fermi_idx], left_edge, right_edge, fermi_non_zero)
+
+
+def calculate_band_gap(
+    energies, densities, fermi=0, dtol=1e-8, try_fshifts=(), missing_edge=None
+):
+    """calculate the band gap, given an energy vs density plot
+
+    Parameters
+    ----------
+    energies : list[float]
+    densities : list[float]
+    fermi : float
+    dtol : float
+        tolerance for checking if density is zero
+    try_fshifts : tuple[float]
+        if the density at the fermi energy is non-zero,
+        try shifting the fermi energy by these values, until a non-zero density is found.
+        Useful for dealing with band edges at the fermi energy
+    missing_edge : object
+        the value to return if an edge cannot be determind
+
+    Returns
+    -------
+    BandResult
+
+    """
+    energies = np.array(energies, float)
+    densities = np.array(densities, float)
+    if not len(energies) == len(densities):
+        raise AssertionError(
+            "the energies and densities arrays are of different lengths"
+        )
+    result = calculate_band_gaps(
+        energies, densities[None, :], fermi, dtol=dtol, try_fshifts=try_fshifts
+    )
+
+    if result.non_zero_fermi[0]:
+        return BandResult(result.fermi[0], missing_edge, missing_edge, True)
 
     return BandResult(
-        energies[fermi_idx],
-        energies[left_idx] if found_left else missing_edge,
-        energies[right_idx] if found_right else missing_edge,
+        result.fermi[0],
+        missing_edge if np.isnan(result.left_edge[0]) else result.left_edge[0],
+        missing_edge if np.isnan(result.right_edge[0]) else result.right_edge[0],
         False,
     )
 
 
+def _band_gap_results(name, result, index):
+    """Create the results for one system of a ``calculate_band_gaps`` result."""
+    left_edge = result.left_edge[index]
+    right_edge = result.right_edge[index]
+    if result.non_zero_fermi[index]:
+        bandgap = 0.0
+    elif np.isnan(left_edge) or np.isnan(right_edge):
+        bandgap = None
+    else:
+        bandgap = float(right_edge - left_edge)
+    return {
+        name + "_fermi": float(result.fermi[index]),
+        name + "_left_edge": None if np.isnan(left_edge) else float(left_edge),
+        name + "_right_edge": None if np.isnan(right_edge) else float(right_edge),
+        name + "_zero_fermi": not result.non_zero_fermi[index],
+        name + "_bandgap": bandgap,
+    }
+
+
+def _get_channel_densities(arrays):
+    """Return a dict of channel name -> density, for the arrays of a DoS."""
+    if "total" in arrays:
+        return {"total": arrays["total"]}
+    alpha_density = arrays["total_alpha"]
+    beta_density = arrays["total_beta"]
+    return {
+        "alpha": alpha_density,
+        "beta": beta_density,
+        "total": np.abs(alpha_density) + np.abs(beta_density),
+    }
+
+
+def query_band_gaps(query=None, dtol=1e-8, try_fshifts=()):
+    """calculate the band gaps of many ``CryDossCalculation``, in bulk
+
+    The output nodes of all calculations are retrieved in bulk queries,
+    and the band gaps of all DoS with the same number of points are calculated together.
+    No provenance is recorded (use ``calcfunction_band_gap`` for this).
+
+    Parameters
+    ----------
+    query : aiida.orm.QueryBuilder or None
+        a query, with a vertex tagged 'calc', selecting the calculations
+        (e.g. by group or creation time).
+        If None, all ``CryDossCalculation`` nodes are selected
+    dtol : float
+        tolerance for checking if density is zero
+    try_fshifts : tuple[float]
+        if the density at the fermi energy is non-zero,
+        try shifting the fermi energy by these values, until a non-zero density is found.
+
+    Returns
+    -------
+    list[dict]
+        a row per calculation, with the calculation 'pk', and the same keys
+        as the ``calcfunction_band_gap`` results, or an 'error' message
+        (including for calculations with missing outputs)
+
+    """
+    from aiida.orm import CalcJobNode, QueryBuilder
+
+    if query is None:
+        query = QueryBuilder()
+        query.append(
+            CalcJobNode, filters={"process_type": DOSS_PROCESS_TYPE}, tag="calc"
+        )
+    else:
+        # do not modify the input query
+        query = QueryBuilder(**query.queryhelp)
+    query.add_projection("calc", "id")
+    pks = list(dict.fromkeys(item["calc"]["id"] for item in query.dict()))
+
+    # the outputs are retrieved separately, since filters on an outer join
+    # would also exclude the calculations without outputs
+    results_map = {}
+    arrays_map = {}
+    if pks:
+        results_query = QueryBuilder()
+        results_query.append(
+            CalcJobNode, filters={"id": {"in": pks}}, project=["id"], tag="calc"
+        )
+        results_query.append(
+            Dict,
+            with_incoming="calc",
+            edge_filters={"label": "results"},
+            project=["attributes.fermi_energy", "attributes.units"],
+        )
+        for pk, fermi, units in results_query.all():
+            results_map[pk] = (fermi, units)
+        arrays_query = QueryBuilder()
+        arrays_query.append(
+            CalcJobNode, filters={"id": {"in": pks}}, project=["id"], tag="calc"
+        )
+        arrays_query.append(
+            ArrayData,
+            with_incoming="calc",
+            edge_filters={"label": "arrays"},
+            project=["*"],
+        )
+        for pk, array_node in arrays_query.all():
+            arrays_map[pk] = array_node
+
+    rows = []
+    # number of points -> list of (row index, channel name, energies, density, fermi)
+    groups = {}
+    for pk in pks:
+        fermi, units = results_map.get(pk, (None, None))
+        row = {"pk": pk, "energy_units": (units or {}).get("energy")}
+        rows.append(row)
+        array_node = arrays_map.get(pk)
+        if array_node is None:
+            row["error"] = "missing output `arrays`"
+            continue
+        array_names = array_node.get_arraynames()
+        if fermi is None or "energies" not in array_names:
+            row["error"] = "missing fermi energy or energies array"
+            continue
+        if not ("total" in array_names) ^ (
+            "total_alpha" in array_names and "total_beta" in array_names
+        ):
+            row["error"] = "missing array `total` or `total_alpha` and `total_beta`"
+            continue
+        energies = array_node.get_array("energies")
+        if not energies.min() < fermi < energies.max():
+            row["error"] = "the energies range does not contain the fermi energy"
+            continue
+        arrays = {
+            name: array_node.get_array(name)
+            for name in ("total", "total_alpha", "total_beta")
+            if name in array_names
+        }
+        for name, density in _get_channel_densities(arrays).items():
+            groups.setdefault(len(energies), []).append(
+                (len(rows) - 1, name, energies, density, fermi)
+            )
+
+    for channels in groups.values():
+        result = calculate_band_gaps(
+            np.array([c[2] for c in channels]),
+            np.array([c[3] for c in channels]),
+            np.array([c[4] for c in channels]),
+            dtol=dtol,
+            try_fshifts=try_fshifts,
+        )
+        for index, (row_index, name, _, _, _) in enumerate(channels):
+            rows[row_index].update(_band_gap_results(name, result, index))
+
+    return rows
+
+
 @calcfunction
 def calcfunction_band_gap(doss_results, doss_array, dtol=None, try_fshifts=None):
     """calculate the band gap, given DoS data computed by CryDossCalculation
@@ -184,38 +390,24 @@ def calcfunction_band_gap(doss_results, doss_array, dtol=None, try_fshifts=None)
             ),
         )
 
-    if "total" in array_names:
-        calcs = {"total": doss_array.get_array("total")}
-    else:
-        alpha_density = doss_array.get_array("total_alpha")
-        beta_density = doss_array.get_array("total_beta")
-        total_density = np.abs(alpha_density) + np.abs(beta_density)
-        calcs = {"alpha": alpha_density, "beta": beta_density, "total": total_density}
+    calcs = _get_channel_densities(
+        {
+            name: doss_array.get_array(name)
+            for name in ("total", "total_alpha", "total_beta")
+            if name in array_names
+        }
+    )
 
     final_dict = {"energy_units": doss_results.get_dict()["units"]["energy"]}
 
-    for name, density in calcs.items():
-        try:
-            result = calculate_band_gap(
-                doss_array.get_array("energies"), density, **kwargs
-            )
-        except Exception:
-            traceback.print_exc()
-            return ExitCode(201, "calculate_band_gap failed")
-        if result.non_zero_fermi:
-            bandgap = 0.0
-        elif result.left_edge is None or result.right_edge is None:
-            bandgap = None
-        else:
-            bandgap = result.right_edge - result.left_edge
-        final_dict.update(
-            {
-                name + "_fermi": result.fermi,
-                name + "_left_edge": result.left_edge,
-                name + "_right_edge": result.right_edge,
-                name + "_zero_fermi": not result.non_zero_fermi,
-                name + "_bandgap": bandgap,
-            }
+    try:
+        result = calculate_band_gaps(
+            doss_array.get_array("energies"), np.array(list(calcs.values())), **kwargs
         )
+    except Exception:
+        traceback.print_exc()
+        return ExitCode(201, "calculate_band_gap failed")
+    for index, name in enumerate(calcs):
+        final_dict.update(_band_gap_results(name, result, index))
 
     return {"results": Dict(dict=final_dict)}
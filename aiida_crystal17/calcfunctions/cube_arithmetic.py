@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Chris Sewell
+#
+# This file is part of aiida-crystal17.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms and conditions
+# of version 3 of the GNU Lesser General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+import ast
+import operator
+import os
+import tempfile
+import traceback
+
+from aiida.engine import ExitCode, calcfunction
+from aiida.orm import Str
+import numpy as np
+
+from aiida_crystal17.data.gcube import GaussianCube
+from aiida_crystal17.parsers.raw.gaussian_cube import write_gaussian_cube
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+
+def parse_cube_expression(expression, names):
+    """parse an arithmetic expression of cube densities
+
+    The expression may only contain numbers, the variable names,
+    the operators ``+ - * / **``, and the functions:
+    ``abs``, ``sqrt``, ``exp``, ``log``, ``minimum`` and ``maximum``.
+
+    Parameters
+    ----------
+    expression : str
+        e.g. "total - slab - adsorbate"
+    names : list[str]
+        the allowed variable names
+
+    Returns
+    -------
+    ast.Expression
+
+    Raises
+    ------
+    ValueError
+        if the expression is invalid
+
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as err:
+        raise ValueError("invalid expression '{}': {}".format(expression, err))
+    call_functions = [
+        node.func for node in ast.walk(tree) if isinstance(node, ast.Call)
+    ]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id in names:
+                continue
+            if node.id in _FUNCTIONS and any(node is func for func in call_functions):
+                continue
+            raise ValueError(
+                "unknown variable '{}' in expression: {}".format(node.id, expression)
+            )
+        elif isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS):
+                raise ValueError(
+                    "function must be one of {}: {}".format(
+                        sorted(_FUNCTIONS), expression
+                    )
+                )
+            if node.keywords:
+                raise ValueError(
+                    "keyword arguments are not allowed: {}".format(expression)
+                )
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY_OPERATORS:
+                raise ValueError(
+                    "operator {} is not allowed: {}".format(
+                        type(node.op).__name__, expression
+                    )
+                )
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in _UNARY_OPERATORS:
+                raise ValueError(
+                    "operator {} is not allowed: {}".format(
+                        type(node.op).__name__, expression
+                    )
+                )
+        elif isinstance(node, (ast.Num, ast.Constant)):
+            value = _constant_value(node)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(
+                    "only numeric constants are allowed: {}".format(expression)
+                )
+        elif not isinstance(
+            node, (ast.Expression, ast.Load, ast.operator, ast.unaryop)
+        ):
+            raise ValueError(
+                "{} is not allowed: {}".format(type(node).__name__, expression)
+            )
+    return tree
+
+
+def _constant_value(node):
+    """return the value of a constant node (``ast.Num`` prior to python 3.8)"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    return node.n
+
+
+def evaluate_cube_expression(tree, arrays):
+    """evaluate a parsed expression
+
+    Parameters
+    ----------
+    tree : ast.Expression
+        the output of ``parse_cube_expression``
+    arrays : dict[str, numpy.ndarray]
+        the value of each variable
+
+    Returns
+    -------
+    numpy.ndarray or float
+
+    Raises
+    ------
+    FloatingPointError
+        if the evaluation overflows
+
+    """
+
+    def _evaluate(node):
+        if isinstance(node, ast.Expression):
+            return _evaluate(node.body)
+        if isinstance(node, ast.BinOp):
+            return _BINARY_OPERATORS[type(node.op)](
+                _evaluate(node.left), _evaluate(node.right)
+            )
+        if isinstance(node, ast.UnaryOp):
+            return _UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+        if isinstance(node, ast.Call):
+            return _FUNCTIONS[node.func.id](*[_evaluate(arg) for arg in node.args])
+        if isinstance(node, ast.Name):
+            return arrays[node.id]
+        # evaluate constants as floats, so that e.g. 9**9**9 overflows (to inf),
+        # rather than computing an unbounded python integer
+        return np.float64(_constant_value(node))
+
+    with np.errstate(over="raise"):
+        return _evaluate(tree)
+
+
+def check_cubes_compatible(cubes, tolerance=1e-5):
+    """check that the cubes have the same grid, cell and origin
+
+    Parameters
+    ----------
+    cubes : dict[str, aiida_crystal17.data.gcube.GaussianCube]
+    tolerance : float
+        the absolute tolerance for comparing the cell and origin (in Angstrom)
+
+    Raises
+    ------
+    ValueError
+        if the cubes are not compatible
+
+    """
+    names = list(cubes)
+    first = cubes[names[0]]
+    origin = first.get_cube_data(return_density=False).origin
+    for name in names[1:]:
+        cube = cubes[name]
+        if cube.get_attribute("voxel_grid") != first.get_attribute("voxel_grid"):
+            raise ValueError(
+                "the voxel grids of '{}' and '{}' are different: {} != {}".format(
+                    names[0],
+                    name,
+                    first.get_attribute("voxel_grid"),
+                    cube.get_attribute("voxel_grid"),
+                )
+            )
+        if not np.allclose(
+            cube.get_attribute("cell"), first.get_attribute("cell"), atol=tolerance
+        ):
+            raise ValueError(
+                "the cells of '{}' and '{}' are different".format(names[0], name)
+            )
+        if not np.allclose(
+            cube.get_cube_data(return_density=False).origin, origin, atol=tolerance
+        ):
+            raise ValueError(
+                "the origins of '{}' and '{}' are different".format(names[0], name)
+            )
+
+
+def iter_cube_expression(expression, cubes):
+    """evaluate an arithmetic expression of cube densities, chunk by chunk
+
+    The slabs of each cube (see ``GaussianCube.iter_density_slabs``)
+    are iterated in step, and the expression is evaluated
+    for the planes common to the current slab of each cube,
+    so that only a single slab per cube is held in memory.
+
+    Parameters
+    ----------
+    expression : str
+        e.g. "total - slab - adsorbate" (see ``parse_cube_expression``)
+    cubes : dict[str, aiida_crystal17.data.gcube.GaussianCube]
+        the cube for each variable name in the expression,
+        which must have the same grid, cell and origin
+
+    Yields
+    ------
+    numpy.ndarray
+        consecutive slabs of the result, of shape (n, b, c)
+
+    """
+    tree = parse_cube_expression(expression, list(cubes))
+    check_cubes_compatible(cubes)
+    voxel_grid = next(iter(cubes.values())).get_attribute("voxel_grid")
+
+    iterators = {name: cube.iter_density_slabs() for name, cube in cubes.items()}
+    # the current (start plane, slab) of each cube
+    current = {name: next(iterator) for name, iterator in iterators.items()}
+    position = 0
+    while position < voxel_grid[0]:
+        end = min(start + len(slab) for start, slab in current.values())
+        arrays = {
+            name: slab[position - start : end - start]
+            for name, (start, slab) in current.items()
+        }
+        yield np.broadcast_to(
+            evaluate_cube_expression(tree, arrays),
+            (end - position, voxel_grid[1], voxel_grid[2]),
+        )
+        position = end
+        if position >= voxel_grid[0]:
+            break
+        for name, (start, slab) in list(current.items()):
+            if start + len(slab) == end:
+                current[name] = next(iterators[name])
+
+
+@calcfunction
+def calcfunction_cube_arithmetic(expression, **cubes):
+    """compute a new gaussian cube, from an arithmetic expression of cubes
+
+    For example, the charge density difference of an adsorbate on a slab:
+    ``calcfunction_cube_arithmetic(Str("total - slab - adsorbate"),
+    total=total_cube, slab=slab_cube, adsorbate=adsorbate_cube)``
+
+    The cubes must have the same voxel grid, cell and origin,
+    and the result is computed slab by slab (see ``iter_cube_expression``).
+    The header (and atoms) of the result are taken from the first cube,
+    and it is stored in the same storage format as the first cube.
+
+    Parameters
+    ----------
+    expression : aiida.orm.Str
+        the arithmetic expression (see ``parse_cube_expression``)
+    cubes : aiida_crystal17.data.gcube.GaussianCube
+        the cube for each variable name in the expression
+
+    """
+    if not isinstance(expression, Str):
+        return ExitCode(
+            101, "expression is not of type `aiida.orm.Str`: {}".format(expression)
+        )
+    if not cubes:
+        return ExitCode(102, "no cubes were given")
+    for name, cube in cubes.items():
+        if not isinstance(cube, GaussianCube):
+            return ExitCode(
+                102,
+                "{} is not of type `crystal17.gcube`: {}".format(name, cube),
+            )
+    try:
+        parse_cube_expression(expression.value, list(cubes))
+    except ValueError as err:
+        return ExitCode(103, str(err))
+    try:
+        check_cubes_compatible(cubes)
+    except ValueError as err:
+        return ExitCode(104, str(err))
+
+    first = next(iter(cubes.values()))
+    cube_data = first.get_cube_data(return_density=False)
+    cube_data = cube_data._replace(
+        header=["Cube arithmetic: {}".format(expression.value)] + cube_data.header[1:]
+    )
+    path = None
+    try:
+        with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp_handle:
+            path = temp_handle.name
+            write_gaussian_cube(
+                temp_handle, cube_data, iter_cube_expression(expression.value, cubes)
+            )
+        result = GaussianCube(
+            path,
+            storage=first.storage_format,
+            dtype=first.get_attribute("density_dtype", "float64"),
+        )
+    except Exception:
+        traceback.print_exc()
+        return ExitCode(201, "evaluating the expression failed")
+    finally:
+        if path:
+            os.remove(path)
+
+    return {"cube": result}
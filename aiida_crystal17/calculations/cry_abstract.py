@@ -31,6 +31,8 @@ class CryAbstractCalculation(CalcJob):
     link_output_results = "results"
     link_output_structure = "structure"
     link_output_symmetry = "symmetry"
+    link_output_history = "history"
+    link_output_mulliken = "mulliken"
 
     @classmethod
     def define(cls, spec: CalcJobProcessSpec):
@@ -45,6 +47,15 @@ class CryAbstractCalculation(CalcJob):
         spec.input(
             "metadata.options.parser_name", valid_type=str, default="crystal17.main"
         )
+        spec.input(
+            "metadata.options.parser_streaming",
+            valid_type=bool,
+            default=False,
+            help=(
+                "Parse the stdout file in a single pass, line by line, "
+                "so that the parser's memory use does not scale with the size of the file"
+            ),
+        )
 
         # TODO review aiidateam/aiida_core#2997, when closed, for exit code formalization
 
@@ -189,6 +200,18 @@ class CryAbstractCalculation(CalcJob):
             required=False,
             help="the symmetry data from the calculation",
         )
+        spec.output(
+            cls.link_output_history,
+            valid_type=DataFactory("array"),
+            required=False,
+            help="the energies, charges, etc for each SCF cycle and optimisation step",
+        )
+        spec.output(
+            cls.link_output_mulliken,
+            valid_type=DataFactory("array"),
+            required=False,
+            help="the Mulliken population analysis charges, per atom, shell and orbital",
+        )
 
     def create_calc_info(
         self,
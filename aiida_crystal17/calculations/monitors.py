@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Chris Sewell
+#
+# This file is part of aiida-crystal17.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms and conditions
+# of version 3 of the GNU Lesser General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+"""Functions for monitoring running CRYSTAL17 computations.
+
+The functions take a calculation node and an open transport to its computer,
+and return a message if the computation should be killed (else None).
+"""
+import base64
+import os
+
+from aiida.common.escaping import escape_for_bash
+
+from aiida_crystal17.parsers.raw.crystal_stdout_monitor import (
+    ScfMonitor,
+    energies_are_rising,
+)
+
+MONITOR_EXTRA_KEY = "crystal17_stdout_monitor"
+
+
+def update_stdout_monitor(node, transport, max_energies=10):
+    """Scan the content appended to the stdout file of a running ``CryMainCalculation``.
+
+    The state of the monitor is checkpointed (as a JSON-serialisable dict) in the extras of the node,
+    so that only the bytes appended since the last call are retrieved.
+    Since transports decode the output of commands,
+    the bytes are retrieved base64 encoded, so that the byte offset is exact,
+    whatever the content of the file.
+
+    :param node: the ``CalcJobNode``
+    :param transport: an open transport to the computer of the node
+    :param max_energies: the number of most recent SCF energies to retain
+    :return: the updated ``ScfMonitor``
+
+    """
+    checkpoint = node.get_extra(MONITOR_EXTRA_KEY, None)
+    if checkpoint is None:
+        monitor = ScfMonitor(max_energies)
+    else:
+        monitor = ScfMonitor.from_checkpoint(checkpoint, max_energies)
+
+    path = os.path.join(
+        node.get_remote_workdir(), node.get_option("output_main_file_name")
+    )
+    retval, stdout, _ = transport.exec_command_wait(
+        "tail -c +{0} {1} | base64".format(monitor.offset + 1, escape_for_bash(path))
+    )
+    if retval != 0:
+        return monitor
+
+    # if the file has not yet been created, the output is empty
+    if monitor.update(base64.b64decode(stdout)):
+        node.set_extra(MONITOR_EXTRA_KEY, monitor.get_checkpoint())
+    return monitor
+
+
+def monitor_scf_divergence(node, transport, num_cycles=5):
+    """Monitor a running ``CryMainCalculation``, for a diverging SCF.
+
+    :param node: the ``CalcJobNode``
+    :param transport: an open transport to the computer of the node
+    :param num_cycles: the number of consecutive SCF cycles,
+        over which a rise in the total energy denotes divergence
+    :return: a message, if the SCF is diverging, otherwise None
+
+    """
+    monitor = update_stdout_monitor(node, transport, max_energies=num_cycles + 1)
+    if energies_are_rising(monitor.energies, num_cycles):
+        return "the SCF total energy rose over the last {} cycles".format(num_cycles)
+    return None
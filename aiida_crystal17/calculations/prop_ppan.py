@@ -15,6 +15,7 @@
 # GNU Lesser General Public License for more details.
 """Plugin for running CRYSTAL17 properties computations."""
 from aiida.engine import CalcJobProcessSpec
+from aiida.plugins import DataFactory
 
 from aiida_crystal17.calculations.prop_abstract import PropAbstractCalculation
 from aiida_crystal17.parsers.raw.prop_inputs import create_rotref_content
@@ -46,6 +47,13 @@ class CryPpanCalculation(PropAbstractCalculation):
 
         # TODO make dict optional
 
+        spec.output(
+            "mulliken",
+            valid_type=DataFactory("array"),
+            required=False,
+            help="the Mulliken population analysis charges, per atom, shell and orbital",
+        )
+
         spec.exit_code(
             352,
             "ERROR_PPAN_FILE_MISSING",
@@ -49,15 +49,15 @@ def try_grab_description(ctx, param, value):
 
     This is a click parameter callback.
     """
+    from aiida.common.exceptions import NotExistent
+
     from aiida_crystal17.data.basis_set import BasisSetData
 
     group_name = ctx.params["name"]
-    existing_groups = BasisSetData.get_basis_groups()
-    existing_group_names = [group.name for group in existing_groups]
     if not value:
-        if group_name in existing_group_names:
+        try:
             return BasisSetData.get_basis_group(group_name).description
-        else:
+        except NotExistent:
             raise click.MissingParameter(
                 "A new group must be given a description.", param=param
             )
@@ -76,25 +76,45 @@ def try_grab_description(ctx, param, value):
     help="Abort when encountering a previously uploaded Basis Set file",
 )
 @options.DRY_RUN()
+@click.option(
+    "--max-workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Parse the files in parallel, with this many processes",
+)
+@click.option("--timings", is_flag=True, help="Report the time taken for each phase")
 @decorators.with_dbenv()
-def uploadfamily(path, ext, name, description, stop_if_existing, dry_run):
+def uploadfamily(
+    path, ext, name, description, stop_if_existing, dry_run, max_workers, timings
+):
     """Upload a family of CRYSTAL Basis Set files."""
     from aiida_crystal17.data.basis_set import BasisSetData
 
     with cli_spinner():
-        nfiles, num_uploaded = BasisSetData.upload_basisset_family(
+        nfiles, num_uploaded, phase_timings = BasisSetData.upload_basisset_family(
             path,
             name,
             description,
             stop_if_existing=stop_if_existing,
             extension=".{}".format(ext),
             dry_run=dry_run,
+            max_workers=max_workers,
+            return_timings=True,
         )
 
     click.echo(
         "Basis Set files found and added to family: {}, of those {} "
         "were newly uploaded".format(nfiles, num_uploaded)
     )
+    if timings:
+        click.echo(
+            "Timings (s): "
+            + ", ".join(
+                "{} {:.3f}".format(phase, seconds)
+                for phase, seconds in phase_timings.items()
+            )
+        )
     if dry_run:
         click.echo("No files were uploaded due to --dry-run.")
 
@@ -113,21 +133,21 @@ def listfamilies(element, with_description, list_pks):
     """List available families of CRYSTAL Basis Set files."""
     from aiida_crystal17.data.basis_set import BasisSetData
 
-    groups = BasisSetData.get_basis_groups(
-        filter_elements=None if not element else element
+    summaries = BasisSetData.get_basis_groups(
+        filter_elements=None if not element else element, counts=True
     )
 
-    table = [["Family", "Num Basis Sets"]]
+    table = [["Family", "Num Basis Sets", "Elements"]]
     if with_description:
         table[0].append("Description")
     if list_pks:
         table[0].append("Pks")
-    for group in groups:
-        row = [group.label, len(group.nodes)]
+    for summary in summaries:
+        row = [summary.label, summary.count, ",".join(summary.elements)]
         if with_description:
-            row.append(group.description)
+            row.append(summary.description)
         if list_pks:
-            row.append(",".join([str(n.pk) for n in group.nodes]))
+            row.append(",".join([str(pk) for pk in summary.pks]))
         table.append(row)
     if len(table) > 1:
         click.echo(tabulate.tabulate(table, headers="firstrow"))
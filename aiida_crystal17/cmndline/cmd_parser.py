@@ -13,10 +13,16 @@
 # but WITHOUT ANY WARRANTY; without even the implied warranty of
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU Lesser General Public License for more details.
+from fnmatch import fnmatch
 import io
+import json
+import os
+import traceback
 
 from aiida.cmdline.commands.cmd_verdi import verdi
 from aiida.cmdline.params import arguments
+from aiida.cmdline.utils import echo
+import click
 
 from aiida_crystal17.cmndline import options
 
@@ -47,12 +53,15 @@ def stdin(input_file, keys, fmt):
 @options.DICT_FORMAT()
 def stdout(input_file, keys, fmt):
     """Parse an existing stdout file, created from a crystal run."""
-    from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+    from aiida_crystal17.parsers.raw.crystal_stdout import LazyCrystalOutput
 
     with io.open(input_file) as handle:
-        data = read_crystal_stdout(handle.read())
+        data = LazyCrystalOutput(handle.read())
     if keys is not None:
-        data = {k: v for k, v in data.items() if k in keys}
+        # only the sections required for the keys are parsed
+        data = {k: data[k] for k in keys if k in data}
+    else:
+        data = data.to_dict()
     options.echo_dictionary(data, fmt=fmt)
 
 
@@ -69,3 +78,217 @@ def doss_f25(input_file, keys, fmt):
     if keys is not None:
         data = {k: v for k, v in data.items() if k in keys}
     options.echo_dictionary(data, fmt=fmt)
+
+
+@parse.command("records-f25")
+@arguments.INPUT_FILE()
+@options.DICT_FORMAT()
+def records_f25(input_file, fmt):
+    """Summarise the (DOSS, BAND or MAPS) records of an existing fort.25 file.
+
+    The records are read one at a time, so that large files can be summarised.
+    """
+    from aiida_crystal17.parsers.raw.crystal_fort25 import iter_crystal_fort25
+
+    records = []
+    with io.open(input_file) as handle:
+        for record in iter_crystal_fort25(handle):
+            records.append(
+                {
+                    "type": record.type,
+                    "header": record.header,
+                    "grid": record.grid,
+                    "shape": list(record.data.shape),
+                    "min": float(record.data.min()),
+                    "max": float(record.data.max()),
+                }
+            )
+    options.echo_dictionary({"records": records}, fmt=fmt)
+
+
+def _read_stdin(handle):
+    from aiida_crystal17.parsers.raw.inputd12_read import extract_data
+
+    data, _, _ = extract_data(handle.read())
+    return data
+
+
+def _read_stdout(handle):
+    from aiida_crystal17.parsers.raw.crystal_stdout_stream import (
+        read_crystal_stdout_stream,
+    )
+
+    return read_crystal_stdout_stream(handle)
+
+
+def _read_doss_f25(handle):
+    from aiida_crystal17.parsers.raw.crystal_fort25 import parse_crystal_fort25
+
+    return parse_crystal_fort25(handle.read())
+
+
+# file type -> (parse function, default glob patterns for files in directories)
+BATCH_PARSERS = {
+    "stdin": (_read_stdin, ("INPUT", "*.d12")),
+    "stdout": (_read_stdout, ("*.out",)),
+    "doss-f25": (_read_doss_f25, ("fort.25", "*.f25")),
+}
+
+
+def iter_batch_files(paths, patterns):
+    """Yield the (absolute) paths to files, recursing into directories.
+
+    :param paths: a list of paths to files or directories
+    :param patterns: glob patterns, one of which files in directories must match
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield os.path.abspath(path)
+            continue
+        for root, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if any(fnmatch(filename, pattern) for pattern in patterns):
+                    yield os.path.abspath(os.path.join(root, filename))
+
+
+def read_batch_progress(output_path):
+    """Return the set of file paths already recorded in a JSON Lines output.
+
+    Any incomplete record at the end of the file (from an interrupted run) is removed.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    parsed = set()
+    end = 0
+    with io.open(output_path, "rb+") as handle:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                parsed.add(json.loads(line.decode("utf8"))["path"])
+            except (ValueError, KeyError):
+                pass
+            end += len(line)
+        handle.truncate(end)
+    return parsed
+
+
+def parse_batch_file(file_type, path, keys=None):
+    """Parse a single file, returning a record, with any errors captured.
+
+    :param file_type: a key of ``BATCH_PARSERS``
+    :param path: the path to the file
+    :param keys: if not None, filter the output data by these keys
+        (the parser errors and exceptions are always retained)
+    :returns: a dict with keys "path", "parser_errors", "parser_exceptions"
+        and the (filtered) keys of the parsed data
+    """
+    read_func, _ = BATCH_PARSERS[file_type]
+    try:
+        with io.open(path) as handle:
+            data = read_func(handle)
+    except Exception:
+        return {
+            "path": path,
+            "parser_errors": [],
+            "parser_exceptions": [traceback.format_exc()],
+        }
+    if keys is not None:
+        keys = list(keys) + ["parser_errors", "parser_exceptions"]
+        data = {k: v for k, v in data.items() if k in keys}
+    record = {"parser_errors": [], "parser_exceptions": []}
+    record.update(data)
+    record["path"] = path
+    return record
+
+
+def _parse_batch_file(args):
+    return parse_batch_file(*args)
+
+
+@parse.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-o",
+    "--output",
+    required=True,
+    type=click.Path(dir_okay=False, writable=True),
+    help="The JSON Lines file to write the records to.",
+)
+@click.option(
+    "-t",
+    "--file-type",
+    type=click.Choice(list(BATCH_PARSERS.keys())),
+    default="stdout",
+    show_default=True,
+    help="The type of file to parse.",
+)
+@click.option(
+    "-p",
+    "--pattern",
+    "patterns",
+    multiple=True,
+    help="A glob pattern that files in directories must match "
+    "(default depends on the file type).",
+)
+@click.option(
+    "-n",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The number of processes to parse with (default is the number of CPUs).",
+)
+@click.option(
+    "--overwrite",
+    is_flag=True,
+    help="Overwrite the output file, rather than resuming from the recorded files.",
+)
+@options.DICT_KEYS()
+def batch(paths, output, file_type, patterns, processes, overwrite, keys):
+    """Parse multiple files (or directories of files) to a JSON Lines file.
+
+    Files are parsed in parallel, and a record (on a single line) is written
+    for each file as soon as it is parsed.
+    Files already recorded in the output file are skipped,
+    so that an interrupted run can be resumed.
+    """
+    from multiprocessing import Pool
+
+    if not patterns:
+        patterns = BATCH_PARSERS[file_type][1]
+    output = os.path.abspath(output)
+
+    if overwrite and os.path.exists(output):
+        os.remove(output)
+    parsed = read_batch_progress(output)
+
+    tasks = (
+        (file_type, path, keys)
+        for path in iter_batch_files(paths, patterns)
+        if path not in parsed and path != output
+    )
+
+    num_parsed = num_failed = 0
+    with io.open(output, "a", encoding="utf8") as handle:
+
+        def write_records(records):
+            nonlocal num_parsed, num_failed
+            for record in records:
+                handle.write(json.dumps(record, sort_keys=True) + "\n")
+                handle.flush()
+                num_parsed += 1
+                if record["parser_errors"] or record["parser_exceptions"]:
+                    num_failed += 1
+
+        if processes == 1:
+            write_records(map(_parse_batch_file, tasks))
+        else:
+            with Pool(processes) as pool:
+                write_records(pool.imap_unordered(_parse_batch_file, tasks))
+
+    echo.echo_success(
+        "parsed {0} files ({1} with errors, {2} previously recorded)".format(
+            num_parsed, num_failed, len(parsed)
+        )
+    )
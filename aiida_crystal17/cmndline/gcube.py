@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Chris Sewell
+#
+# This file is part of aiida-crystal17.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms and conditions
+# of version 3 of the GNU Lesser General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+from aiida.cmdline.commands.cmd_verdi import verdi
+from aiida.cmdline.utils import decorators
+from aiida.orm import load_node
+from aiida.plugins import DataFactory
+import click
+from jsonextended import edict
+
+
+@verdi.group("crystal17.gcube")
+def gcube():
+    """Commandline interface for working with GaussianCube data"""
+
+
+@gcube.command()
+@click.argument("pk", type=int)
+@decorators.with_dbenv()
+def show(pk):
+    """show the contents of a GaussianCube"""
+    node = load_node(pk)
+
+    if not isinstance(node, DataFactory("crystal17.gcube")):
+        click.echo("The node was not of type 'crystal17.gcube'", err=True)
+    else:
+        edict.pprint(node.attributes, print_func=click.echo)
+
+
+@gcube.command()
+@click.argument("pk", type=int)
+@click.argument("folder", type=click.Path(exists=True, file_okay=False, writable=True))
+@click.option(
+    "--name", "-n", default="gcube", show_default=True, help="the name of the files"
+)
+@click.option(
+    "--stride",
+    "-s",
+    type=click.IntRange(min=1),
+    default=None,
+    help="coarsen the density, by averaging blocks of this many voxels per axis",
+)
+@click.option(
+    "--target-voxels",
+    "-t",
+    type=click.IntRange(min=1),
+    default=None,
+    help="coarsen the density, to at most this many voxels (if no stride is given)",
+)
+@decorators.with_dbenv()
+def vesta(pk, folder, name, stride, target_voxels):
+    """write the cube and VESTA input files, for a GaussianCube, to a folder"""
+    from aiida_crystal17.parsers.raw.vesta import write_gcube_to_vesta
+
+    node = load_node(pk)
+
+    if not isinstance(node, DataFactory("crystal17.gcube")):
+        raise click.ClickException("The node was not of type 'crystal17.gcube'")
+    try:
+        write_gcube_to_vesta(
+            node, folder, name, stride=stride, target_voxels=target_voxels
+        )
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    click.echo("written: {0}.cube, {0}.vesta".format(name))
@@ -16,6 +16,11 @@
 from decimal import Decimal
 import re
 
+import numpy as np
+
+# a number, possibly with no spacing from the previous number (as output by Fortran)
+NUMBER_REGEX = re.compile(r"-?\ *[0-9]+\.?[0-9]*(?:[Ee]\ *[+-]?\ *[0-9]+)?")
+
 
 def convert_units(value, in_units, out_units, standard="codata2014"):
     """Convert a value, from one unit to another."""
@@ -28,6 +33,8 @@ def convert_units(value, in_units, out_units, standard="codata2014"):
         return value * 27.21138602
     elif in_units == "bohr" and out_units == "angstrom":
         return value * 0.5291772105638411
+    elif in_units == "angstrom" and out_units == "bohr":
+        return value / 0.5291772105638411
     raise NotImplementedError("{} -> {}".format(in_units, out_units))
 
 
@@ -61,10 +68,115 @@ def split_numbers(string, as_decimal=False):
     [0.001, -2.0]
 
     """
-    _match_number = re.compile("-?\\ *[0-9]+\\.?[0-9]*(?:[Ee]\\ *[+-]?\\ *[0-9]+)?")
     string = string.replace(" .", " 0.")
     string = string.replace("-.", "-0.")
-    return [
-        Decimal(s) if as_decimal else float(s)
-        for s in re.findall(_match_number, string)
-    ]
+    if as_decimal:
+        return [Decimal(s) for s in NUMBER_REGEX.findall(string)]
+    return list(map(float, NUMBER_REGEX.findall(string)))
+
+
+def split_numeric_lines(lines, start):
+    """get the numbers from consecutive lines, until a line with a non-numeric field
+
+    :type lines: list[str]
+    :param start: the index of the first line
+
+    :return: (numbers, index of the first non-numeric line)
+    :rtype: tuple[list, int]
+
+    """
+    numbers = []
+    index = start
+    while True:
+        line_numbers = split_numbers(lines[index])
+        if len(lines[index].split()) != len(line_numbers):
+            return numbers, index
+        numbers.extend(line_numbers)
+        index += 1
+
+
+def split_numbers_array(lines, dtype=float):
+    """get an array of all numbers in a block of lines (even with no spacing)
+
+    This is equivalent to concatenating ``split_numbers`` for each line,
+    but the block is tokenised in a single call.
+
+    :type lines: str or list[str]
+    :param dtype: the dtype of the array
+
+    :rtype: numpy.ndarray
+
+    :Example:
+
+    >>> split_numbers_array(["1 2", "3-4"])
+    array([ 1.,  2.,  3., -4.])
+
+    """
+    if not isinstance(lines, str):
+        lines = "\n".join(lines)
+    lines = lines.replace(" .", " 0.")
+    lines = lines.replace("-.", "-0.")
+    return np.array(NUMBER_REGEX.findall(lines), dtype=dtype)
+
+
+def split_fixed_width(lines, width=12, dtype=float):
+    """get an array of all numbers in a block of fixed width Fortran records
+
+    For example, the ``1P,6E12.5`` format has a width of 12.
+    Each line may contain fewer fields than the others (e.g. the last line of a record),
+    but fields must not be blank.
+
+    :type lines: list[str]
+    :param width: the width of each field
+    :param dtype: the dtype of the array
+
+    :rtype: numpy.ndarray
+
+    :Example:
+
+    >>> split_fixed_width([" 1.00000E+00-2.00000E+00", "-3.00000E-01"])
+    array([ 1. , -2. , -0.3])
+
+    """
+    content = "".join(
+        line.ljust(-(-len(line) // width) * width)
+        for line in (line.rstrip() for line in lines)
+    )
+    try:
+        fields = np.frombuffer(content.encode("ascii"), dtype="S{}".format(width))
+        return fields.astype(dtype)
+    except ValueError as err:
+        raise ValueError("could not parse fixed width fields: {}".format(err))
+
+
+def stack_ragged(values, dtype=float, fill_value=np.nan):
+    """stack a list of (possibly missing or ragged) values into a single array
+
+    Missing (None) values, and the trailing elements of shorter values,
+    are set to the fill value.
+
+    :type values: list
+    :param dtype: the dtype of the array
+    :param fill_value: the value of missing elements
+
+    :rtype: numpy.ndarray
+
+    :Example:
+
+    >>> stack_ragged([[1, 2], None, [3]])
+    array([[ 1.,  2.],
+           [nan, nan],
+           [ 3., nan]])
+
+    """
+    arrays = [None if v is None else np.asarray(v, dtype=dtype) for v in values]
+    shapes = [a.shape for a in arrays if a is not None]
+    ndim = max([len(s) for s in shapes] or [0])
+    shape = tuple(max(s[i] if i < len(s) else 1 for s in shapes) for i in range(ndim))
+    stacked = np.full((len(arrays),) + shape, fill_value, dtype=dtype)
+    for i, array in enumerate(arrays):
+        if array is None:
+            continue
+        array = array.reshape(array.shape + (1,) * (ndim - array.ndim))
+        stacked[(i,) + tuple(slice(0, n) for n in array.shape)] = array
+    return stacked
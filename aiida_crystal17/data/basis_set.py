@@ -16,10 +16,15 @@
 """A data type to store CRYSTAL17 basis sets."""
 from __future__ import absolute_import
 
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import copy
 import hashlib
 from io import StringIO
 import os
 import pathlib
+import threading
+import time
 
 from aiida.common.exceptions import (
     MultipleObjectsError,
@@ -27,6 +32,7 @@ from aiida.common.exceptions import (
     UniquenessError,
     ValidationError,
 )
+from aiida.manage.manager import get_manager
 from aiida.orm import Data, Group, QueryBuilder, Str, User
 import yaml
 
@@ -39,48 +45,216 @@ class BasisSetFamily(Group):
     """Group that represents a basis set family containing `BasisSetData` nodes."""
 
 
-def retrieve_basis_sets(files, stop_if_existing):
+class BasisParseCache(object):
+    """A least-recently-used cache of parsed basis sets.
+
+    Entries are keyed on ``(kind, md5)``, where md5 is the hash of the text that was parsed,
+    and are evicted (least recently used first) when the number of entries exceeds ``max_entries``.
+    Values are copied on the way in and out, so that the cached data cannot be modified.
+
+    """
+
+    def __init__(self, max_entries=1024):
+        """Initialise the cache.
+
+        :param max_entries: the maximum number of entries
+        """
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, kind, md5sum):
+        """Return the cached data, or None if it is not in the cache."""
+        key = (kind, md5sum)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key]
+        return copy.deepcopy(value)
+
+    def set(self, kind, md5sum, value):
+        """Add data to the cache (evicting entries, if necessary)."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop((kind, md5sum), None)
+            self._entries[(kind, md5sum)] = value
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all entries, and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def set_limits(self, max_entries=None):
+        """Set the maximum size of the cache (evicting entries, if necessary)."""
+        with self._lock:
+            if max_entries is not None:
+                self._max_entries = max_entries
+            self._evict()
+
+    def info(self):
+        """Return the statistics of the cache.
+
+        :return: dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+            }
+
+
+#: the process-wide cache of ``parse_basis`` and ``BasisSetData.get_data``
+BASIS_PARSE_CACHE = BasisParseCache()
+
+
+BasisFamilySummary = namedtuple(
+    "BasisFamilySummary", ["label", "description", "count", "elements", "pks"]
+)
+
+#: the metadata keys that are parsed from the basis set content (rather than the header)
+_CONTENT_METADATA_KEYS = (
+    "atomic_number",
+    "element",
+    "basis_type",
+    "num_shells",
+    "orbital_types",
+)
+
+
+def retrieve_basis_sets(files, stop_if_existing, max_workers=None, timings=None):
     """Retrieve existing basis sets or create if them, if they do not exist.
 
+    Each file is parsed once, and the existing basis sets are retrieved
+    with a single query (for the md5 of all files).
+    Files with identical content (md5) are mapped to the same node.
+
     :param files: list of basis set file paths
     :param stop_if_existing: if True, check for the md5 of the files and,
         if the file already exists in the DB, raises a MultipleObjectsError.
         If False, simply adds the existing BasisSetData node to the group.
-    :return:
+    :param max_workers: if greater than 1, parse the files in parallel,
+        using a pool of this many processes
+    :param timings: if a dict, add the time (in seconds) taken to 'parse' the files
+        and 'query' the database
+    :return: list of (basisset, created), where created means "to be created"
+        (i.e. the basisset is not stored)
     """
-    basis_and_created = []
-    for basis_file in files:
-        _, content = parse_basis(basis_file)
-        md5sum = md5_from_string(content)
+    timings = {} if timings is None else timings
+
+    start_time = time.perf_counter()
+    parsed = parse_basis_files(files, max_workers=max_workers)
+    md5sums = [md5_from_string(content) for _, content in parsed]
+    timings["parse"] = timings.get("parse", 0.0) + time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    existing = {}
+    if md5sums:
         qb = QueryBuilder()
-        qb.append(BasisSetData, filters={"attributes.md5": {"==": md5sum}})
-        existing_basis = qb.first()
+        qb.append(
+            BasisSetData,
+            filters={"attributes.md5": {"in": sorted(set(md5sums))}},
+            project=["attributes.md5", "*"],
+        )
+        qb.order_by({BasisSetData: {"id": "asc"}})
+        for md5sum, node in qb.iterall():
+            # as for get_or_create(use_first=True)
+            existing.setdefault(md5sum, node)
+    timings["query"] = timings.get("query", 0.0) + time.perf_counter() - start_time
 
-        if existing_basis is None:
-            # return the basis set data instances, not stored
-            basisset, created = BasisSetData.get_or_create(
-                basis_file, use_first=True, store_basis=False
-            )
-            # to check whether only one basis set per element exists
-            # NOTE: actually, created has the meaning of "to_be_created"
-            basis_and_created.append((basisset, created))
-        else:
+    basis_and_created = []
+    to_be_created = {}
+    for basis_file, (metadata, content), md5sum in zip(files, parsed, md5sums):
+        if md5sum in existing:
             if stop_if_existing:
                 raise ValueError(
                     "A Basis Set with identical MD5 to "
                     " {} cannot be added with stop_if_existing"
                     "".format(basis_file)
                 )
-            existing_basis = existing_basis[0]
-            basis_and_created.append((existing_basis, False))
+            basis_and_created.append((existing[md5sum], False))
+        elif md5sum in to_be_created:
+            basis_and_created.append((to_be_created[md5sum], False))
+        else:
+            # return the basis set data instances, not stored
+            basisset = BasisSetData()
+            _cache_content_parse(metadata, content)
+            basisset.set_parsed(metadata, content, get_basis_filename(basis_file))
+            to_be_created[md5sum] = basisset
+            basis_and_created.append((basisset, True))
 
     return basis_and_created
 
 
-def parse_basis(basis_file):
+def _cache_content_parse(metadata, content):
+    """Add the parse result of the normalised content to ``BASIS_PARSE_CACHE``.
+
+    The content is re-parsed when a ``BasisSetData`` is stored and validated,
+    which gives the content metadata only (since it has no header).
+    This must only be called with the output of ``parse_basis``,
+    so that the cache is never populated with unverified metadata.
+
+    :param metadata: the metadata_dict output of ``parse_basis``
+    :param content: the content_str output of ``parse_basis``
+    """
+    BASIS_PARSE_CACHE.set(
+        "basis",
+        md5_from_string(content),
+        ({key: metadata[key] for key in _CONTENT_METADATA_KEYS}, content),
+    )
+
+
+def parse_basis_files(files, max_workers=None):
+    """Parse a list of basis set files.
+
+    :param files: list of basis set file paths
+    :param max_workers: if greater than 1, parse the files in parallel,
+        using a pool of this many processes
+        (only worthwhile for large numbers of files, since the parsing of each is fast)
+    :return: list of (metadata_dict, content_str)
+    """
+    files = list(files)
+    if max_workers is None or max_workers <= 1 or len(files) <= 1:
+        return [parse_basis(basis_file) for basis_file in files]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunksize = max(1, len(files) // (4 * max_workers))
+        return list(executor.map(parse_basis, files, chunksize=chunksize))
+
+
+def get_basis_filename(basis_file):
+    """Return the filename to store the content of a basis set file as.
+
+    :param basis_file: absolute path to a file or open filelike object
+    :return: str
+    """
+    if isinstance(basis_file, (str, pathlib.PurePath)):
+        return os.path.basename(basis_file)
+    if hasattr(basis_file, "name"):
+        return os.path.basename(basis_file.name)
+    return "stringio.txt"
+
+
+def parse_basis(basis_file, cache=True):
     """Get relevant information from the basis file.
 
     :param basis_file: absolute path to a file or open filelike object
+    :param cache: whether to use (and populate) ``BASIS_PARSE_CACHE``,
+        keyed on the md5 hash of the file text
     :return: (metadata_dict, content_str)
 
     - The basis file must contain one basis set in the CRYSTAL17 format
@@ -103,29 +277,42 @@ def parse_basis(basis_file):
         1 1 3  6.  0.
 
     """
-    meta_data = {}
-
-    in_yaml = False
-    yaml_lines = []
-    protected_keys = ["atomic_number", "num_shells", "element", "basis_type", "content"]
-    parsing_data = False
-    content = []
-
     if isinstance(basis_file, str):
         basis_file = pathlib.Path(basis_file)
 
     if isinstance(basis_file, pathlib.Path):
-        contentlines = basis_file.read_text().splitlines()
+        text = basis_file.read_text()
         basis_file_name = basis_file.name
     else:
         basis_file.seek(0)
-        contentlines = basis_file.read().splitlines()
+        text = basis_file.read()
         try:
             basis_file_name = basis_file.name
         except AttributeError:
             basis_file_name = "StringIO"
 
-    for line in contentlines:
+    if not cache:
+        return _parse_basis_text(text, basis_file_name)
+
+    md5sum = md5_from_string(text)
+    result = BASIS_PARSE_CACHE.get("basis", md5sum)
+    if result is None:
+        result = _parse_basis_text(text, basis_file_name)
+        BASIS_PARSE_CACHE.set("basis", md5sum, result)
+    return result
+
+
+def _parse_basis_text(text, basis_file_name):
+    """Parse the text of a basis file (see ``parse_basis``)."""
+    meta_data = {}
+
+    in_yaml = False
+    yaml_lines = []
+    protected_keys = ["atomic_number", "num_shells", "element", "basis_type", "content"]
+    parsing_data = False
+    content = []
+
+    for line in text.splitlines():
         # ignore commented and blank lines
         if line.strip().startswith("#") or not line.strip():
             continue
@@ -230,16 +417,18 @@ class BasisSetData(Data):
 
     """
 
-    def __init__(self, filepath, **kwargs):
+    def __init__(self, filepath=None, **kwargs):
         """Read and store a file containing a single basis set.
 
         Parameters
         ----------
-        filepath : str or filelike
+        filepath : str or filelike or None
+            if None, the file should be set later, with ``set_file`` or ``set_parsed``
 
         """
         super(BasisSetData, self).__init__(**kwargs)
-        self.set_file(filepath)
+        if filepath is not None:
+            self.set_file(filepath)
 
     @property
     def filename(self):
@@ -261,6 +450,30 @@ class BasisSetData(Data):
         ----------
         basis_file : str or filelike
 
+        Raises
+        ------
+        ValueError
+            a file has already been set for this BasisSetData instance
+
+        """
+        metadata, content = parse_basis(basis_file)
+        _cache_content_parse(metadata, content)
+        self.set_parsed(metadata, content, get_basis_filename(basis_file))
+
+    def set_parsed(self, metadata, content, filename):
+        """Store the pre-parsed attributes and content of a basis set file.
+
+        The metadata is checked against the content when the node is stored
+        (see ``_validate``).
+
+        Parameters
+        ----------
+        metadata : dict
+        content : str
+            as returned by ``parse_basis``
+        filename : str
+            the name to store the content as
+
         Raises
         ------
         ValueError
@@ -272,7 +485,6 @@ class BasisSetData(Data):
                 "a file has already been set for this BasisSetData instance"
             )
 
-        metadata, content = parse_basis(basis_file)
         md5sum = md5_from_string(content)
 
         # store the metadata and md5 in the database
@@ -281,12 +493,6 @@ class BasisSetData(Data):
         self.set_attribute("md5", md5sum)
 
         # store the rest of the file content as a file in the file repository
-        if isinstance(basis_file, str):
-            filename = os.path.basename(basis_file)
-        elif hasattr(basis_file, "name"):
-            filename = os.path.basename(basis_file.name)
-        else:
-            filename = "stringio.txt"
         self.put_object_from_filelike(StringIO(content), path=filename, mode="w")
 
         self.set_attribute("filename", filename)
@@ -336,8 +542,39 @@ class BasisSetData(Data):
         return self.get_attribute("element", None)
 
     def get_data(self):
-        """Return the basis set content, parsed to a JSON format."""
-        return parse_bsets_stdin(self.content, isolated=True)[self.element]
+        """Return the basis set content, parsed to a JSON format.
+
+        The parsed data is cached (see ``BASIS_PARSE_CACHE``),
+        keyed on the md5 hash of the content.
+        """
+        md5sum = self.md5sum
+        data = None if md5sum is None else BASIS_PARSE_CACHE.get("data", md5sum)
+        if data is None:
+            data = parse_bsets_stdin(self.content, isolated=True)[self.element]
+            if md5sum is not None:
+                BASIS_PARSE_CACHE.set("data", md5sum, data)
+        return data
+
+    @staticmethod
+    def clear_cache():
+        """Clear the cache of parsed basis sets."""
+        BASIS_PARSE_CACHE.clear()
+
+    @staticmethod
+    def get_cache_info():
+        """Return the statistics of the cache of parsed basis sets.
+
+        :return: dict of hits, misses, evictions, entries, max_entries
+        """
+        return BASIS_PARSE_CACHE.info()
+
+    @staticmethod
+    def set_cache_limits(max_entries=None):
+        """Set the maximum number of entries in the cache of parsed basis sets.
+
+        :param max_entries: int or None
+        """
+        BASIS_PARSE_CACHE.set_limits(max_entries=max_entries)
 
     @classmethod
     def get_or_create(cls, basis_file, use_first=False, store_basis=True):
@@ -482,13 +719,19 @@ class BasisSetData(Data):
         return BasisSetFamily.get(label=group_label)
 
     @classmethod
-    def get_basis_group_map(cls, group_name):
+    def get_basis_group_map(cls, group_name, elements=None):
         """Get a mapping of elements to basissets in a basis set family.
 
+        The basis sets of the family are retrieved in a single query,
+        projecting their element (without loading the group's other nodes).
+
         Parameters
         ----------
         group_name : str
             the group name of the basis set
+        elements : list[str] or None
+            if not None, only return the basis sets for these elements
+            (if they are present in the family)
 
         Returns
         -------
@@ -499,22 +742,40 @@ class BasisSetData(Data):
         ------
         aiida.common.exceptions.MultipleObjectsError
             if there is more than one element s
+        aiida.common.exceptions.NotExistent
+            if the family does not exist
 
         """
+        query = QueryBuilder()
+        query.append(BasisSetFamily, filters={"label": group_name}, tag="group")
+        query.append(
+            cls,
+            with_group="group",
+            project=["attributes.element", "*"],
+        )
         family_bases = {}
-        family = cls.get_basis_group(group_name)
-        for node in family.nodes:
-            if isinstance(node, cls):
-                if node.element in family_bases:
-                    raise MultipleObjectsError(
-                        "More than one BasisSetData for element {} found in "
-                        "family {}".format(node.element, group_name)
-                    )
-                family_bases[node.element] = node
+        for element, node in query.iterall():
+            if element in family_bases and family_bases[element].pk != node.pk:
+                raise MultipleObjectsError(
+                    "More than one BasisSetData for element {} found in "
+                    "family {}".format(element, group_name)
+                )
+            family_bases[element] = node
+
+        if not family_bases:
+            # raise NotExistent if the family does not exist
+            cls.get_basis_group(group_name)
+
+        if elements is not None:
+            family_bases = {
+                element: node
+                for element, node in family_bases.items()
+                if element in elements
+            }
         return family_bases
 
     @classmethod
-    def get_basis_groups(cls, filter_elements=None, user=None):
+    def get_basis_groups(cls, filter_elements=None, user=None, counts=False):
         """Return all names of groups of type BasisFamily, possibly with some filters.
 
         :param filter_elements: A string or a list of strings.
@@ -524,7 +785,11 @@ class BasisSetData(Data):
         :param user: if None (default), return the groups for all users.
                If defined, it should be either a DbUser instance, or a string
                for the username (that is, the user email).
+        :param counts: if True, return a list of ``BasisFamilySummary``,
+               retrieved in a single query, without loading any nodes
         """
+        if counts:
+            return cls._get_basis_group_summaries(filter_elements, user)
 
         builder = QueryBuilder()
         builder.append(BasisSetFamily, tag="group", project="*")
@@ -546,6 +811,54 @@ class BasisSetData(Data):
 
         return builder.all(flat=True)
 
+    @classmethod
+    def _get_basis_group_summaries(cls, filter_elements=None, user=None):
+        """Return a ``BasisFamilySummary`` for each group of type BasisFamily.
+
+        The groups and the (pk, element) of their basis sets are retrieved in a single
+        (outer-joined) query, and aggregated per group
+        (the QueryBuilder does not support ``GROUP BY``).
+
+        :param filter_elements: A string or a list of strings.
+               If present, returns only the groups that contains one Basis for
+               every element present in the list.
+        :param user: if not None, the email of the user that the groups belong to
+        """
+        builder = QueryBuilder()
+        builder.append(
+            BasisSetFamily, tag="group", project=["id", "label", "description"]
+        )
+        if user:
+            builder.append(User, filters={"email": {"==": user}}, with_group="group")
+        builder.append(
+            cls,
+            with_group="group",
+            outerjoin=True,
+            project=["id", "attributes.element"],
+        )
+        builder.order_by({BasisSetFamily: {"id": "asc"}})
+
+        groups = OrderedDict()
+        for group_id, label, description, pk, element in builder.iterall():
+            summary = groups.setdefault(group_id, (label, description, [], set()))
+            if pk is not None:
+                summary[2].append(pk)
+                summary[3].add(element)
+
+        if isinstance(filter_elements, str):
+            filter_elements = [filter_elements]
+
+        summaries = []
+        for label, description, pks, elements in groups.values():
+            if filter_elements is not None and not elements.issuperset(filter_elements):
+                continue
+            summaries.append(
+                BasisFamilySummary(
+                    label, description, len(pks), sorted(elements), sorted(pks)
+                )
+            )
+        return summaries
+
     @classmethod
     def get_basissets_from_structure(cls, structure, family_name, by_kind=False):
         """
@@ -561,7 +874,9 @@ class BasisSetData(Data):
         """
         from aiida.common.exceptions import NotExistent
 
-        family_bases = cls.get_basis_group_map(family_name)
+        family_bases = cls.get_basis_group_map(
+            family_name, elements=set(kind.symbol for kind in structure.kinds)
+        )
 
         basis_list = {}
         for kind in structure.kinds:
@@ -669,6 +984,8 @@ class BasisSetData(Data):
         stop_if_existing=True,
         extension=".basis",
         dry_run=False,
+        max_workers=None,
+        return_timings=False,
     ):
         """
         Upload a set of Basis Set files in a given group.
@@ -684,6 +1001,14 @@ class BasisSetData(Data):
             If False, simply adds the existing BasisSetData node to the group.
         :param extension: the filename extension to look for
         :param dry_run: If True, do not change the database.
+        :param max_workers: if greater than 1, parse the files in parallel,
+            using a pool of this many processes
+        :param return_timings: if True, also return a dict of the time (in seconds)
+            taken for each phase of the upload: 'parse' the files,
+            'query' the database for existing basis sets, 'store' the new basis sets,
+            and add them to the 'group'
+        :return: (number of files, number of new basis sets),
+            plus the timings if ``return_timings=True``
         """
         if isinstance(folder, str):
             folder = pathlib.Path(folder)
@@ -712,17 +1037,25 @@ class BasisSetData(Data):
 
         # NOTE: GROUP SAVED ONLY AFTER CHECKS OF UNICITY
 
-        basis_and_created = retrieve_basis_sets(paths, stop_if_existing)
+        timings = {}
+        basis_and_created = retrieve_basis_sets(
+            paths, stop_if_existing, max_workers=max_workers, timings=timings
+        )
         # check whether basisset are unique per element
         elements = [(i[0].element, i[0].md5sum) for i in basis_and_created]
         # If group already exists, check also that I am not inserting more than
         # once the same element
         if not group_created:
-            for aiida_n in group.nodes:
-                # Skip non-basis sets
-                if not isinstance(aiida_n, BasisSetData):
-                    continue
-                elements.append((aiida_n.element, aiida_n.md5sum))
+            start_time = time.perf_counter()
+            qb = QueryBuilder()
+            qb.append(BasisSetFamily, filters={"id": group.id}, tag="group")
+            qb.append(
+                BasisSetData,
+                with_group="group",
+                project=["attributes.element", "attributes.md5"],
+            )
+            elements.extend(tuple(row) for row in qb.iterall())
+            timings["query"] += time.perf_counter() - start_time
 
         elements = set(elements)  # Discard elements with the same MD5, that would
         # not be stored twice
@@ -737,19 +1070,27 @@ class BasisSetData(Data):
                 )
             )
 
-        # At this point, save the group, if still unstored
-        if group_created and not dry_run:
-            group.store()
-
-        # save the basis set in the database, and add them to group
-        for basisset, created in basis_and_created:
-            if created and not dry_run:
-                basisset.store()
-
-        # Add elements to the group all together
+        # save the basis set in the database, all together
+        start_time = time.perf_counter()
+        if not dry_run:
+            with get_manager().get_backend().transaction():
+                for basisset, created in basis_and_created:
+                    if created:
+                        basisset.store(with_transaction=False)
+        timings["store"] = time.perf_counter() - start_time
+
+        # At this point, save the group, if still unstored,
+        # and add elements to the group all together
+        start_time = time.perf_counter()
         if not dry_run:
-            group.add_nodes([basis for basis, created in basis_and_created])
+            if group_created:
+                group.store()
+            unique_bases = {basis.uuid: basis for basis, _ in basis_and_created}
+            group.add_nodes(list(unique_bases.values()))
+        timings["group"] = time.perf_counter() - start_time
 
         nuploaded = len([_ for _, created in basis_and_created if created])
 
+        if return_timings:
+            return len(paths), nuploaded, timings
         return len(paths), nuploaded
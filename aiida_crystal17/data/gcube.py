@@ -14,10 +14,14 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU Lesser General Public License for more details.
 """Aiida data type to store a gaussian cube."""
+from collections import OrderedDict
 from contextlib import contextmanager
+import copy
 import io
 import os
+import shutil
 import tempfile
+import threading
 from zipfile import ZIP_DEFLATED, ZipFile
 
 from aiida.orm import Data
@@ -25,13 +29,155 @@ import ase
 import numpy as np
 
 from aiida_crystal17.common import SYMBOLS
-from aiida_crystal17.parsers.raw.gaussian_cube import read_gaussian_cube
+from aiida_crystal17.common.parsing import convert_units
+from aiida_crystal17.parsers.raw.gaussian_cube import (
+    GcubeResult,
+    coarsen_gaussian_cube,
+    get_coarsen_stride,
+    integrate_spheres,
+    iter_gaussian_cube_slabs,
+    read_gaussian_cube,
+    read_gaussian_cube_header,
+    reduce_density,
+    write_gaussian_cube,
+)
+
+
+class CubeDataCache(object):
+    """A least-recently-used cache of parsed gaussian cube data.
+
+    Entries are keyed on ``(uuid, return_density, dist_units)``,
+    and are evicted (least recently used first)
+    when either the total size of the density arrays exceeds ``max_bytes``,
+    or the number of entries exceeds ``max_entries``.
+
+    """
+
+    def __init__(self, max_bytes=2 ** 30, max_entries=64):
+        """Initialise the cache.
+
+        Parameters
+        ----------
+        max_bytes : int
+            the maximum total size of the cached density arrays
+        max_entries : int
+            the maximum number of entries
+
+        """
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_nbytes(cube_data):
+        return 0 if cube_data.density is None else cube_data.density.nbytes
+
+    def get(self, uuid, return_density, dist_units):
+        """Return the cached data, or None if it is not in the cache.
+
+        If the density is not requested,
+        an entry that includes the density will also be used.
+
+        """
+        keys = [(uuid, return_density, dist_units)]
+        if not return_density:
+            keys.append((uuid, True, dist_units))
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    cube_data = self._entries[key]
+                    if not return_density:
+                        cube_data = cube_data._replace(density=None)
+                    return cube_data
+            self.misses += 1
+        return None
+
+    def set(self, uuid, return_density, dist_units, cube_data):
+        """Add data to the cache (evicting entries, if necessary)."""
+        nbytes = self._entry_nbytes(cube_data)
+        if nbytes > self._max_bytes:
+            return
+        key = (uuid, return_density, dist_units)
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entry_nbytes(self._entries.pop(key))
+            self._entries[key] = cube_data
+            self._nbytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            self._nbytes > self._max_bytes or len(self._entries) > self._max_entries
+        ):
+            _, cube_data = self._entries.popitem(last=False)
+            self._nbytes -= self._entry_nbytes(cube_data)
+            self.evictions += 1
+
+    def clear(self, uuid=None):
+        """Remove all entries, or only those for a single node.
+
+        Clearing all entries also resets the statistics.
+
+        """
+        with self._lock:
+            if uuid is None:
+                self._entries.clear()
+                self._nbytes = 0
+                self.hits = self.misses = self.evictions = 0
+                return
+            for key in [key for key in self._entries if key[0] == uuid]:
+                self._nbytes -= self._entry_nbytes(self._entries.pop(key))
+
+    def set_limits(self, max_bytes=None, max_entries=None):
+        """Set the maximum size of the cache (evicting entries, if necessary)."""
+        with self._lock:
+            if max_bytes is not None:
+                self._max_bytes = max_bytes
+            if max_entries is not None:
+                self._max_entries = max_entries
+            self._evict()
+
+    def info(self):
+        """Return the statistics of the cache.
+
+        Returns
+        -------
+        dict
+
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "max_bytes": self._max_bytes,
+                "max_entries": self._max_entries,
+            }
+
+
+#: the process-wide cache of ``GaussianCube.get_cube_data``
+CUBE_DATA_CACHE = CubeDataCache()
 
 
 class GaussianCube(Data):
     """Aiida data type to store a gaussian cube.
 
     The file is stored within a compressed zip folder, reducing storage space.
+    Alternatively (with ``storage="array"``),
+    the header data is stored in the attributes,
+    and the density is stored in the zip folder as binary ``.npy`` arrays,
+    each containing a slab of planes along the first axis of the grid.
+    This removes the need to parse the text file, on every access,
+    and only the slabs that are required need to be decompressed.
 
     The specification can be found at:
     http://h5cube-spec.readthedocs.io/en/latest/cubeformat.html
@@ -42,9 +188,16 @@ class GaussianCube(Data):
 
     _zip_filename = "gcube.zip"
     _cube_filename = "gaussian.cube"
+    _slab_filename = "density_{:05d}.npy"
     _compression_method = ZIP_DEFLATED
-
-    def __init__(self, fileobj, binary=True, **kwargs):
+    # the (approximate) maximum size of each slab array
+    _slab_bytes = 2 ** 22
+    # the (approximate) size of each chunk of text (and slab) read from a text file
+    _text_chunk_bytes = 2 ** 20
+    _storage_formats = ("text", "array")
+    _density_dtypes = ("float64", "float32")
+
+    def __init__(self, fileobj, binary=True, storage="text", dtype="float64", **kwargs):
         """Store a gaussian cube file.
 
         Parameters
@@ -53,35 +206,56 @@ class GaussianCube(Data):
             the file or path to the file
         binary : bool
             whether the file is opened in binary mode
+        storage : str
+            store the file as 'text', or the density as binary 'array's
+        dtype : str
+            the dtype of the density arrays (only used for 'array' storage),
+            'float64' or 'float32'
 
         """
         super(GaussianCube, self).__init__(**kwargs)
 
         if isinstance(fileobj, str):
-            self.set_from_filepath(fileobj)
+            self.set_from_filepath(fileobj, storage=storage, dtype=dtype)
         else:
-            self.set_from_fileobj(fileobj, binary=binary)
+            self.set_from_fileobj(fileobj, binary=binary, storage=storage, dtype=dtype)
 
-    def set_from_filepath(self, filepath):
+    def set_from_filepath(self, filepath, storage="text", dtype="float64"):
         """Store a gaussian cube file, given a path to the file.
 
         Parameters
         ----------
         filepath : str
+        storage : str
+            store the file as 'text', or the density as binary 'array's
+        dtype : str
+            the dtype of the density arrays (only used for 'array' storage),
+            'float64' or 'float32'
 
         """
-        self.reset_attributes({})
-
-        # read the header of the file
-        with io.open(filepath, "r") as handle:
-            cube_data = read_gaussian_cube(
-                handle, return_density=False, dist_units="angstrom"
+        if storage not in self._storage_formats:
+            raise ValueError(
+                "storage must be one of {}: {}".format(self._storage_formats, storage)
             )
+        if dtype not in self._density_dtypes:
+            raise ValueError(
+                "dtype must be one of {}: {}".format(self._density_dtypes, dtype)
+            )
+        self.reset_attributes({})
+        CUBE_DATA_CACHE.clear(self.uuid)
 
         # Write the zip to a temporary file, and then add it to the node repository
         with tempfile.NamedTemporaryFile() as temp_handle:
-            with ZipFile(temp_handle, "w", self._compression_method) as zip_file:
-                zip_file.write(filepath, arcname=self._cube_filename)
+            with io.open(filepath, "r") as handle:
+                # read the header of the file
+                cube_data = read_gaussian_cube_header(handle, dist_units="angstrom")
+                with ZipFile(temp_handle, "w", self._compression_method) as zip_file:
+                    if storage == "text":
+                        zip_file.write(filepath, arcname=self._cube_filename)
+                    else:
+                        slab_size = self._write_slabs(
+                            zip_file, handle, cube_data.voxel_grid, dtype
+                        )
 
             # Flush and rewind the temporary handle,
             # otherwise the command to store it in the repo will write an empty file
@@ -94,8 +268,20 @@ class GaussianCube(Data):
 
         # store information about the zip file
         self.set_attribute("zip_filename", self._zip_filename)
-        self.set_attribute("cube_filename", self._cube_filename)
         self.set_attribute("compression_method", self._compression_method)
+        self.set_attribute("storage_format", storage)
+        if storage == "text":
+            self.set_attribute("cube_filename", self._cube_filename)
+        else:
+            self.set_attribute("slab_filename", self._slab_filename)
+            self.set_attribute("slab_size", slab_size)
+            self.set_attribute("density_dtype", dtype)
+            # store the remaining header information, required to recreate the file
+            self.set_attribute("voxel_cell", cube_data.voxel_cell)
+            self.set_attribute("origin", cube_data.origin)
+            self.set_attribute("atoms_positions", cube_data.atoms_positions)
+            self.set_attribute("atoms_nuclear_charge", cube_data.atoms_nuclear_charge)
+            self.set_attribute("atoms_atomic_number", cube_data.atoms_atomic_number)
 
         # store some basic information about the cube
         self.set_attribute("cell", cube_data.cell)
@@ -109,7 +295,25 @@ class GaussianCube(Data):
             ),
         )
 
-    def set_from_fileobj(self, fileobj, binary=True):
+    def _write_slabs(self, zip_file, handle, voxel_grid, dtype):
+        """Write the density to the zip file, as slabs of planes along the first axis.
+
+        Returns
+        -------
+        int
+            the number of planes per slab
+
+        """
+        plane_bytes = voxel_grid[1] * voxel_grid[2] * np.dtype(dtype).itemsize
+        slab_size = int(max(1, self._slab_bytes // plane_bytes))
+        for index, slab in enumerate(
+            iter_gaussian_cube_slabs(handle, voxel_grid, slab_size, dtype=dtype)
+        ):
+            with zip_file.open(self._slab_filename.format(index), "w") as slab_handle:
+                np.lib.format.write_array(slab_handle, slab, allow_pickle=False)
+        return slab_size
+
+    def set_from_fileobj(self, fileobj, binary=True, storage="text", dtype="float64"):
         """Store a gaussian cube file, given a handle to the file.
 
         Parameters
@@ -117,6 +321,11 @@ class GaussianCube(Data):
         fileobj : file-like
         binary : bool
             whether the file is opened in binary mode
+        storage : str
+            store the file as 'text', or the density as binary 'array's
+        dtype : str
+            the dtype of the density arrays (only used for 'array' storage),
+            'float64' or 'float32'
 
         """
         path = None
@@ -126,14 +335,35 @@ class GaussianCube(Data):
             ) as temp_handle:
                 temp_handle.write(fileobj.read())
                 path = temp_handle.name
-            self.set_from_filepath(path)
+            self.set_from_filepath(path, storage=storage, dtype=dtype)
         finally:
             if path:
                 os.remove(path)
 
+    @property
+    def storage_format(self):
+        """Return the storage format of the cube, 'text' or 'array'."""
+        return self.get_attribute("storage_format", "text")
+
     @contextmanager
     def open_cube_file(self, binary=False):
-        """Open a file handle to the gaussian cube file."""
+        """Open a file handle to the gaussian cube file.
+
+        For 'array' storage, the file is first written to a temporary file.
+        """
+        if self.storage_format == "array":
+            with tempfile.TemporaryFile() as temp_handle:
+                text_handle = io.TextIOWrapper(temp_handle)
+                self.write_cube_file(text_handle)
+                text_handle.flush()
+                text_handle.detach()
+                temp_handle.seek(0)
+                if binary:
+                    yield temp_handle
+                else:
+                    yield io.TextIOWrapper(temp_handle)
+            return
+
         zip_filename = self.get_attribute("zip_filename")
         compression_method = self.get_attribute("compression_method")
         cube_filename = self.get_attribute("cube_filename")
@@ -146,27 +376,209 @@ class GaussianCube(Data):
                     else:
                         yield io.TextIOWrapper(file_handle)
 
-    def get_cube_data(self, return_density=False, dist_units="angstrom"):
+    def write_cube_file(self, handle, stride=None, target_voxels=None):
+        """Write the gaussian cube file.
+
+        The density may be coarsened, while it is written,
+        by averaging blocks of voxels
+        (see ``aiida_crystal17.parsers.raw.gaussian_cube.coarsen_gaussian_cube``).
+
+        Parameters
+        ----------
+        handle : file-like
+            a file handle, opened in text mode
+        stride : int or list[int] or None
+            the number of voxels per block, for all or each axis
+        target_voxels : int or None
+            the maximum number of voxels,
+            from which the stride is computed (if ``stride`` is None)
+
+        """
+        if stride is None and target_voxels is not None:
+            stride = get_coarsen_stride(self.get_attribute("voxel_grid"), target_voxels)
+        if stride is not None and np.all(np.asarray(stride) == 1):
+            stride = None
+        if self.storage_format == "text" and stride is None:
+            with self.open_cube_file() as in_handle:
+                shutil.copyfileobj(in_handle, handle)
+            return
+        cube_data = self.get_cube_data(return_density=False, dist_units="angstrom")
+        slabs = (slab for _, slab in self.iter_density_slabs())
+        if stride is not None:
+            cube_data, slabs = coarsen_gaussian_cube(cube_data, slabs, stride)
+        write_gaussian_cube(handle, cube_data, slabs)
+
+    def iter_density_slabs(self, start=0, stop=None):
+        """Iterate over slabs of the density, along the first axis of the grid.
+
+        For 'array' storage, only the slabs that overlap ``[start, stop)``
+        are read from the repository.
+
+        Parameters
+        ----------
+        start : int
+            the first plane (along the first axis) to return
+        stop : int or None
+            the plane (along the first axis) before which to stop
+
+        Yields
+        ------
+        tuple[int, numpy.ndarray]
+            the index of the first plane and the slab array, of shape (n, b, c)
+
+        """
+        voxel_grid = self.get_attribute("voxel_grid")
+        stop = voxel_grid[0] if stop is None else min(stop, voxel_grid[0])
+        if self.storage_format == "array":
+            slab_size = self.get_attribute("slab_size")
+            slab_filename = self.get_attribute("slab_filename")
+            with self.open(self.get_attribute("zip_filename"), mode="rb") as handle:
+                with ZipFile(handle, "r") as zip_file:
+                    for index in range(start // slab_size, -(-stop // slab_size)):
+                        filename = slab_filename.format(index)
+                        with zip_file.open(filename) as slab_handle:
+                            slab = np.lib.format.read_array(
+                                slab_handle, allow_pickle=False
+                            )
+                        yield self._trim_slab(index * slab_size, slab, start, stop)
+            return
+
+        plane_bytes = voxel_grid[1] * voxel_grid[2] * 8
+        slab_size = int(max(1, self._text_chunk_bytes // plane_bytes))
+        with self.open_cube_file() as handle:
+            read_gaussian_cube_header(handle)
+            slab_start = 0
+            for slab in iter_gaussian_cube_slabs(
+                handle, voxel_grid, slab_size, chunk_bytes=self._text_chunk_bytes
+            ):
+                if slab_start + len(slab) > start:
+                    yield self._trim_slab(slab_start, slab, start, stop)
+                slab_start += len(slab)
+                if slab_start >= stop:
+                    break
+
+    @staticmethod
+    def _trim_slab(slab_start, slab, start, stop):
+        """Trim a slab to the planes within ``[start, stop)``."""
+        first = max(start - slab_start, 0)
+        last = min(stop - slab_start, len(slab))
+        return slab_start + first, slab[first:last]
+
+    def _get_header_data(self, dist_units):
+        """Return the header data of a cube with 'array' storage."""
+        cube_data = GcubeResult(
+            self.get_attribute("header"),
+            self.get_attribute("cell"),
+            self.get_attribute("voxel_cell"),
+            self.get_attribute("voxel_grid"),
+            self.get_attribute("origin"),
+            self.get_attribute("atoms_positions"),
+            self.get_attribute("atoms_nuclear_charge"),
+            self.get_attribute("atoms_atomic_number"),
+            self.get_attribute("units"),
+            None,
+        )
+        in_units = cube_data.units["length"]
+        if in_units == dist_units:
+            return cube_data
+        return cube_data._replace(
+            units=dict(cube_data.units, length=dist_units),
+            **{
+                field: convert_units(
+                    np.array(getattr(cube_data, field)), in_units, dist_units
+                ).tolist()
+                for field in ("cell", "voxel_cell", "origin", "atoms_positions")
+            }
+        )
+
+    def _read_cube_data(self, return_density, dist_units):
+        """Read the cube data from the repository."""
+        if self.storage_format == "text":
+            with self.open_cube_file() as handle:
+                return read_gaussian_cube(
+                    handle, return_density=return_density, dist_units=dist_units
+                )
+        cube_data = self._get_header_data(dist_units)
+        if not return_density:
+            return cube_data
+        density = np.empty(
+            cube_data.voxel_grid, dtype=self.get_attribute("density_dtype")
+        )
+        for slab_start, slab in self.iter_density_slabs():
+            density[slab_start : slab_start + len(slab)] = slab
+        return cube_data._replace(density=density)
+
+    def get_cube_data(self, return_density=False, dist_units="angstrom", cache=True):
         """Parse gaussian cube files to a data structure.
 
+        The parsed data is stored in a process-wide, least-recently-used cache
+        (see ``GaussianCube.get_cache_info``),
+        and so the returned density array is read-only.
+
         Parameters
         ----------
         return_density : bool
             whether to read and return the density values
         dist_units : str
             the distance units to return
+        cache : bool
+            whether to use the cache
 
         Returns
         -------
         aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
 
         """
-        # TODO cache
-        with self.open_cube_file() as handle:
-            cube_data = read_gaussian_cube(
-                handle, return_density=return_density, dist_units=dist_units
-            )
-        return cube_data
+        cube_data = None
+        if cache:
+            cube_data = CUBE_DATA_CACHE.get(self.uuid, return_density, dist_units)
+        if cube_data is None:
+            cube_data = self._read_cube_data(return_density, dist_units)
+            if not cache:
+                return cube_data
+            if cube_data.density is not None:
+                cube_data.density.flags.writeable = False
+            CUBE_DATA_CACHE.set(self.uuid, return_density, dist_units, cube_data)
+        # copy the (small) mutable lists, so that the cached data cannot be modified
+        density = cube_data.density
+        return copy.deepcopy(cube_data._replace(density=None))._replace(density=density)
+
+    @staticmethod
+    def clear_cache(uuid=None):
+        """Clear the cache of parsed cube data, for all nodes or a single node.
+
+        Parameters
+        ----------
+        uuid : str or None
+
+        """
+        CUBE_DATA_CACHE.clear(uuid)
+
+    @staticmethod
+    def get_cache_info():
+        """Return the statistics of the cache of parsed cube data.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, entries, nbytes, max_bytes, max_entries
+
+        """
+        return CUBE_DATA_CACHE.info()
+
+    @staticmethod
+    def set_cache_limits(max_bytes=None, max_entries=None):
+        """Set the maximum size of the cache of parsed cube data.
+
+        Parameters
+        ----------
+        max_bytes : int or None
+            the maximum total size of the cached density arrays
+        max_entries : int or None
+            the maximum number of entries
+
+        """
+        CUBE_DATA_CACHE.set_limits(max_bytes=max_bytes, max_entries=max_entries)
 
     def get_ase(self, pbc=(True, True, True)):
         """Return the ``ase.Atoms`` for the structure."""
@@ -178,27 +590,74 @@ class GaussianCube(Data):
             pbc=pbc,
         )
 
+    def reduce(self, ops, axis=2, bins=100, value_range=None, isovalue=0.0):
+        """Compute statistics of the density, without reading it all into memory.
+
+        The density is read slab by slab (see ``iter_density_slabs``).
+
+        Parameters
+        ----------
+        ops : list[str]
+            the reductions to compute: 'integral', 'mean', 'min', 'max',
+            'histogram', 'planar_average' or 'fraction_above'
+            (see ``aiida_crystal17.parsers.raw.gaussian_cube.reduce_density``)
+        axis : int
+            the axis of the grid, along which to compute planar averages
+        bins : int
+            the number of histogram bins
+        value_range : tuple[float, float] or None
+            the range of the histogram bins,
+            if None (and a histogram is requested),
+            the minimum and maximum values are computed in an initial pass
+        isovalue : float
+            the value for 'fraction_above'
+
+        Returns
+        -------
+        dict
+
+        """
+        if "histogram" in ops and value_range is None:
+            limits = self.reduce(["min", "max"])
+            value_range = (limits["min"], limits["max"])
+        return reduce_density(
+            (slab for _, slab in self.iter_density_slabs()),
+            self.get_cube_data(return_density=False).voxel_cell,
+            ops,
+            axis=axis,
+            bins=bins,
+            value_range=value_range,
+            isovalue=isovalue,
+        )
+
     def compute_integration_cell(self):
         """Integrate the density over the full cell."""
         data = self.get_cube_data(return_density=True)
         voxel_volume = np.linalg.det(data.voxel_cell)
         return np.sum(data.density) * voxel_volume
 
-    def compute_integration_sphere(self, positions, radius, pbc=(True, True, True)):
+    def compute_integration_sphere(
+        self, positions, radius, pbc=(True, True, True), subdivisions=None
+    ):
         """Integrate the density over a sphere.
 
         Parameters
         ----------
         positions : list
             (x, y, z) or list of (x, y, z)
-        radius : float
+        radius : float or list[float]
+            radius for all spheres or per sphere,
             must be less than the shortest periodic cell vector length
         pbc : list[bool]
             periodic dimensions
+        subdivisions : int or None
+            if not None, weight voxels partially within the sphere,
+            by the fraction of (subdivisions^3) points within the voxel
+            that are inside the sphere
 
         Returns
         -------
-        float
+        list[float]
 
         """
         assert np.array(pbc).shape == (3,)
@@ -209,53 +668,45 @@ class GaussianCube(Data):
 
         data = self.get_cube_data(return_density=True)
 
-        voxel_volume = np.linalg.det(data.voxel_cell)
-
         # account for periodic boundaries
         plengths = [l for p, l in zip(pbc, np.linalg.norm(data.cell, axis=1)) if p]
-        if plengths and radius > min(plengths):
+        if plengths and np.max(radius) > min(plengths):
             raise ValueError(
                 "The radius must be less than the shortest periodic cell vector ({0:.2f})".format(
                     min(plengths)
                 )
             )
 
-        # TODO this could be made more efficient, e.g. by tessellating according to the quadrant the position is in
-        density = np.tile(data.density, [3 if p else 1 for p in pbc])
-        offset_positions = positions
-        for i, is_periodic in enumerate(pbc):
-            if is_periodic:
-                offset_positions = offset_positions + np.array(data.cell[i])
-
-        # get values and coordinates for each voxel
-        values = np.array([v for (x, y, z), v in np.ndenumerate(density)])
-        indices = [[x, y, z] for (x, y, z), v in np.ndenumerate(density)]
-        coordinates = np.dot(indices, data.voxel_cell) - np.array(data.origin)
-
-        # get distance squared to each voxel
-        final_values = []
-        for offset_position in offset_positions:
-            dist_sq = ((coordinates - offset_position) ** 2).sum(1)
-            # TODO integrating voxels that are partially within the sphere?
-            final_values.append(np.sum(values[dist_sq <= (radius ** 2)]) * voxel_volume)
-
-        return final_values
+        return integrate_spheres(
+            data.density,
+            data.voxel_cell,
+            data.origin,
+            positions,
+            radius,
+            pbc=pbc,
+            subdivisions=subdivisions,
+        ).tolist()
 
-    def compute_integration_atom(self, indices, radius, pbc=(True, True, True)):
+    def compute_integration_atom(
+        self, indices, radius, pbc=(True, True, True), subdivisions=None
+    ):
         """Integrate the density over a sphere.
 
         Parameters
         ----------
         indices : int or list[int]
         radius : float or list[float]
-            radius for all atoms or per cell
+            radius for all atoms or per atom,
             must be less than the shortest periodic cell vector length
         pbc : list[bool]
             periodic dimensions
+        subdivisions : int or None
+            if not None, weight voxels partially within the sphere
+            (see ``compute_integration_sphere``)
 
         Returns
         -------
-        float
+        list[float]
 
         """
         if isinstance(indices, int):
@@ -263,5 +714,8 @@ class GaussianCube(Data):
         indices = np.array(indices)
         data = self.get_cube_data(return_density=False)
         return self.compute_integration_sphere(
-            np.array(data.atoms_positions)[indices], radius=radius, pbc=pbc
+            np.array(data.atoms_positions)[indices],
+            radius=radius,
+            pbc=pbc,
+            subdivisions=subdivisions,
         )
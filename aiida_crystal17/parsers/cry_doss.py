@@ -20,7 +20,6 @@ from aiida.common import exceptions
 from aiida.engine import ExitCode
 from aiida.orm import ArrayData, Dict
 from aiida.parsers.parser import Parser
-import numpy as np
 
 from aiida_crystal17 import __version__
 from aiida_crystal17.parsers.raw.crystal_fort25 import parse_crystal_fort25_aiida
@@ -98,7 +97,7 @@ class CryDossParser(Parser):
         if iso_arrays is not None:
             array_data = ArrayData()
             for name, array in iso_arrays.items():
-                array_data.set_array(name, np.array(array))
+                array_data.set_array(name, array)
             self.out("arrays", array_data)
 
         if pbs_error is not None:
@@ -69,7 +69,10 @@ class CryMainParser(Parser):
             stdout_exit_code = self.exit_codes.ERROR_OUTPUT_FILE_MISSING
         else:
             self.logger.info("parsing stdout file")
-            stdout_exit_code = self.parse_stdout(stdout_fname)
+            stdout_exit_code = self.parse_stdout(
+                stdout_fname,
+                streaming=bool(self.node.get_option("parser_streaming")),
+            )
 
         if scheduler_exit_code is not None:
             return scheduler_exit_code
@@ -80,8 +83,14 @@ class CryMainParser(Parser):
 
         return ExitCode()
 
-    def parse_stdout(self, file_name):
-        """Parse the main stdout file."""
+    def parse_stdout(self, file_name, streaming=False):
+        """Parse the main stdout file.
+
+        :param file_name: the name of the file in the retrieved folder
+        :param streaming: parse the file in a single pass, line by line,
+            so that memory use does not scale with the size of the file
+
+        """
         init_struct = None
         init_settings = None
         if "structure" in self.node.inputs:
@@ -94,6 +103,7 @@ class CryMainParser(Parser):
                 parser_class=self.__class__.__name__,
                 init_struct=init_struct,
                 init_settings=init_settings,
+                streaming=streaming,
             )
 
         for etype in ["errors", "parser_errors", "parser_exceptions"]:
@@ -111,6 +121,10 @@ class CryMainParser(Parser):
             self.out("structure", parser_result.nodes.structure)
         if parser_result.nodes.symmetry is not None:
             self.out("symmetry", parser_result.nodes.symmetry)
+        if parser_result.nodes.history is not None:
+            self.out("history", parser_result.nodes.history)
+        if parser_result.nodes.mulliken is not None:
+            self.out("mulliken", parser_result.nodes.mulliken)
 
         return parser_result.exit_code
 
@@ -18,11 +18,11 @@ import traceback
 
 from aiida.common import exceptions
 from aiida.engine import ExitCode
-from aiida.orm import Dict
+from aiida.orm import ArrayData, Dict
 from aiida.parsers.parser import Parser
 
 from aiida_crystal17 import __version__
-from aiida_crystal17.parsers.raw.crystal_ppan import parse_crystal_ppan
+from aiida_crystal17.parsers.raw.crystal_ppan import parse_crystal_ppan, ppan_to_arrays
 from aiida_crystal17.parsers.raw.pbs import parse_pbs_stderr
 from aiida_crystal17.parsers.raw.properties_stdout import read_properties_stdout
 
@@ -62,6 +62,7 @@ class CryPpanParser(Parser):
         # parse PPAN.dat file
         ppan_error = None
         ppan_data = {}
+        ppan_arrays = None
         output_ppan_fname = self.node.get_option("output_ppan_fname")
         if output_ppan_fname not in output_folder.list_object_names():
             ppan_error = self.exit_codes.ERROR_PPAN_FILE_MISSING
@@ -69,6 +70,7 @@ class CryPpanParser(Parser):
             try:
                 with output_folder.open(output_ppan_fname) as handle:
                     ppan_data = parse_crystal_ppan(handle.read())
+                ppan_arrays = ppan_to_arrays(ppan_data)
             except Exception:
                 traceback.print_exc()
                 ppan_error = self.exit_codes.ERROR_PARSING_PPAN_FILE
@@ -93,11 +95,11 @@ class CryPpanParser(Parser):
 
         # make output nodes
         self.out("results", Dict(dict=final_data))
-        # if iso_arrays is not None:
-        #     array_data = ArrayData()
-        #     for name, array in iso_arrays.items():
-        #         array_data.set_array(name, np.array(array))
-        #     self.out('arrays', array_data)
+        if ppan_arrays:
+            array_data = ArrayData()
+            for name, array in ppan_arrays.items():
+                array_data.set_array(name, array)
+            self.out("mulliken", array_data)
 
         if pbs_error is not None:
             return pbs_error
@@ -13,9 +13,24 @@
 # but WITHOUT ANY WARRANTY; without even the implied warranty of
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU Lesser General Public License for more details.
+"""Parse the fort.25 output from CRYSTAL ``properties`` computations.
+
+The file contains a sequence of records, of type
+DOSS (density of states projections), BAND (band structure path segments)
+or MAPS (2D maps of a property, e.g. from ECHG or POTM).
+Files can be parsed one record at a time with ``iter_crystal_fort25``.
+"""
+from collections import namedtuple
+import io
+from itertools import islice
+
 import numpy as np
 
-from aiida_crystal17.common.parsing import convert_units, split_numbers
+from aiida_crystal17.common.parsing import (
+    convert_units,
+    split_fixed_width,
+    split_numbers,
+)
 
 IHFERM_MAP = {
     0: "closed shell, insulating system",
@@ -24,6 +39,22 @@ IHFERM_MAP = {
     3: "open shell, conducting system",
 }
 
+RECORD_TYPES = ("DOSS", "BAND", "MAPS")
+
+Fort25Record = namedtuple("Fort25Record", ["type", "header", "grid", "data"])
+Fort25Record.__doc__ = """A record of a fort.25 file.
+
+type: str
+    one of 'DOSS', 'BAND' or 'MAPS'
+header: dict
+    the first record line: 'system_type' (the IHFERM code),
+    'nrows', 'ncols', 'dx', 'dy' and 'cosxy'
+grid: dict
+    the second and third record lines, dependent on the type
+data: numpy.ndarray
+    the data block ``RDAT(NROW, NCOL)``, with shape (ncols, nrows)
+"""
+
 
 def parse_crystal_fort25(content):
     """Parse the fort.25 output from CRYSTAL.
@@ -54,155 +85,171 @@ def parse_crystal_fort25(content):
         4   RO(J),J=1,NCOL  DOS: density of states ro(eps(j)) (atomic units).
 
     """
-    system_type = None
-    fermi_energy = None
-    energy_delta = None
-    initial_energy = None
-    len_dos = None
-    alpha_projections = {}
-    beta_projections = {}
-    proj_number = 0
-
-    lines = content.splitlines()
-    lineno = 0
-
-    while lineno < len(lines):
-        line = lines[lineno].strip()
-
-        if line.startswith("-%-"):
-            proj_number += 1
-
-            if system_type is None:
-                system_type = line[3]
-            elif not system_type == line[3]:
-                raise IOError(
-                    "projection {0} has different system type ({1}) to previous ({2})".format(
-                        proj_number, line[3], system_type
-                    )
-                )
-
-            if not line[4:8] == "DOSS":
-                raise IOError("projection {0} is not of type DOSS".format(proj_number))
+    data = parse_crystal_fort25_arrays(content)
 
-            nrows, ncols, _, denergy, fermi = split_numbers(line[8:])
-            # nrows, ncols = (int(nrows), int(ncols))
+    total_alpha, projections_alpha = _channel_to_dicts(data["alpha"])
+    total_beta, projections_beta = _channel_to_dicts(data["beta"])
 
-            if energy_delta is None:
-                energy_delta = denergy
-            elif not energy_delta == denergy:
-                raise IOError(
-                    "projection {0} has different delta energy ({1}) to previous ({2})".format(
-                        proj_number, denergy, energy_delta
-                    )
-                )
-            if fermi_energy is None:
-                fermi_energy = fermi
-            elif not fermi_energy == fermi:
-                raise IOError(
-                    "projection {0} has different fermi energy ({1}) to previous ({2})".format(
-                        proj_number, fermi, fermi_energy
-                    )
-                )
+    return {
+        "units": data["units"],
+        "energy": data["energy"].tolist(),
+        "system_type": data["system_type"],
+        "fermi_energy": data["fermi_energy"],
+        "total_alpha": total_alpha,
+        "total_beta": total_beta,
+        "projections_alpha": projections_alpha,
+        "projections_beta": projections_beta,
+    }
 
-            lineno += 1
-            line = lines[lineno].strip()
 
-            ienergy = split_numbers(line)[1]
+def _channel_to_dicts(channel):
+    """Convert the arrays of a spin channel to the total and projection dicts."""
+    if channel is None:
+        return None, None
+    projections = [
+        {"id": int(projid), "norbitals": int(norbitals), "dos": dos.tolist()}
+        for projid, norbitals, dos in zip(
+            channel["ids"], channel["norbitals"], channel["dos"]
+        )
+    ]
+    total = projections.pop(int(np.argmax(channel["ids"])))
+    return total, projections or None
+
+
+def _decode_fixed_width_block(text, width, num_values):
+    """Decode a block of fixed width fields, split over a number of lines."""
+    fields = text.replace("\n", "")
+    if len(fields) == width * num_values:
+        # the common case, where all but the last line are full, and none are padded
+        try:
+            return np.frombuffer(
+                fields.encode("ascii"), dtype="S{}".format(width)
+            ).astype(float)
+        except ValueError:
+            pass
+    return split_fixed_width(text.splitlines(), width)
+
+
+def parse_crystal_fort25_arrays(content):
+    """Parse the DOSS fort.25 output from CRYSTAL, to numpy arrays.
+
+    The records are read by ``iter_crystal_fort25``,
+    and must all be DOSS records on the same energy grid.
+    See ``parse_crystal_fort25`` for the file format.
+
+    Parameters
+    ----------
+    content: str or io.TextIOBase
+        the content of the file, or a handle to it
+
+    Returns
+    -------
+    dict
+        with keys: 'units', 'energy' (array), 'system_type', 'fermi_energy',
+        'alpha' and 'beta' (None if there is only one spin channel).
+        Each spin channel is a dict of 'ids' and 'norbitals' (arrays of shape (n,))
+        and 'dos' (array of shape (n, n_points)), in the order of the file.
+        The total DOS is the projection with the highest id.
 
-            if initial_energy is None:
-                initial_energy = ienergy
-            elif not initial_energy == ienergy:
-                raise IOError(
-                    "projection {0} has different initial energy ({1}) to previous ({2})".format(
-                        proj_number, ienergy, initial_energy
-                    )
+    """
+    if isinstance(content, str):
+        content = io.StringIO(content)
+
+    first = None
+    ids = []
+    norbitals = []
+    dos = []
+    for record in iter_crystal_fort25(content):
+        proj_number = len(dos) + 1
+        values = record.data.ravel()
+        if first is None:
+            first = record
+            first_values = values
+        elif not record.header["system_type"] == first.header["system_type"]:
+            raise IOError(
+                "projection {0} has different system type ({1}) to previous ({2})".format(
+                    proj_number,
+                    record.header["system_type"],
+                    first.header["system_type"],
                 )
-
-            lineno += 1
-            line = lines[lineno].strip()
-
-            projid, norbitals, _, _, _, _ = [int(i) for i in line.split()]
-
-            lineno += 1
-            line = lines[lineno].strip()
-
-            dos = []
-            while not line.startswith("-%-"):
-                dos += split_numbers(line)
-                if lineno + 1 >= len(lines):
-                    break
-                lineno += 1
-                line = lines[lineno].strip()
-
-            if len_dos is None:
-                len_dos = len(dos)
-            elif not len_dos == len(dos):
+            )
+
+        if not record.type == "DOSS":
+            raise IOError("projection {0} is not of type DOSS".format(proj_number))
+
+        for name, value, previous in (
+            ("delta energy", record.header["dy"], first.header["dy"]),
+            ("fermi energy", record.header["cosxy"], first.header["cosxy"]),
+            ("initial energy", record.grid["y0"], first.grid["y0"]),
+            ("dos value lengths", len(values), len(first_values)),
+        ):
+            if not value == previous:
                 raise IOError(
-                    "projection {0} has different dos value lengths ({1}) to previous ({2})".format(
-                        proj_number, len(dos), len_dos
+                    "projection {0} has different {1} ({2}) to previous ({3})".format(
+                        proj_number, name, value, previous
                     )
                 )
 
-            if projid not in alpha_projections:
-                alpha_projections[projid] = {
-                    "id": projid,
-                    "norbitals": norbitals,
-                    "dos": dos,
-                }
-            elif projid in beta_projections:
-                raise IOError(
-                    "three data sets with same projid ({0}) were found".format(projid)
-                )
-            else:
-                beta_projections[projid] = {
-                    "id": projid,
-                    "norbitals": norbitals,
-                    "dos": dos,
-                }
-        else:
-            lineno += 1
-
-    system_type = IHFERM_MAP[int(system_type)]
-    fermi_energy = convert_units(float(fermi_energy), "hartree", "eV")
-
-    energy_delta = convert_units(float(energy_delta), "hartree", "eV")
-    initial_energy = convert_units(float(initial_energy), "hartree", "eV")
-    len_dos = int(len_dos)
+        ids.append(record.grid["projection"])
+        norbitals.append(record.grid["norbitals"])
+        dos.append(values)
+
+    if first is None:
+        raise IOError("no DOSS records were found")
+
+    ids = np.array(ids, dtype=int)
+    norbitals = np.array(norbitals, dtype=int)
+    dos = np.array(dos)
+
+    # the first data set of each projection is alpha, and the second beta
+    channels = np.empty(len(ids), dtype=int)
+    seen = {}
+    for index, projid in enumerate(ids):
+        channels[index] = seen.get(projid, 0)
+        if channels[index] > 1:
+            raise IOError(
+                "three data sets with same projid ({0}) were found".format(projid)
+            )
+        seen[projid] = channels[index] + 1
+
+    system_type = IHFERM_MAP[first.header["system_type"]]
+    fermi_energy = convert_units(float(first.header["cosxy"]), "hartree", "eV")
+
+    energy_delta = convert_units(float(first.header["dy"]), "hartree", "eV")
+    initial_energy = convert_units(float(first.grid["y0"]), "hartree", "eV")
+    len_dos = dos.shape[1]
     energies = np.linspace(
         initial_energy, initial_energy + len_dos * energy_delta, len_dos
-    ).tolist()
+    )
 
-    total_alpha = None
-    total_beta = None
-    if alpha_projections:
-        total_alpha = alpha_projections.pop(max(alpha_projections.keys()))
-    if beta_projections:
-        total_beta = beta_projections.pop(max(beta_projections.keys()))
+    def _channel(mask):
+        if not mask.any():
+            return None
+        if mask.all():
+            return {"ids": ids, "norbitals": norbitals, "dos": dos}
+        return {"ids": ids[mask], "norbitals": norbitals[mask], "dos": dos[mask]}
 
     return {
         "units": {"conversion": "CODATA2014", "energy": "eV"},
         "energy": energies,
         "system_type": system_type,
         "fermi_energy": fermi_energy,
-        "total_alpha": total_alpha,
-        "total_beta": total_beta,
-        "projections_alpha": list(alpha_projections.values())
-        if alpha_projections
-        else None,
-        "projections_beta": list(beta_projections.values())
-        if beta_projections
-        else None,
+        "alpha": _channel(channels == 0),
+        "beta": _channel(channels == 1),
     }
 
 
 def parse_crystal_fort25_aiida(fileobj):
-    """Take the result from `parse_crystal_fort25` and prepares it for AiiDA output."""
+    """Take the result from `parse_crystal_fort25_arrays` and prepares it for AiiDA output.
+
+    The values of the returned array data are numpy arrays.
+    """
 
     content = fileobj.read()
     if not content.strip():
         raise IOError("the file is empty")
 
-    read_data = parse_crystal_fort25(content)
+    read_data = parse_crystal_fort25_arrays(content)
     results_data = {}
 
     results_data["fermi_energy"] = read_data["fermi_energy"]
@@ -213,38 +260,374 @@ def parse_crystal_fort25_aiida(fileobj):
 
     array_data["energies"] = read_data["energy"]
     results_data["npts"] = len(array_data["energies"])
-    results_data["energy_max"] = max(array_data["energies"])
-    results_data["energy_min"] = min(array_data["energies"])
-
-    total_alpha = read_data["total_alpha"]["dos"]
-    results_data["norbitals_total"] = read_data["total_alpha"]["norbitals"]
-    if read_data["total_beta"] is not None:
-        results_data["spin"] = True
-        total_beta = read_data["total_beta"]["dos"]
-        assert len(total_alpha) == len(total_beta)
-    else:
-        results_data["spin"] = False
+    results_data["energy_max"] = float(array_data["energies"].max())
+    results_data["energy_min"] = float(array_data["energies"].min())
 
-    if read_data["projections_alpha"] is not None:
-        results_data["norbitals_projections"] = [
-            p["norbitals"] for p in read_data["projections_alpha"]
-        ]
-        projected_alpha = [p["dos"] for p in read_data["projections_alpha"]]
-    if read_data["projections_beta"] is not None:
-        projected_beta = [p["dos"] for p in read_data["projections_beta"]]
-        assert len(projected_alpha) == len(projected_beta)
+    alpha = read_data["alpha"]
+    beta = read_data["beta"]
+    total_index = int(np.argmax(alpha["ids"]))
+    is_projection = np.arange(len(alpha["ids"])) != total_index
 
-    if read_data["total_beta"] is None:
-        array_data["total"] = total_alpha
-    else:
-        array_data["total_alpha"] = total_alpha
-        array_data["total_beta"] = total_beta
+    results_data["norbitals_total"] = int(alpha["norbitals"][total_index])
+    results_data["spin"] = beta is not None
 
-    if read_data["projections_alpha"] is not None:
-        if read_data["projections_beta"] is not None:
+    if beta is None:
+        array_data["total"] = alpha["dos"][total_index]
+    else:
+        array_data["total_alpha"] = alpha["dos"][total_index]
+        array_data["total_beta"] = beta["dos"][int(np.argmax(beta["ids"]))]
+
+    if is_projection.any():
+        results_data["norbitals_projections"] = alpha["norbitals"][
+            is_projection
+        ].tolist()
+        projected_alpha = alpha["dos"][is_projection]
+        if beta is not None and len(beta["ids"]) > 1:
+            beta_projection = np.arange(len(beta["ids"])) != np.argmax(beta["ids"])
+            projected_beta = beta["dos"][beta_projection]
+            assert len(projected_alpha) == len(projected_beta)
             array_data["projections_alpha"] = projected_alpha
             array_data["projections_beta"] = projected_beta
         else:
             array_data["projections"] = projected_alpha
 
     return results_data, array_data
+
+
+def _parse_record_header(line, record_number):
+    """Parse the first line of a fort.25 record.
+
+    The format is ``A3,I1,A4,2I5,1P,3E12.5``.
+    """
+    line = line.strip()
+    if not line.startswith("-%-"):
+        raise IOError(
+            "record {0} does not start with '-%-': {1}".format(record_number, line)
+        )
+    record_type = line[4:8]
+    if record_type not in RECORD_TYPES:
+        raise IOError(
+            "record {0} is of an unknown type: {1}".format(record_number, record_type)
+        )
+    nrows, ncols, dx, dy, cosxy = split_numbers(line[8:])
+    header = {
+        "system_type": int(line[3]),
+        "nrows": int(nrows),
+        "ncols": int(ncols),
+        "dx": dx,
+        "dy": dy,
+        "cosxy": cosxy,
+    }
+    return record_type, header
+
+
+def _parse_record_grid(record_type, line2, line3):
+    """Parse the second and third lines of a fort.25 record."""
+    if record_type == "MAPS":
+        # formats 1P,6E12.5 and 1P,3E12.5,4X,2I4
+        point_ab = split_fixed_width([line2.rstrip()], 12)
+        naf, ldim = [int(i) for i in line3[40:].split()]
+        return {
+            "point_a": point_ab[0:3].tolist(),
+            "point_b": point_ab[3:6].tolist(),
+            "point_c": split_fixed_width([line3[:36]], 12).tolist(),
+            "naf": naf,
+            "ldim": ldim,
+        }
+    x0, y0 = split_numbers(line2)[:2]
+    integers = [int(i) for i in line3.split()]
+    if record_type == "DOSS":
+        return {"x0": x0, "y0": y0, "projection": integers[0], "norbitals": integers[1]}
+    return {
+        "x0": x0,
+        "y0": y0,
+        "kpoint_start": integers[0:3],
+        "kpoint_end": integers[3:6],
+    }
+
+
+def _read_record_values(lines, num_values, record_number):
+    """Read and decode the data block of a record, from an iterator of lines.
+
+    The data is in the format 1P,6E12.5, so the lines required for full lines of 6 values
+    are read in one step, and only counted line by line if they do not hold ``num_values`` fields.
+    """
+    batch = list(islice(lines, -(-num_values // 6)))
+    text = "".join(batch)
+    if len(text) - text.count("\n") != 12 * num_values or "-%-" in text:
+        data_lines = []
+        num_fields = 0
+        batch_lines = iter(batch)
+        while num_fields < num_values:
+            line = next(batch_lines, None) or next(lines, "")
+            if not line or line.lstrip().startswith("-%-"):
+                raise IOError(
+                    "record {0} ended after {1} of {2} values".format(
+                        record_number, num_fields, num_values
+                    )
+                )
+            data_lines.append(line)
+            num_fields += -(-len(line.rstrip()) // 12)
+        if len(data_lines) < len(batch):
+            raise IOError(
+                "record {0} is followed by more than {1} values".format(
+                    record_number, num_values
+                )
+            )
+        text = "".join(data_lines)
+    data = _decode_fixed_width_block(text, 12, num_values)
+    if not len(data) == num_values:
+        raise IOError(
+            "record {0} has {1} values, but {2} were expected".format(
+                record_number, len(data), num_values
+            )
+        )
+    return data
+
+
+def iter_crystal_fort25(handle):
+    """Iterate over the records of a fort.25 file.
+
+    Only one record is held in memory at a time,
+    so that large files (e.g. containing many MAPS) can be processed incrementally.
+
+    File Format:
+
+    ::
+
+        1ST RECORD : -%-,IHFERM,TYPE,NROW,NCOL,DX,DY,COSXY (format : A3,I1,A4,2I5,1P,(3E12.5))
+        2ND RECORD : DOSS/BAND: X0,Y0 (format : 1P,6E12.5)
+                     MAPS: XA,YA,ZA,XB,YB,ZB (format : 1P,6E12.5)
+        3RD RECORD : DOSS: projection number, number of orbitals, 4 unused (format : 6I5)
+                     BAND: coordinates of the first and last k-point of the segment
+                     MAPS: XC,YC,ZC,NAF,LDIM (format : 1P,3E12.5,4X,2I4)
+        4TH RECORD
+        AND FOLLOWING : ((RDAT(I,J),I=1,NROW),J=1,NCOL) (format : 1P,6E12.5)
+
+    For DOSS records, NROW is 1 and NCOL is the number of energy points.
+    For BAND records, NROW is the number of bands and NCOL the number of k-points.
+    For MAPS records, NROW and NCOL are the number of points along AB and BC.
+
+    Parameters
+    ----------
+    handle: io.TextIOBase
+
+    Yields
+    ------
+    Fort25Record
+
+    """
+    lines = iter(handle)
+    record_number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        record_number += 1
+        record_type, header = _parse_record_header(line, record_number)
+        grid = _parse_record_grid(record_type, next(lines, ""), next(lines, ""))
+
+        num_values = header["nrows"] * header["ncols"]
+        data = _read_record_values(lines, num_values, record_number)
+        yield Fort25Record(
+            record_type, header, grid, data.reshape(header["ncols"], header["nrows"])
+        )
+
+
+def parse_crystal_fort25_bands(handle):
+    """Parse a fort.25 file, containing BAND records (one per segment of the k-point path).
+
+    For open shell systems, the alpha segments are followed by the beta segments.
+
+    Parameters
+    ----------
+    handle: io.TextIOBase
+
+    Returns
+    -------
+    dict
+        with keys: 'units', 'system_type', 'fermi_energy', 'segments'
+        (a list of dicts with 'kpoint_start', 'kpoint_end' and 'num_kpoints'),
+        'kpoints' (array of shape (n_kpoints, 3), in the integer units of the path)
+        and either 'bands' or 'bands_alpha' and 'bands_beta'
+        (arrays of shape (n_kpoints, n_bands))
+
+    """
+    records = []
+    for record in iter_crystal_fort25(handle):
+        if record.type != "BAND":
+            raise IOError(
+                "record {0} is not of type BAND: {1}".format(
+                    len(records) + 1, record.type
+                )
+            )
+        if records:
+            for key in ("system_type", "nrows", "cosxy"):
+                if not record.header[key] == records[0].header[key]:
+                    raise IOError(
+                        "record {0} has different {1} ({2}) to previous ({3})".format(
+                            len(records) + 1,
+                            key,
+                            record.header[key],
+                            records[0].header[key],
+                        )
+                    )
+        records.append(record)
+    if not records:
+        raise IOError("no BAND records were found")
+
+    system_type = records[0].header["system_type"]
+    spin = system_type in (1, 3)
+    if spin and len(records) % 2:
+        raise IOError(
+            "an open shell system should have an even number of records: {}".format(
+                len(records)
+            )
+        )
+    num_segments = len(records) // 2 if spin else len(records)
+
+    segments = []
+    kpoints = []
+    for record in records[:num_segments]:
+        segments.append(
+            {
+                "kpoint_start": record.grid["kpoint_start"],
+                "kpoint_end": record.grid["kpoint_end"],
+                "num_kpoints": record.header["ncols"],
+            }
+        )
+        kpoints.append(
+            np.linspace(
+                record.grid["kpoint_start"],
+                record.grid["kpoint_end"],
+                record.header["ncols"],
+            )
+        )
+
+    data = {
+        "units": {"conversion": "CODATA2014", "energy": "eV"},
+        "system_type": IHFERM_MAP[system_type],
+        "fermi_energy": convert_units(records[0].header["cosxy"], "hartree", "eV"),
+        "segments": segments,
+        "kpoints": np.concatenate(kpoints),
+    }
+    channels = (
+        [
+            ("bands_alpha", records[:num_segments]),
+            ("bands_beta", records[num_segments:]),
+        ]
+        if spin
+        else [("bands", records)]
+    )
+    for key, channel_records in channels:
+        data[key] = convert_units(
+            np.concatenate([record.data for record in channel_records]),
+            "hartree",
+            "eV",
+        )
+    return data
+
+
+def iter_crystal_fort25_maps(handle):
+    """Iterate over the MAPS records of a fort.25 file, e.g. from ECHG or POTM.
+
+    For open shell systems, a map of the total property
+    is followed by a map of the spin property.
+
+    Parameters
+    ----------
+    handle: io.TextIOBase
+
+    Yields
+    ------
+    dict
+        with keys: 'system_type', 'units', 'points'
+        (the A, B and C corners of the map, array of shape (3, 3)),
+        'step' (the distance between points along AB and BC),
+        'cos_angle' (the cosine of the angle between AB and BC)
+        and 'values' (array of shape (n_bc, n_ab))
+
+    """
+    for number, record in enumerate(iter_crystal_fort25(handle)):
+        if record.type != "MAPS":
+            raise IOError(
+                "record {0} is not of type MAPS: {1}".format(number + 1, record.type)
+            )
+        points = np.array(
+            [record.grid["point_a"], record.grid["point_b"], record.grid["point_c"]]
+        )
+        yield {
+            "system_type": IHFERM_MAP[record.header["system_type"]],
+            "units": {"conversion": "CODATA2014", "length": "angstrom"},
+            "points": convert_units(points, "bohr", "angstrom"),
+            "step": convert_units(
+                np.array([record.header["dx"], record.header["dy"]]),
+                "bohr",
+                "angstrom",
+            ),
+            "cos_angle": record.header["cosxy"],
+            "values": record.data,
+        }
+
+
+def create_bands_data(data, shrink=1, cell=None):
+    """Create a ``BandsData`` node, from the output of ``parse_crystal_fort25_bands``.
+
+    Parameters
+    ----------
+    data: dict
+    shrink: int
+        the shrinking factor of the path k-point coordinates
+        (``IS``, in the BAND input)
+    cell: list or None
+        the lattice vectors of the structure
+
+    Returns
+    -------
+    aiida.orm.BandsData
+
+    """
+    from aiida.plugins import DataFactory
+
+    bands_data = DataFactory("array.bands")()
+    if cell is not None:
+        bands_data.set_cell(cell)
+    bands_data.set_kpoints(data["kpoints"] / float(shrink))
+    if "bands" in data:
+        bands_data.set_bands(data["bands"], units=data["units"]["energy"])
+    else:
+        bands_data.set_bands(
+            np.array([data["bands_alpha"], data["bands_beta"]]),
+            units=data["units"]["energy"],
+        )
+    bands_data.set_attribute("fermi_energy", data["fermi_energy"])
+    return bands_data
+
+
+def create_maps_array_data(maps):
+    """Create an ``ArrayData`` node, from the maps of ``iter_crystal_fort25_maps``.
+
+    Each map is stored in its own arrays, as it is read,
+    so that ``maps`` may be an iterator (e.g. over the records of a large file),
+    of which only one map is held in memory at a time.
+
+    Parameters
+    ----------
+    maps: Iterable[dict]
+
+    Returns
+    -------
+    aiida.orm.ArrayData
+        with arrays 'points_<i>', 'step_<i>' and 'values_<i>' for each map,
+        and attribute 'num_maps'
+
+    """
+    from aiida.plugins import DataFactory
+
+    array_data = DataFactory("array")()
+    num_maps = 0
+    for index, map_data in enumerate(maps):
+        for key in ("points", "step", "values"):
+            array_data.set_array("{0}_{1}".format(key, index), map_data[key])
+        num_maps = index + 1
+    array_data.set_attribute("num_maps", num_maps)
+    return array_data
@@ -13,7 +13,15 @@
 # but WITHOUT ANY WARRANTY; without even the implied warranty of
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU Lesser General Public License for more details.
-from aiida_crystal17.common.parsing import split_numbers
+import numpy as np
+
+from aiida_crystal17.common.parsing import split_numbers, stack_ragged
+
+# (name in the parsed data, prefix of the array names)
+MULLIKEN_CHANNELS = (
+    ("alpha+beta_electrons", "alpha_plus_beta"),
+    ("alpha-beta_electrons", "alpha_minus_beta"),
+)
 
 
 def parse_crystal_ppan(content):
@@ -76,6 +84,84 @@ def parse_crystal_ppan(content):
     return data
 
 
+def create_mulliken_arrays(channels):
+    """Create dense arrays of Mulliken population analysis data.
+
+    The same layout is used for the analyses parsed from the main output file
+    and from the PPAN.DAT file:
+
+    - ``atomic_numbers`` (atoms)
+    - ``coordinates`` (atoms x 3), only if available
+    - ``num_shells`` and ``num_orbitals`` (atoms)
+    - ``<prefix>_charges`` (atoms)
+    - ``<prefix>_shells`` (atoms x shells), NaN padded
+    - ``<prefix>_orbitals`` (atoms x orbitals), NaN padded
+
+    where ``<prefix>`` is ``alpha_plus_beta`` and/or ``alpha_minus_beta``.
+
+    Parameters
+    ----------
+    channels: dict
+        mapping of channel name (see ``MULLIKEN_CHANNELS``) to a dict
+        with keys; "atomic_numbers", "charges", "shells", "orbitals"
+        and (optionally) "coordinates",
+        where "shells" and "orbitals" are lists of per atom lists
+
+    Returns
+    -------
+    dict
+        name -> numpy.ndarray
+
+    """
+    arrays = {}
+    for channel, prefix in MULLIKEN_CHANNELS:
+        if channel not in channels:
+            continue
+        data = channels[channel]
+        if "atomic_numbers" not in arrays:
+            arrays["atomic_numbers"] = np.array(data["atomic_numbers"], dtype=int)
+            if data.get("coordinates", None) is not None:
+                arrays["coordinates"] = np.array(data["coordinates"], dtype=float)
+            for key in ["shells", "orbitals"]:
+                arrays["num_" + key] = np.array(
+                    [len(v) for v in data.get(key, [])], dtype=int
+                )
+        arrays[prefix + "_charges"] = np.array(data["charges"], dtype=float)
+        for key in ["shells", "orbitals"]:
+            if data.get(key, None):
+                arrays["{}_{}".format(prefix, key)] = stack_ragged(data[key])
+    return arrays
+
+
+def ppan_to_arrays(data):
+    """Convert the data parsed from a PPAN.DAT file to dense arrays.
+
+    Parameters
+    ----------
+    data: dict
+        as returned by ``parse_crystal_ppan``
+
+    Returns
+    -------
+    dict
+        name -> numpy.ndarray (see ``create_mulliken_arrays``)
+
+    """
+    channels = {}
+    for channel, _ in MULLIKEN_CHANNELS:
+        if channel not in data:
+            continue
+        atoms = data[channel]["atoms"]
+        channels[channel] = {
+            "atomic_numbers": [a["atomic_number"] for a in atoms],
+            "coordinates": [a["coordinate"] for a in atoms],
+            "charges": [a["total_charge"] for a in atoms],
+            "shells": [a["shell_charges"] for a in atoms],
+            "orbitals": [a["orbital_charges"] for a in atoms],
+        }
+    return create_mulliken_arrays(channels)
+
+
 def _new_line(lines):
     try:
         line = lines.pop(0).strip()
@@ -40,15 +40,29 @@ Basic outline of parsing sections:
     <parse_mulliken_analysis>
 
 """
+from bisect import bisect_right
 from collections import namedtuple
+from collections.abc import Mapping
 import copy
 from fnmatch import fnmatch
+import io
+from itertools import accumulate
 import re
 import traceback
 
 from jsonextended import edict
+import numpy as np
 
-from aiida_crystal17.common.parsing import convert_units, split_numbers
+from aiida_crystal17.common.parsing import (
+    convert_units,
+    split_numbers,
+    split_numeric_lines,
+    stack_ragged,
+)
+from aiida_crystal17.parsers.raw.crystal_ppan import (
+    MULLIKEN_CHANNELS,
+    create_mulliken_arrays,
+)
 
 try:
     from distutils.util import strtobool
@@ -94,6 +108,29 @@ KNOWN_ERRORS = (
     ("MPI_Abort", "ERROR_MPI_ABORT"),
 )
 
+# a table of the keywords, used to classify lines during the initial scan
+LineKeyword = namedtuple("LineKeyword", ["text", "ignore_case", "line_start"])
+LineKeyword.__new__.__defaults__ = (False, False)
+LINE_KEYWORDS = {
+    "warning": LineKeyword("WARNING", ignore_case=True),
+    "error": LineKeyword("ERROR"),
+    "scf_abnormal_end": LineKeyword("SCF abnormal end"),
+    "mpi_abort": LineKeyword("MPI_Abort"),
+    "convergence_unsatisfied": LineKeyword(
+        "CONVERGENCE TESTS UNSATISFIED", ignore_case=True
+    ),
+    "telapse": LineKeyword("TELAPSE"),
+    "optimization": LineKeyword("OPTOPTOPTOPT"),
+    "optimization_first_cycle": LineKeyword(
+        "CONVERGENCE ON GRADIENTS SATISFIED AFTER THE FIRST OPTIMIZATION CYCLE"
+    ),
+    "mulliken": LineKeyword("MULLIKEN POPULATION ANALYSIS", line_start=True),
+    "final_geometry": LineKeyword("FINAL OPTIMIZED GEOMETRY"),
+    "endprop": LineKeyword("ENDPROP", line_start=True),
+    "scf_start": LineKeyword("CRYSTAL - SCF - TYPE OF CALCULATION :", line_start=True),
+    "scf_cycle": LineKeyword("CYC", line_start=True),
+}
+
 SYSTEM_INFO_REGEXES = (
     ("n_atoms", re.compile(r"\sN. OF ATOMS PER CELL\s*(\d+)", re.DOTALL)),
     ("n_shells", re.compile(r"\sNUMBER OF SHELLS\s*(\d+)", re.DOTALL)),
@@ -114,135 +151,156 @@ SYSTEM_INFO_REGEXES = (
 
 def read_crystal_stdout(content):
     """Parse the stdout content from a CRYSTAL SCF/optimization computation to a dict."""
-    output = {
-        "units": {
-            "conversion": "CODATA2014",
-            "energy": "eV",
-            "length": "angstrom",
-            "angle": "degrees",
-        },
-        "errors": [],
-        "warnings": [],
-        "parser_errors": [],
-        "parser_exceptions": [],
-    }
-
-    # strip non program output
-    content, warnings = strip_non_program_output(content)
-    output["warnings"] += warnings
-    lines = content.splitlines()
-
-    if not lines:
-        output["parser_errors"] += ["the file is empty"]
-        return assign_exit_code(output)
+    return LazyCrystalOutput(content).to_dict()
 
-    # make an initial parse to find all errors/warnings and start lines for sections
-    errors, run_warnings, parser_errors, telapse_seconds, start_lines = initial_parse(
-        lines
-    )
-    output["errors"] += errors
-    output["warnings"] += run_warnings
-    output["parser_errors"] += errors
-    if telapse_seconds is not None:
-        output["execution_time_seconds"] = telapse_seconds
-
-    lineno = 0
 
-    # parse until the program header
-    outcome = parse_section(parse_pre_header, lines, lineno, output, "non_program")
-    if outcome is None or outcome.parser_error is not None:
-        return assign_exit_code(output)
-    lineno = outcome.next_lineno
-
-    # parse the program header section
-    outcome = parse_section(parse_calculation_header, lines, lineno, output, "header")
-    if outcome is None or outcome.parser_error is not None:
-        return assign_exit_code(output)
-    lineno = outcome.next_lineno
-
-    # parse the initial geometry input (before any editing)
-    outcome = parse_section(
-        parse_geometry_input, lines, lineno, output, "geometry_input"
-    )
-    if outcome is None or outcome.parser_error is not None:
-        return assign_exit_code(output)
-    lineno = outcome.next_lineno
-
-    # parse the calculation setup and initial geometry (after any editing)
-    outcome = parse_section(parse_calculation_setup, lines, lineno, output, None)
-    if outcome is None or outcome.parser_error is not None:
-        return assign_exit_code(output)
-    lineno = outcome.next_lineno
-
-    # parse the initial SCF run
-    outcome = parse_section(
-        parse_scf_section, lines, lineno, output, ("initial_scf", "cycles")
-    )
-    if outcome is None or outcome.parser_error is not None:
-        return assign_exit_code(output)
-    lineno = outcome.next_lineno
+MPI_STATUS_REGEX = re.compile(r"\s*PROCESS\s*\d+\s*OF\s*\d+\s*WORKING\s*$")
+FLOATING_POINT_REGEX = re.compile(
+    r"\s*Note\:\sThe\sfollowing\sfloating\-point\sexceptions\sare\ssignalling.+"
+)
 
-    # parse the final energy of the scf run
-    outcome = parse_section(
-        parse_scf_final_energy, lines, lineno, output, ("initial_scf", "final_energy")
-    )
-    # Note: we don't abort on error
-    if outcome is not None:
-        lineno = outcome.next_lineno
 
-    # TODO test these lines aren't in-between initial scf and opt:
-    # ("* GEOMETRY EDITING", "CRYSTAL - SCF - TYPE OF CALCULATION :",  "SCF ENDED")
-    # Note: in a few runs I observed, scf maxcycle was reached, but then the scf started again!
+class ProgramLineFilter(object):
+    """Omit MPI statuses and floating point exceptions from the lines of a stdout file.
 
-    # parse the optimisation (if present)
-    if "optimization" in start_lines:
+    These can get mixed with the program stdout/stderr and corrupt the output.
+    Lines are filtered as they are read, and omitted lines are only counted
+    (blank lines directly preceding an omitted line are also omitted).
+    An offset map is kept, to convert the line numbers of the program lines
+    back to those of the original file.
+    """
 
-        outcome = parse_section(
-            parse_optimisation,
-            lines,
-            start_lines["optimization"],
-            output,
-            "optimisation",
+    def __init__(self, warnings=None):
+        """Initialise the filter.
+
+        Parameters
+        ----------
+        warnings: list or None
+            a list to append floating point exception warnings to
+
+        """
+        self.warnings = [] if warnings is None else warnings
+        self.num_lines = 0
+        self.counts = {"mpi_status": 0, "floating_point": 0, "blank": 0}
+        # the program line numbers, from which the offsets to the original apply
+        self._map_linenos = []
+        self._map_offsets = []
+
+    @property
+    def num_omitted(self):
+        """Return the number of omitted lines."""
+        return sum(self.counts.values())
+
+    def iter_lines(self, handle):
+        """Yield the program lines of a file.
+
+        Parameters
+        ----------
+        handle: Iterable[str]
+            an iterable of lines (including line terminators)
+
+        Yields
+        ------
+        str
+
+        """
+        blank_lines = []
+        for raw_line in handle:
+            # only lines with a terminator are omitted
+            if raw_line.endswith("\n"):
+                line = raw_line[:-1]
+                if not line.strip():
+                    blank_lines.append(line)
+                    continue
+                if MPI_STATUS_REGEX.match(line):
+                    self._omit(blank_lines, "mpi_status")
+                    blank_lines = []
+                    continue
+                if FLOATING_POINT_REGEX.match(line):
+                    self.warnings.append(line.strip())
+                    self._omit(blank_lines, "floating_point")
+                    blank_lines = []
+                    continue
+            for blank_line in blank_lines:
+                for sub_line in blank_line.splitlines() or [""]:
+                    yield self._add_line(sub_line)
+            blank_lines = []
+            for sub_line in raw_line.splitlines():
+                yield self._add_line(sub_line)
+        for blank_line in blank_lines:
+            for sub_line in blank_line.splitlines() or [""]:
+                yield self._add_line(sub_line)
+
+    def _omit(self, blank_lines, name):
+        self.counts["blank"] += sum(len(line.splitlines()) or 1 for line in blank_lines)
+        self.counts[name] += 1
+
+    def _add_line(self, line):
+        offset = self._map_offsets[-1] if self._map_offsets else 0
+        if self.num_omitted != offset:
+            self._map_linenos.append(self.num_lines)
+            self._map_offsets.append(self.num_omitted)
+        self.num_lines += 1
+        return line
+
+    def original_lineno(self, lineno):
+        """Convert a program line number to the line number in the original file.
+
+        Parameters
+        ----------
+        lineno: int
+
+        Returns
+        -------
+        int
+
+        """
+        index = bisect_right(self._map_linenos, lineno) - 1
+        if index < 0:
+            return lineno
+        return lineno + self._map_offsets[index]
+
+    def omitted_warning(self):
+        """Return a warning, reporting the number of omitted lines (or None if no lines were omitted).
+
+        Returns
+        -------
+        str or None
+
+        """
+        if not self.num_omitted:
+            return None
+        return "omitted {0} lines of non-program output ({1})".format(
+            self.num_omitted,
+            ", ".join("{0}: {1}".format(k, v) for k, v in self.counts.items() if v),
         )
-        # Note: we don't abort on error
-        if outcome is not None:
-            lineno = outcome.next_lineno
 
-        if outcome is not None and outcome.parser_error is None:
-            # TODO do band gaps only com after optimisation?
-            outcome = parse_section(parse_band_gaps, lines, lineno, output, "band_gaps")
-            # Note: we don't abort on error
-            if outcome is not None:
-                lineno = outcome.next_lineno
 
-    # parse the final optimized geometry (if present)
-    if "final_geometry" in start_lines:
-        outcome = parse_section(
-            parse_final_geometry,
-            lines,
-            start_lines["final_geometry"],
-            output,
-            "final_geometry",
-        )
-        # Note: we don't abort on error
-        if outcome is not None:
-            lineno = outcome.next_lineno
+def to_original_lineno(line_filter, lineno):
+    """Convert a program line number to the line number in the original file.
 
-    if "mulliken" in start_lines:
-        outcome = parse_section(
-            parse_mulliken_analysis, lines, start_lines["mulliken"], output, "mulliken"
-        )
-        # Note: we don't abort on error
-        if outcome is not None:
-            lineno = outcome.next_lineno
+    Parameters
+    ----------
+    line_filter: ProgramLineFilter or None
+        the filter the program lines were read with (if None, the line number is returned)
+    lineno: int
 
-    return assign_exit_code(output)
+    Returns
+    -------
+    int
+
+    """
+    if line_filter is None:
+        return lineno
+    return line_filter.original_lineno(lineno)
 
 
 def strip_non_program_output(content):
     """Remove MPI statuses, and floating point exceptions.
 
-    These can get mixed with the program stdout/stderr and corrupt the output
+    These can get mixed with the program stdout/stderr and corrupt the output.
+    Note, this does not preserve line numbers, or omit lines as they are read,
+    see :py:class:`ProgramLineFilter`.
 
     Parameters
     ----------
@@ -254,7 +312,6 @@ def strip_non_program_output(content):
     list[str]: warnings
 
     """
-    # TODO: removing these will affect the reporting of line numbers in errors
     regex = re.compile(
         "^\\s*PROCESS\\s*\\d+\\s*OF\\s*\\d+\\s*WORKING[^\\S\n\r]*(\r\n|\r|\n)",
         re.MULTILINE,
@@ -269,7 +326,7 @@ def strip_non_program_output(content):
     return content, warnings
 
 
-def parse_section(func, lines, initial_lineno, output, key_name):
+def parse_section(func, lines, initial_lineno, output, key_name, **kwargs):
     """parse a section of the stdout file
 
     Parameters
@@ -282,6 +339,8 @@ def parse_section(func, lines, initial_lineno, output, key_name):
         current output from the parser
     key_name : str or list[str] or None
         the key_name of output to assign the data to (if None directly update)
+    kwargs
+        additional keyword arguments for ``func``
 
     Returns
     -------
@@ -289,11 +348,30 @@ def parse_section(func, lines, initial_lineno, output, key_name):
 
     """
     try:
-        outcome = func(lines, initial_lineno)
+        outcome = func(lines, initial_lineno, **kwargs)
     except Exception as err:
         traceback.print_exc()
         output["parser_exceptions"].append(str(err))
         return None
+    return assign_section_outcome(outcome, output, key_name)
+
+
+def assign_section_outcome(outcome, output, key_name):
+    """Update the current output with the outcome of a parsed section.
+
+    Parameters
+    ----------
+    outcome : ParsedSection
+    output : dict
+        current output from the parser
+    key_name : str or list[str] or None
+        the key_name of output to assign the data to (if None directly update)
+
+    Returns
+    -------
+    ParsedSection
+
+    """
     if outcome.data:
         if key_name is None:
             output.update(outcome.data)
@@ -312,21 +390,32 @@ def parse_section(func, lines, initial_lineno, output, key_name):
     return outcome
 
 
+def match_known_error(errors):
+    """Return the exit code of the most important known error, found in the errors.
+
+    Parameters
+    ----------
+    errors: list[str]
+
+    Returns
+    -------
+    str or None
+
+    """
+    # the known messages do not contain new lines, so cannot match across errors
+    content = "\n".join(errors)
+    for known_error_msg, code_name in KNOWN_ERRORS:
+        if known_error_msg in content:
+            return code_name
+    return None
+
+
 def assign_exit_code(output):
 
     exit_code = 0
 
     if output["errors"]:
-        exit_code = "ERROR_CRYSTAL_RUN"
-        for known_error_msg, code_name in KNOWN_ERRORS:
-            found = False
-            for error_msg in output["errors"]:
-                if known_error_msg in error_msg:
-                    found = True
-                    break
-            if found:
-                exit_code = code_name
-                break
+        exit_code = match_known_error(output["errors"]) or "ERROR_CRYSTAL_RUN"
     elif output["parser_errors"]:
         if any(["TESTGEOM  DIRECTIVE" in msg for msg in output["warnings"]]):
             exit_code = "TESTGEOM_DIRECTIVE"
@@ -339,91 +428,258 @@ def assign_exit_code(output):
     return output
 
 
-def initial_parse(lines):
+def initial_parse(lines, line_filter=None):
     """Scan the file for errors, and find the final elapsed time value."""
-    errors = []
-    warnings = []
-    parser_errors = []
-    mpi_abort = False
-    telapse_line = None
-    start_lines = {}
+    scan = InitialScan(line_filter)
+    for lineno, keyword in scan.classifier.scan(lines):
+        scan.add_classified_line(lineno, lines[lineno], keyword)
+    return scan.result()
+
+
+class KeywordClassifier(object):
+    """Classify lines by the first keyword (in order of precedence) that they contain."""
+
+    def __init__(self, names, keywords=None):
+        """Initialise the classifier.
+
+        Parameters
+        ----------
+        names: list[str]
+            the names of the keywords, in order of precedence
+        keywords: dict or None
+            a mapping of names to ``LineKeyword`` (defaults to ``LINE_KEYWORDS``)
+
+        """
+        keywords = LINE_KEYWORDS if keywords is None else keywords
+        self._keywords = [(name, keywords[name]) for name in names]
+
+    def classify(self, line):
+        """Return the name of the first keyword found in the line, or None."""
+        upper_line = None
+        for name, keyword in self._keywords:
+            if keyword.line_start:
+                if line.strip().startswith(keyword.text):
+                    return name
+            elif keyword.ignore_case:
+                if upper_line is None:
+                    upper_line = line.upper()
+                if keyword.text in upper_line:
+                    return name
+            elif keyword.text in line:
+                return name
+        return None
+
+    def scan(self, lines):
+        """Classify all lines, returning only those containing a keyword.
+
+        Rather than testing each keyword against each line,
+        each keyword is searched for once in the joined content,
+        then only the lines containing at least one keyword are classified.
+
+        Parameters
+        ----------
+        lines: list[str]
+
+        Returns
+        -------
+        list[tuple[int, str]]
+            (line number, keyword name), in line order
+
+        """
+        # lines are joined without a separator, so a keyword may be found spanning
+        # two lines, but these false candidates are removed by ``classify``
+        content = "".join(lines)
+        upper_content = None
+        line_starts = [0]
+        line_starts.extend(accumulate(map(len, lines)))
+
+        candidates = set()
+        for _, keyword in self._keywords:
+            if not keyword.ignore_case:
+                candidates.update(_find_lines(content, keyword.text, line_starts))
+                continue
+            if upper_content is None:
+                upper_content = content.upper()
+            if len(upper_content) == len(content):
+                candidates.update(_find_lines(upper_content, keyword.text, line_starts))
+            else:
+                # some characters change length when upper-cased
+                candidates.update(
+                    i for i, line in enumerate(lines) if keyword.text in line.upper()
+                )
 
-    second_opt_line = False
-    # This is required since output looks like
-    # OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT
+        classified = []
+        for lineno in sorted(candidates):
+            name = self.classify(lines[lineno])
+            if name is not None:
+                classified.append((lineno, name))
+        return classified
 
-    # STARTING GEOMETRY OPTIMIZATION - INFORMATION ON SCF MOVED TO SCFOUT.LOG
-    # GEOMETRY OPTIMIZATION INFORMATION STORED IN OPTINFO.DAT
 
-    # OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT
+def _find_lines(content, text, line_starts):
+    """Return the line numbers of all lines containing the text."""
+    linenos = []
+    pos = content.find(text)
+    while pos != -1:
+        lineno = bisect_right(line_starts, pos) - 1
+        linenos.append(lineno)
+        pos = content.find(text, line_starts[lineno + 1])
+    return linenos
 
-    for lineno, line in enumerate(lines):
 
-        if "WARNING" in line.upper():
-            warnings.append(line.strip())
-        elif "ERROR" in line:
+class InitialScan(object):
+    """Line-by-line scan for errors, warnings and the start lines of sections.
+
+    The scan is fed one line at a time (via ``add_line``),
+    so that it can be used both on a list of lines and on a stream.
+    """
+
+    classifier = KeywordClassifier(
+        [
+            "warning",
+            "error",
+            "scf_abnormal_end",
+            "mpi_abort",
+            "convergence_unsatisfied",
+            "telapse",
+            "optimization",
+            "optimization_first_cycle",
+            "mulliken",
+            "final_geometry",
+        ]
+    )
+
+    def __init__(self, line_filter=None):
+        """Initialise the scan.
+
+        Parameters
+        ----------
+        line_filter: ProgramLineFilter or None
+            the filter the lines are read with, to report original line numbers
+
+        """
+        self.line_filter = line_filter
+        self.errors = []
+        self.warnings = []
+        self.parser_errors = []
+        self.start_lines = {}
+        self._mpi_abort = False
+        self._telapse = None
+        self._second_opt_line = False
+        # This is required since output looks like
+        # OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT
+
+        # STARTING GEOMETRY OPTIMIZATION - INFORMATION ON SCF MOVED TO SCFOUT.LOG
+        # GEOMETRY OPTIMIZATION INFORMATION STORED IN OPTINFO.DAT
+
+        # OPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPTOPT
+
+    def add_line(self, lineno, line):
+        """Scan a single line.
+
+        Returns
+        -------
+        str or None
+            the name of the section started on this line
+            ("optimization", "mulliken" or "final_geometry"), if any
+
+        """
+        return self.add_classified_line(lineno, line, self.classifier.classify(line))
+
+    def add_classified_line(self, lineno, line, keyword):
+        """Scan a single line, which has already been classified by keyword.
+
+        Returns
+        -------
+        str or None
+            the name of the section started on this line
+            ("optimization", "mulliken" or "final_geometry"), if any
+
+        """
+        if keyword is None:
+            return None
+
+        if keyword == "warning":
+            self.warnings.append(line.strip())
+        elif keyword == "error":
             # TODO ignore errors before program execution (e.g. in mpiexec setup)?
             if "open_hca: getaddr_netdev ERROR" not in line:
-                errors.append(line.strip())
-        elif "SCF abnormal end" in line:  # only present when run using runcry
-            errors.append(line.strip())
-        elif "MPI_Abort" in line:
+                self.errors.append(line.strip())
+        elif keyword == "scf_abnormal_end":  # only present when run using runcry
+            self.errors.append(line.strip())
+        elif keyword == "mpi_abort":
             # only record one mpi_abort event (to not clutter output)
-            if not mpi_abort:
-                errors.append(line.strip())
-                mpi_abort = True
-        elif "CONVERGENCE TESTS UNSATISFIED" in line.upper():
-            errors.append(line.strip())
-        elif "TELAPSE" in line:
-            telapse_line = lineno
+            if not self._mpi_abort:
+                self.errors.append(line.strip())
+                self._mpi_abort = True
+        elif keyword == "convergence_unsatisfied":
+            self.errors.append(line.strip())
+        elif keyword == "telapse":
+            self._telapse = (lineno, line)
 
         # search for an optimisation
-        elif "OPTOPTOPTOPT" in line:
-            if "optimization" in start_lines:
-                if second_opt_line:
-                    parser_errors.append(
-                        "found two lines starting  optimization section: "
-                        "{0} and {1}".format(start_lines["optimization"], lineno)
-                    )
-                else:
-                    second_opt_line = True
-            start_lines["optimization"] = lineno
-        elif (
-            "CONVERGENCE ON GRADIENTS SATISFIED AFTER THE FIRST OPTIMIZATION CYCLE"
-            in line
-        ):
-            if "optimization" in start_lines:
-                if second_opt_line:
-                    parser_errors.append(
-                        "found two lines starting optimization section: "
-                        "{0} and {1}".format(start_lines["optimization"], lineno)
-                    )
-                else:
-                    second_opt_line = True
-            start_lines["optimization"] = lineno
+        elif keyword in ("optimization", "optimization_first_cycle"):
+            self._add_optimization_start(lineno)
+            return "optimization"
 
         # search for mulliken analysis
-        elif line.strip().startswith("MULLIKEN POPULATION ANALYSIS"):
+        elif keyword == "mulliken":
             # can have ALPHA+BETA ELECTRONS and ALPHA-BETA ELECTRONS (denoted in line above mulliken_starts)
-            start_lines.setdefault("mulliken", []).append(lineno)
+            self.start_lines.setdefault("mulliken", []).append(lineno)
+            return "mulliken"
 
         # search for final geometry
-        elif "FINAL OPTIMIZED GEOMETRY" in line:
-            if "final_geometry" in start_lines:
-                parser_errors.append(
+        elif keyword == "final_geometry":
+            if "final_geometry" in self.start_lines:
+                self.parser_errors.append(
                     "found two lines starting 'FINAL OPTIMIZED GEOMETRY':"
-                    " {0} and {1}".format(start_lines["final_geometry"], lineno)
+                    " {0} and {1}".format(
+                        to_original_lineno(
+                            self.line_filter, self.start_lines["final_geometry"]
+                        ),
+                        to_original_lineno(self.line_filter, lineno),
+                    )
                 )
-            start_lines["final_geometry"] = lineno
+            self.start_lines["final_geometry"] = lineno
+            return "final_geometry"
 
-    total_seconds = None
-    if telapse_line:
-        total_seconds = int(split_numbers(lines[telapse_line].split("TELAPSE")[1])[0])
+        return None
+
+    def _add_optimization_start(self, lineno):
+        if "optimization" in self.start_lines:
+            if self._second_opt_line:
+                self.parser_errors.append(
+                    "found two lines starting optimization section: "
+                    "{0} and {1}".format(
+                        to_original_lineno(
+                            self.line_filter, self.start_lines["optimization"]
+                        ),
+                        to_original_lineno(self.line_filter, lineno),
+                    )
+                )
+            else:
+                self._second_opt_line = True
+        self.start_lines["optimization"] = lineno
+
+    @property
+    def total_seconds(self):
+        """Return the final elapsed time value (or None if not found)."""
+        if not self._telapse or not self._telapse[0]:
+            return None
+        return int(split_numbers(self._telapse[1].split("TELAPSE")[1])[0])
         # m, s = divmod(total_seconds, 60)
         # h, m = divmod(m, 60)
         # elapsed_time = "%d:%02d:%02d" % (h, m, s)
 
-    return errors, warnings, parser_errors, total_seconds, start_lines
+    def result(self):
+        """Return (errors, warnings, parser_errors, total_seconds, start_lines)."""
+        return (
+            self.errors,
+            self.warnings,
+            self.parser_errors,
+            self.total_seconds,
+            self.start_lines,
+        )
 
 
 def parse_pre_header(lines, initial_lineno=0):
@@ -871,7 +1127,39 @@ def parse_symmetry_section(data, initial_lineno, line, lines):
         data["primitive_symmops"] = symmops
 
 
-def parse_scf_section(lines, initial_lineno, final_lineno=None):
+def parse_scf_cycle_line(line, lineno=None):
+    """read the number and total energy from the (stripped) line starting an SCF cycle
+
+    Parameters
+    ----------
+    line: str
+        a line starting 'CYC'
+    lineno: int or None
+        the line number, to report in errors
+
+    Returns
+    -------
+    tuple[int, float or None]
+        the cycle number, and the total energy (in eV) if present.
+        This is the initial energy of the configuration,
+        and so actually the energy at the end of the previous cycle.
+
+    Raises
+    ------
+    IOError
+        if the total energy is not in atomic units
+
+    """
+    values = split_numbers(line)
+    if not fnmatch(line, "*ETOT*"):
+        return int(values[0]), None
+    if not fnmatch(line, "*ETOT(AU)*"):
+        location = "" if lineno is None else " on line {}".format(lineno)
+        raise IOError("was expecting units in a.u.{0}, got: {1}".format(location, line))
+    return int(values[0]), convert_units(values[1], "hartree", "eV")
+
+
+def parse_scf_section(lines, initial_lineno, final_lineno=None, line_filter=None):
     """read scf data
 
     Parameters
@@ -879,6 +1167,8 @@ def parse_scf_section(lines, initial_lineno, final_lineno=None):
     lines: list[str]
     initial_lineno: int
     final_lineno: int or None
+    line_filter: ProgramLineFilter or None
+        the filter the lines were read with, to report original line numbers
 
     Returns
     -------
@@ -919,23 +1209,20 @@ def parse_scf_section(lines, initial_lineno, final_lineno=None):
                         curr_lineno,
                         scf,
                         "was expecting the SCF cyle number to be {0} in line {1}: {2}".format(
-                            int(last_cyc_num + 1), curr_lineno, line
+                            int(last_cyc_num + 1),
+                            to_original_lineno(line_filter, curr_lineno),
+                            line,
                         ),
                     )
             last_cyc_num = cur_cyc_num
 
             if fnmatch(line, "*ETOT*"):
-                if not fnmatch(line, "*ETOT(AU)*"):
-                    raise IOError(
-                        "was expecting units in a.u. on line {0}, "
-                        "got: {1}".format(curr_lineno, line)
-                    )
-                # this is the initial energy of the configuration and so actually the energy of the previous run
+                _, energy = parse_scf_cycle_line(
+                    line, to_original_lineno(line_filter, curr_lineno)
+                )
                 if scf:
                     scf[-1]["energy"] = scf[-1].get("energy", {})
-                    scf[-1]["energy"]["total"] = convert_units(
-                        split_numbers(line)[1], "hartree", "eV"
-                    )
+                    scf[-1]["energy"]["total"] = energy
 
         elif scf_cyc is None:
             continue
@@ -957,17 +1244,13 @@ def parse_scf_section(lines, initial_lineno, final_lineno=None):
             scf_cyc["spin_density_total"] = split_numbers(line)[0]
 
         if line.startswith("TOTAL ATOMIC CHARGES"):
-            scf_cyc["atomic_charges_peratom"] = []
-            j = curr_lineno + 1
-            while len(lines[j].strip().split()) == len(split_numbers(lines[j])):
-                scf_cyc["atomic_charges_peratom"] += split_numbers(lines[j])
-                j += 1
+            scf_cyc["atomic_charges_peratom"], _ = split_numeric_lines(
+                lines, curr_lineno + 1
+            )
         if line.startswith("TOTAL ATOMIC SPINS"):
-            scf_cyc["spin_density_peratom"] = []
-            j = curr_lineno + 1
-            while len(lines[j].strip().split()) == len(split_numbers(lines[j])):
-                scf_cyc["spin_density_peratom"] += split_numbers(lines[j])
-                j += 1
+            scf_cyc["spin_density_peratom"], _ = split_numeric_lines(
+                lines, curr_lineno + 1
+            )
             scf_cyc["spin_density_absolute"] = sum(
                 [abs(s) for s in split_numbers(lines[curr_lineno + 1])]
             )
@@ -979,17 +1262,22 @@ def parse_scf_section(lines, initial_lineno, final_lineno=None):
     return ParsedSection(
         curr_lineno,
         scf,
-        "Did not find end of SCF section (starting on line {})".format(initial_lineno),
+        "Did not find end of SCF section (starting on line {})".format(
+            to_original_lineno(line_filter, initial_lineno)
+        ),
     )
 
 
-def parse_scf_final_energy(lines, initial_lineno, final_lineno=None):
+def parse_scf_final_energy(lines, initial_lineno, final_lineno=None, line_filter=None):
     """read post initial scf data
 
     Parameters
     ----------
     lines: list[str]
     initial_lineno: int
+    final_lineno: int or None
+    line_filter: ProgramLineFilter or None
+        the filter the lines were read with, to report original line numbers
 
     Returns
     -------
@@ -1005,12 +1293,16 @@ def parse_scf_final_energy(lines, initial_lineno, final_lineno=None):
             if not fnmatch(line.strip(), "TOTAL ENERGY*AU*DE*"):
                 raise IOError(
                     "was expecting units in a.u. on line:"
-                    " {0}, got: {1}".format(initial_lineno + i, line)
+                    " {0}, got: {1}".format(
+                        to_original_lineno(line_filter, initial_lineno + i), line
+                    )
                 )
             if "total_corrected" in scf_energy:
                 raise IOError(
                     "total corrected energy found twice, on line:"
-                    " {0}, got: {1}".format(initial_lineno + i, line)
+                    " {0}, got: {1}".format(
+                        to_original_lineno(line_filter, initial_lineno + i), line
+                    )
                 )
             scf_energy["total_corrected"] = convert_units(
                 split_numbers(line)[1], "hartree", "eV"
@@ -1020,18 +1312,20 @@ def parse_scf_final_energy(lines, initial_lineno, final_lineno=None):
         final_lineno,
         scf_energy,
         "Did not find end of Post SCF section (starting on line {})".format(
-            initial_lineno
+            to_original_lineno(line_filter, initial_lineno)
         ),
     )
 
 
-def parse_optimisation(lines, initial_lineno):
+def parse_optimisation(lines, initial_lineno, line_filter=None):
     """read geometric optimisation
 
     Parameters
     ----------
     lines: list[str]
     initial_lineno: int
+    line_filter: ProgramLineFilter or None
+        the filter the lines were read with, to report original line numbers
 
     Returns
     -------
@@ -1051,7 +1345,9 @@ def parse_optimisation(lines, initial_lineno):
                 if not fnmatch(line, "*E(AU)*"):
                     raise IOError(
                         "was expecting units in a.u. on line:"
-                        " {0}, got: {1}".format(curr_lineno, line)
+                        " {0}, got: {1}".format(
+                            to_original_lineno(line_filter, curr_lineno), line
+                        )
                     )
                 data = [
                     {
@@ -1069,7 +1365,7 @@ def parse_optimisation(lines, initial_lineno):
             curr_lineno,
             [],
             "did not find 'OPT END', after optimisation start at line {}".format(
-                initial_lineno
+                to_original_lineno(line_filter, initial_lineno)
             ),
         )
 
@@ -1105,13 +1401,18 @@ def parse_optimisation(lines, initial_lineno):
                     "found two lines starting scf ('CRYSTAL - SCF - ') in opt step {0}:".format(
                         len(opt_cycles)
                     )
-                    + " {0} and {1}".format(scf_start_no, curr_lineno),
+                    + " {0} and {1}".format(
+                        to_original_lineno(line_filter, scf_start_no),
+                        to_original_lineno(line_filter, curr_lineno),
+                    ),
                 )
             scf_start_no = curr_lineno
         elif "SCF ENDED" in line:
             if "CONVERGE" not in line:
                 pass  # errors.append(line.strip())
-            outcome = parse_scf_section(lines, scf_start_no + 1, curr_lineno + 1)
+            outcome = parse_scf_section(
+                lines, scf_start_no + 1, curr_lineno + 1, line_filter
+            )
             # TODO test if error
             opt_cyc["scf"] = outcome.data
 
@@ -1124,7 +1425,9 @@ def parse_optimisation(lines, initial_lineno):
                     curr_lineno,
                     opt_cycles,
                     "was expecting units in a.u. on line:"
-                    " {0}, got: {1}".format(curr_lineno, line),
+                    " {0}, got: {1}".format(
+                        to_original_lineno(line_filter, curr_lineno), line
+                    ),
                 )
             opt_cyc["energy"] = opt_cyc.get("energy", {})
             opt_cyc["energy"]["total_corrected"] = convert_units(
@@ -1151,7 +1454,7 @@ def parse_optimisation(lines, initial_lineno):
         curr_lineno,
         opt_cycles,
         "did not find 'OPT END', after optimisation start at line {}".format(
-            initial_lineno
+            to_original_lineno(line_filter, initial_lineno)
         ),
     )
 
@@ -1180,7 +1483,7 @@ def parse_final_geometry(lines, initial_lineno):
     return ParsedSection(initial_lineno + i, data)
 
 
-def parse_band_gaps(lines, initial_lineno):
+def parse_band_gaps(lines, initial_lineno, line_filter=None):
     """read band gap information
 
     Note: this is new for CRYSTAL17
@@ -1189,6 +1492,8 @@ def parse_band_gaps(lines, initial_lineno):
     ----------
     lines: list[str]
     initial_lineno: int
+    line_filter: ProgramLineFilter or None
+        the filter the lines were read with, to report original line numbers
 
     Returns
     -------
@@ -1219,7 +1524,7 @@ def parse_band_gaps(lines, initial_lineno):
                     initial_lineno,
                     band_gaps,
                     "found a band gap of unknown format at line {0}: {1}".format(
-                        curr_lineno, line
+                        to_original_lineno(line_filter, curr_lineno), line
                     ),
                 )
             if bgtype in band_gaps:
@@ -1227,7 +1532,7 @@ def parse_band_gaps(lines, initial_lineno):
                     initial_lineno,
                     band_gaps,
                     "band gap data already contains {0} value before line {1}: {2}".format(
-                        bgtype, curr_lineno, line
+                        bgtype, to_original_lineno(line_filter, curr_lineno), line
                     ),
                 )
             band_gaps[bgtype] = bgvalue
@@ -1235,13 +1540,15 @@ def parse_band_gaps(lines, initial_lineno):
     return ParsedSection(initial_lineno, band_gaps)
 
 
-def parse_mulliken_analysis(lines, mulliken_indices):
+def parse_mulliken_analysis(lines, mulliken_indices, line_filter=None):
     """
 
     Parameters
     ----------
     lines: list[str]
     mulliken_indices: list[int]
+    line_filter: ProgramLineFilter or None
+        the filter the lines were read with, to report original line numbers
 
     Returns
     -------
@@ -1261,7 +1568,9 @@ def parse_mulliken_analysis(lines, mulliken_indices):
                 mulliken_indices[0],
                 mulliken,
                 "was expecting mulliken to be alpha+beta or alpha-beta on line:"
-                " {0}, got: {1}".format(indx - 1, lines[indx - 1]),
+                " {0}, got: {1}".format(
+                    to_original_lineno(line_filter, indx - 1), lines[indx - 1]
+                ),
             )
 
         if len(mulliken_indices) > i + 1:
@@ -1281,8 +1590,9 @@ def parse_mulliken_analysis(lines, mulliken_indices):
                     and not searchlines[charge_line].strip()[0].isalpha()
                 ):
                     fields = searchlines[charge_line].strip().split()
+                    numbers = split_numbers(searchlines[charge_line])
                     # a.o. population can wrap multiple lines
-                    if len(fields) != len(split_numbers(searchlines[charge_line])):
+                    if len(fields) != len(numbers):
                         data_ao.setdefault("ids", []).append(int(fields[0]))
                         data_ao.setdefault("symbols", []).append(
                             fields[1].lower().capitalize()
@@ -1293,9 +1603,7 @@ def parse_mulliken_analysis(lines, mulliken_indices):
                             [float(f) for f in fields[4:]]
                         )
                     else:
-                        data_ao["aos"][-1].extend(
-                            split_numbers(searchlines[charge_line])
-                        )
+                        data_ao["aos"][-1].extend(numbers)
 
                     charge_line += 1
 
@@ -1307,8 +1615,9 @@ def parse_mulliken_analysis(lines, mulliken_indices):
                     and not searchlines[charge_line].strip()[0].isalpha()
                 ):
                     fields = searchlines[charge_line].strip().split()
+                    numbers = split_numbers(searchlines[charge_line])
                     # shell population can wrap multiple lines
-                    if len(fields) != len(split_numbers(searchlines[charge_line])):
+                    if len(fields) != len(numbers):
                         data_shell.setdefault("ids", []).append(int(fields[0]))
                         data_shell.setdefault("symbols", []).append(
                             fields[1].lower().capitalize()
@@ -1321,9 +1630,7 @@ def parse_mulliken_analysis(lines, mulliken_indices):
                             [float(f) for f in fields[4:]]
                         )
                     else:
-                        data_shell["shells"][-1].extend(
-                            split_numbers(searchlines[charge_line])
-                        )
+                        data_shell["shells"][-1].extend(numbers)
 
                     charge_line += 1
 
@@ -1335,11 +1642,279 @@ def parse_mulliken_analysis(lines, mulliken_indices):
     return ParsedSection(mulliken_indices[0], mulliken)
 
 
+class LazyCrystalOutput(Mapping):
+    """A mapping of the parsed stdout content, where sections are parsed on demand.
+
+    On initialisation, only the initial scan of the content is made
+    (to find errors, warnings and the start lines of sections).
+    Each section is then parsed when a key that depends on it is first accessed,
+    and the outcome is cached, e.g.
+    ``output["header"]`` only parses the sections up to the program header,
+    and ``output["final_geometry"]`` does not parse the optimisation or Mulliken sections.
+
+    The full output, equal to ``read_crystal_stdout(content)``,
+    is returned by ``to_dict``
+    (note that iterating over the mapping also requires all sections to be parsed).
+
+    """
+
+    # sections which are parsed in sequence, each starting where the previous ended,
+    # (name, parse function, output key)
+    SEQUENTIAL_SECTIONS = (
+        ("pre_header", parse_pre_header, "non_program"),
+        ("header", parse_calculation_header, "header"),
+        ("geometry_input", parse_geometry_input, "geometry_input"),
+        ("calculation_setup", parse_calculation_setup, None),
+        ("initial_scf", parse_scf_section, ("initial_scf", "cycles")),
+    )
+    # all sections, in the order they are parsed by ``to_dict``
+    SECTION_ORDER = (
+        "pre_header",
+        "header",
+        "geometry_input",
+        "calculation_setup",
+        "initial_scf",
+        "scf_final_energy",
+        "optimisation",
+        "band_gaps",
+        "final_geometry",
+        "mulliken",
+    )
+    # output key -> the sections required to compute it
+    KEY_SECTIONS = {
+        "units": (),
+        "warnings": (),
+        "execution_time_seconds": (),
+        "errors": ("initial_scf",),
+        "non_program": ("pre_header",),
+        "header": ("header",),
+        "geometry_input": ("geometry_input",),
+        "calculation": ("calculation_setup",),
+        "initial_geometry": ("calculation_setup",),
+        "initial_scf": ("initial_scf", "scf_final_energy"),
+        "optimisation": ("optimisation",),
+        "band_gaps": ("band_gaps",),
+        "final_geometry": ("final_geometry",),
+        "mulliken": ("mulliken",),
+    }
+
+    def __init__(self, content):
+        """Make the initial scan of the content.
+
+        Parameters
+        ----------
+        content: str or Iterable[str]
+            the stdout content, or a handle to the stdout file
+
+        """
+        self._output = {
+            "units": {
+                "conversion": "CODATA2014",
+                "energy": "eV",
+                "length": "angstrom",
+                "angle": "degrees",
+            },
+            "errors": [],
+            "warnings": [],
+            "parser_errors": [],
+            "parser_exceptions": [],
+        }
+        # section name -> (ParsedSection or None, output of the section)
+        self._sections = {}
+        self._dict = None
+
+        # omit non program output
+        if isinstance(content, str):
+            content = io.StringIO(content)
+        self.line_filter = ProgramLineFilter(self._output["warnings"])
+        self._lines = list(self.line_filter.iter_lines(content))
+        if self.line_filter.num_omitted:
+            self._output["warnings"].append(self.line_filter.omitted_warning())
+
+        if not self._lines:
+            self._output["parser_errors"] += ["the file is empty"]
+            self._start_lines = None
+            return
+
+        # make an initial parse to find all errors/warnings and start lines for sections
+        errors, run_warnings, _, telapse_seconds, start_lines = initial_parse(
+            self._lines, self.line_filter
+        )
+        self._output["errors"] += errors
+        self._output["warnings"] += run_warnings
+        self._output["parser_errors"] += errors
+        if telapse_seconds is not None:
+            self._output["execution_time_seconds"] = telapse_seconds
+        self._start_lines = start_lines
+
+    @property
+    def lines(self):
+        """Return the program lines of the content."""
+        return self._lines
+
+    @property
+    def start_lines(self):
+        """Return the start lines of sections, found by the initial scan."""
+        return dict(self._start_lines or {})
+
+    @property
+    def parsed_sections(self):
+        """Return the names of the sections that have been parsed (so far)."""
+        return [name for name in self.SECTION_ORDER if name in self._sections]
+
+    def _parse(self, name, func, lineno, key_name):
+        section_output = {"errors": [], "parser_errors": [], "parser_exceptions": []}
+        outcome = parse_section(
+            func,
+            self._lines,
+            lineno,
+            section_output,
+            key_name,
+            **self._section_kwargs(func)
+        )
+        self._sections[name] = (outcome, section_output)
+        return outcome
+
+    def _parse_sequential(self, name):
+        """Parse the sequential sections, up to and including ``name``.
+
+        Returns
+        -------
+        ParsedSection or None
+            the outcome of the section, or None if it could not be parsed
+
+        """
+        lineno = 0
+        for section_name, func, key_name in self.SEQUENTIAL_SECTIONS:
+            if section_name in self._sections:
+                outcome = self._sections[section_name][0]
+            else:
+                outcome = self._parse(section_name, func, lineno, key_name)
+            if section_name == name:
+                return outcome
+            if outcome is None or outcome.parser_error is not None:
+                return None
+            lineno = outcome.next_lineno
+        raise ValueError("not a sequential section: {}".format(name))
+
+    def _section_kwargs(self, func):
+        """Return the keyword arguments for a section's parse function."""
+        if func in (
+            parse_scf_section,
+            parse_scf_final_energy,
+            parse_optimisation,
+            parse_band_gaps,
+            parse_mulliken_analysis,
+        ):
+            # to report the line numbers of the original file, in error messages
+            return {"line_filter": self.line_filter}
+        return {}
+
+    def _sequence_completed(self):
+        """Parse the sequential sections, and return whether they all succeeded."""
+        outcome = self._parse_sequential(self.SEQUENTIAL_SECTIONS[-1][0])
+        return outcome is not None and outcome.parser_error is None
+
+    def _parse_section(self, name):
+        """Parse a section (and any sections it depends on), if not already parsed."""
+        if name in self._sections or self._start_lines is None:
+            return
+        if name in [s[0] for s in self.SEQUENTIAL_SECTIONS]:
+            self._parse_sequential(name)
+            return
+        if not self._sequence_completed():
+            return
+        if name == "scf_final_energy":
+            self._parse(
+                name,
+                parse_scf_final_energy,
+                self._sections["initial_scf"][0].next_lineno,
+                ("initial_scf", "final_energy"),
+            )
+        elif name == "optimisation":
+            if "optimization" in self._start_lines:
+                self._parse(
+                    name,
+                    parse_optimisation,
+                    self._start_lines["optimization"],
+                    "optimisation",
+                )
+        elif name == "band_gaps":
+            self._parse_section("optimisation")
+            outcome = self._sections.get("optimisation", (None, None))[0]
+            if outcome is not None and outcome.parser_error is None:
+                self._parse(
+                    name,
+                    parse_band_gaps,
+                    outcome.next_lineno,
+                    "band_gaps",
+                )
+        elif name in ["final_geometry", "mulliken"]:
+            if name in self._start_lines:
+                func = {
+                    "final_geometry": parse_final_geometry,
+                    "mulliken": parse_mulliken_analysis,
+                }[name]
+                self._parse(name, func, self._start_lines[name], name)
+        else:
+            raise ValueError("unknown section: {}".format(name))
+
+    def _merge_output(self, names):
+        """Merge the initial scan output with the output of sections (in order)."""
+        output = copy.deepcopy(self._output)
+        for name in self.SECTION_ORDER:
+            if name not in names or name not in self._sections:
+                continue
+            for key, value in self._sections[name][1].items():
+                if key in ["errors", "parser_errors", "parser_exceptions"]:
+                    output[key] += value
+                elif isinstance(output.get(key, None), dict):
+                    output[key] = dict(output[key], **value)
+                else:
+                    output[key] = value
+        return output
+
+    def __getitem__(self, key):
+        if self._dict is not None:
+            return self._dict[key]
+        if key not in self.KEY_SECTIONS:
+            # parser errors and the exit code depend on all sections
+            return self.to_dict()[key]
+        for name in self.KEY_SECTIONS[key]:
+            self._parse_section(name)
+        return self._merge_output(self.KEY_SECTIONS[key])[key]
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def to_dict(self):
+        """Parse all (remaining) sections, and return the full output.
+
+        Returns
+        -------
+        dict
+
+        """
+        if self._dict is None:
+            for name in self.SECTION_ORDER:
+                self._parse_section(name)
+            self._dict = assign_exit_code(self._merge_output(self.SECTION_ORDER))
+        return self._dict
+
+
 def extract_final_info(parsed_data):
     """Extract the final energies and primitive geometry/symmetry
     from the relevant sections of the parse data
     (depending if it was an optimisation or not)
+
+    If ``parsed_data`` is a ``LazyCrystalOutput`` (or stdout content),
+    only the sections required are parsed.
     """
+    if isinstance(parsed_data, str):
+        parsed_data = LazyCrystalOutput(parsed_data)
     data = {}
     if "final_geometry" in parsed_data:
         data = parsed_data["final_geometry"]
@@ -1386,3 +1961,107 @@ def extract_final_info(parsed_data):
             raise ValueError("no primitive_symops available in parsed data")
 
     return data
+
+
+CELL_PARAMETER_KEYS = ("a", "b", "c", "alpha", "beta", "gamma")
+
+# (array name, section, path to value, dtype, fill value)
+HISTORY_ARRAYS = (
+    ("scf_energy", "scf", ("energy", "total"), float, np.nan),
+    (
+        "scf_charge_normalization_factor",
+        "scf",
+        ("charge_normalization_factor",),
+        float,
+        np.nan,
+    ),
+    ("scf_spin_density_total", "scf", ("spin_density_total",), float, np.nan),
+    ("scf_spin_density_absolute", "scf", ("spin_density_absolute",), float, np.nan),
+    ("scf_atomic_charges", "scf", ("atomic_charges_peratom",), float, np.nan),
+    ("scf_atomic_spins", "scf", ("spin_density_peratom",), float, np.nan),
+    ("opt_energy", "opt", ("energy", "total_corrected"), float, np.nan),
+    (
+        "opt_converged_max_gradient",
+        "opt",
+        ("convergence", "max_gradient"),
+        bool,
+        False,
+    ),
+    (
+        "opt_converged_rms_gradient",
+        "opt",
+        ("convergence", "rms_gradient"),
+        bool,
+        False,
+    ),
+    ("opt_converged_max_displac", "opt", ("convergence", "max_displac"), bool, False),
+    ("opt_converged_rms_displac", "opt", ("convergence", "rms_displac"), bool, False),
+    (
+        "opt_cell_parameters",
+        "opt",
+        ("primitive_cell", "cell_parameters"),
+        float,
+        np.nan,
+    ),
+    ("opt_fcoords", "opt", ("primitive_cell", "fcoords"), float, np.nan),
+    ("opt_ccoords", "opt", ("primitive_cell", "ccoords"), float, np.nan),
+)
+
+
+def _get_path(data, path):
+    """Return the value at a path of keys in a nested dict, or None."""
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    if isinstance(data, dict) and set(data) == set(CELL_PARAMETER_KEYS):
+        data = [data[k] for k in CELL_PARAMETER_KEYS]
+    return data
+
+
+def extract_history_arrays(parsed_data):
+    """Extract the SCF cycle and optimisation step histories, as fixed-shape arrays.
+
+    Each array has a first dimension of the number of SCF cycles
+    (for ``scf_`` prefixed names), or optimisation steps (for ``opt_`` prefixed names),
+    and an array is only included if at least one cycle/step contains the quantity.
+    Missing values are set to NaN (or False for boolean arrays).
+
+    ``opt_cell_parameters`` has columns: a, b, c, alpha, beta, gamma.
+
+    :param parsed_data: the data returned by ``read_crystal_stdout``
+    :return: dict of name -> numpy.ndarray
+
+    """
+    sections = {
+        "scf": parsed_data.get("initial_scf", {}).get("cycles", []),
+        "opt": parsed_data.get("optimisation", []),
+    }
+    arrays = {}
+    for name, section, path, dtype, fill_value in HISTORY_ARRAYS:
+        values = [_get_path(item, path) for item in sections[section]]
+        if all(v is None for v in values):
+            continue
+        arrays[name] = stack_ragged(values, dtype, fill_value)
+    return arrays
+
+
+def extract_mulliken_arrays(parsed_data):
+    """Extract the Mulliken population analysis, as dense arrays.
+
+    :param parsed_data: the data returned by ``read_crystal_stdout``
+    :return: dict of name -> numpy.ndarray (see ``crystal_ppan.create_mulliken_arrays``)
+
+    """
+    channels = {}
+    for channel, _ in MULLIKEN_CHANNELS:
+        data = parsed_data.get("mulliken", {}).get(channel, None)
+        if not data or "charges" not in data:
+            continue
+        channels[channel] = {
+            "atomic_numbers": data["atomic_numbers"],
+            "charges": data["charges"],
+            "shells": data.get("shells", []),
+            "orbitals": data.get("aos", []),
+        }
+    return create_mulliken_arrays(channels)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Chris Sewell
+#
+# This file is part of aiida-crystal17.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms and conditions
+# of version 3 of the GNU Lesser General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+"""Incrementally scan the stdout of a CRYSTAL computation, while it is running.
+
+The :py:class:`ScfMonitor` only scans for the SCF total energies and errors,
+using the same line keywords and SCF cycle parsing as the full parsers,
+and records the byte offset up to which the file has been scanned,
+so that each poll only reads the bytes appended since the last.
+Its state is small enough to be checkpointed as a JSON-serialisable dict,
+then restored in a later process.
+
+"""
+from aiida_crystal17.parsers.raw.crystal_stdout import (
+    KeywordClassifier,
+    parse_scf_cycle_line,
+)
+
+
+class ScfMonitor(object):
+    """Incrementally scan a stdout file, which is still being written to,
+    for the total energies of the SCF cycles and for errors.
+
+    Each SCF cycle is reported on a single line, so the file can be scanned line by line,
+    and the offset is only advanced to the end of the last complete line.
+    The state of the monitor (see ``get_checkpoint``) is then only this offset,
+    the last few energies of the current SCF, and the errors found,
+    from which scanning is restarted in the next poll.
+    """
+
+    classifier = KeywordClassifier(
+        [
+            "scf_start",
+            "scf_cycle",
+            "error",
+            "scf_abnormal_end",
+            "mpi_abort",
+            "convergence_unsatisfied",
+        ]
+    )
+
+    def __init__(self, max_energies=10, encoding="utf8"):
+        """Initialise the monitor.
+
+        Parameters
+        ----------
+        max_energies: int
+            the number of most recent SCF energies to retain
+        encoding: str
+            the encoding of the file
+
+        """
+        self.max_energies = max_energies
+        self.encoding = encoding
+        self.offset = 0
+        self.energies = []
+        self.errors = []
+
+    def update(self, content):
+        """Scan content appended to the file.
+
+        Parameters
+        ----------
+        content: bytes
+            the content of the file, from the current ``offset``
+
+        Returns
+        -------
+        int
+            the number of new lines scanned
+
+        """
+        raw_lines = content.splitlines(True)
+        if raw_lines and not raw_lines[-1].endswith(b"\n"):
+            raw_lines = raw_lines[:-1]
+        for raw_line in raw_lines:
+            self._scan_line(raw_line.decode(self.encoding, "replace"))
+            self.offset += len(raw_line)
+        return len(raw_lines)
+
+    def _scan_line(self, line):
+        """Scan a single line of the file."""
+        keyword = self.classifier.classify(line)
+        if keyword is None:
+            return
+        if keyword == "scf_start":
+            self.energies = []
+        elif keyword == "scf_cycle":
+            try:
+                cycle, energy = parse_scf_cycle_line(line.strip())
+            except IOError as err:
+                self._add_error(str(err))
+                return
+            if cycle == 0:
+                # a new SCF has started
+                self.energies = []
+            elif energy is not None:
+                # consistent with parse_scf_section,
+                # this is the energy at the end of the previous cycle
+                self.energies.append(energy)
+                del self.energies[: -self.max_energies]
+        else:
+            self._add_error(keyword)
+
+    def _add_error(self, error):
+        if error not in self.errors:
+            self.errors.append(error)
+
+    def get_checkpoint(self):
+        """Return the state of the monitor, as a JSON-serialisable dict."""
+        return {
+            "encoding": self.encoding,
+            "offset": self.offset,
+            "energies": list(self.energies),
+            "errors": list(self.errors),
+        }
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, max_energies=10):
+        """Restore a monitor from its checkpoint state.
+
+        Parameters
+        ----------
+        checkpoint: dict
+            the state returned by ``get_checkpoint``
+        max_energies: int
+            the number of most recent SCF energies to retain
+
+        Returns
+        -------
+        ScfMonitor
+
+        """
+        try:
+            monitor = cls(max_energies, checkpoint["encoding"])
+            monitor.offset = int(checkpoint["offset"])
+            monitor.energies = [float(e) for e in checkpoint["energies"]]
+            monitor.errors = [str(e) for e in checkpoint["errors"]]
+        except (KeyError, TypeError, ValueError) as err:
+            raise ValueError("invalid checkpoint for {}: {}".format(cls.__name__, err))
+        del monitor.energies[:-max_energies]
+        return monitor
+
+
+def scf_is_diverging(scf_cycles, num_cycles=5):
+    """Test whether the total energy has risen over consecutive SCF cycles.
+
+    Parameters
+    ----------
+    scf_cycles: list[dict]
+        the SCF cycles (as parsed by ``parse_scf_section``)
+    num_cycles: int
+        the number of consecutive cycles,
+        for which the energy must rise
+
+    Returns
+    -------
+    bool
+
+    """
+    energies = [
+        cycle["energy"]["total"]
+        for cycle in scf_cycles
+        if "total" in cycle.get("energy", {})
+    ]
+    return energies_are_rising(energies, num_cycles)
+
+
+def energies_are_rising(energies, num_cycles=5):
+    """Test whether the energy has risen over the last consecutive cycles.
+
+    Parameters
+    ----------
+    energies: list[float]
+        the energy of each cycle
+    num_cycles: int
+        the number of consecutive cycles,
+        for which the energy must rise
+
+    Returns
+    -------
+    bool
+
+    """
+    if len(energies) <= num_cycles:
+        return False
+    energies = energies[-(num_cycles + 1) :]
+    return all(energies[i + 1] > energies[i] for i in range(num_cycles))
@@ -0,0 +1,904 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2019 Chris Sewell
+#
+# This file is part of aiida-crystal17.
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms and conditions
+# of version 3 of the GNU Lesser General Public License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+"""Parse the stdout from a CRYSTAL SCF/optimization computation, in a single pass.
+
+:py:func:`~aiida_crystal17.parsers.raw.crystal_stdout.read_crystal_stdout`
+reads the whole content into memory, then iterates over it multiple times.
+Here lines are read from a file handle once, in order,
+and dispatched to a handler for each section (mirroring the ``parse_*`` functions
+of :py:mod:`~aiida_crystal17.parsers.raw.crystal_stdout`).
+Only the lines required for look-ahead (e.g. the atoms of a geometry block)
+are held in memory, so memory use does not scale with the length of the file.
+
+The sequential sections (pre-header, header, geometry input, setup,
+initial SCF and its final energy) are parsed as a chain,
+where each section starts on the line that the previous one ended.
+The optimisation, band gaps, final geometry and Mulliken sections
+are started by the lines flagged in the
+:py:class:`~aiida_crystal17.parsers.raw.crystal_stdout.InitialScan`,
+and run in parallel with the chain.
+
+"""
+from collections import deque
+from fnmatch import fnmatch
+import re
+import traceback
+
+from aiida_crystal17.common.parsing import (
+    convert_units,
+    split_numbers,
+    split_numeric_lines,
+)
+from aiida_crystal17.parsers.raw.crystal_stdout import (
+    SYSTEM_INFO_REGEXES,
+    InitialScan,
+    ParsedSection,
+    ProgramLineFilter,
+    assign_exit_code,
+    assign_section_outcome,
+    parse_geometry_section,
+    parse_scf_cycle_line,
+    parse_symmetry_section,
+    to_original_lineno,
+)
+
+try:
+    from distutils.util import strtobool
+except ImportError:
+    from distutils import strtobool
+
+
+def read_crystal_stdout_stream(handle):
+    """Parse the stdout from a CRYSTAL SCF/optimization computation to a dict.
+
+    The output is the same as for
+    :py:func:`~aiida_crystal17.parsers.raw.crystal_stdout.read_crystal_stdout`,
+    but the file is read line by line, in a single pass.
+
+    Parameters
+    ----------
+    handle: io.TextIOBase
+        a handle to the file, opened in text mode
+
+    Returns
+    -------
+    dict
+
+    """
+    parser = StdoutStreamParser()
+    parser.parse(handle)
+    return parser.get_output()
+
+
+def iter_program_lines(handle, warnings):
+    """Yield the lines of a file, omitting MPI statuses and floating point exceptions.
+
+    See :py:class:`~aiida_crystal17.parsers.raw.crystal_stdout.ProgramLineFilter`.
+
+    Parameters
+    ----------
+    handle: Iterable[str]
+        an iterable of lines (including line terminators)
+    warnings: list
+        a list to append floating point exception warnings to
+
+    Yields
+    ------
+    str
+
+    """
+    return ProgramLineFilter(warnings).iter_lines(handle)
+
+
+class LineBuffer(object):
+    """A window onto an iterable of lines, indexed by absolute line number.
+
+    Lines are read from the iterable on demand (allowing for look-ahead),
+    and lines that are no longer required can be released from memory.
+    """
+
+    def __init__(self, lines, start_lineno=0):
+        """Initialise the buffer.
+
+        Parameters
+        ----------
+        lines: Iterable[str]
+        start_lineno: int
+            the line number of the first line in the iterable
+
+        """
+        self._iter = iter(lines)
+        self._lines = deque()
+        self._start = start_lineno
+
+    def _fill(self, index):
+        """Read lines from the iterable, up to the index, returning False if it is exhausted."""
+        while self._start + len(self._lines) <= index:
+            try:
+                self._lines.append(next(self._iter))
+            except StopIteration:
+                return False
+        return True
+
+    def has(self, index):
+        """Return whether a line exists, at the line number."""
+        return self._fill(index)
+
+    def __getitem__(self, index):
+        if index < self._start or not self._fill(index):
+            raise IndexError("list index out of range")
+        return self._lines[index - self._start]
+
+    def release(self, index):
+        """Release all lines before the line number."""
+        while self._lines and self._start < index:
+            self._lines.popleft()
+            self._start += 1
+
+
+class SectionHandler(object):
+    """Parse a single section of the stdout file, one line at a time."""
+
+    # the filter the lines are read with, to report original line numbers
+    line_filter = None
+
+    def __init__(self, start_lineno):
+        self.start_lineno = start_lineno
+        self.last_lineno = start_lineno
+        self.outcome = None
+        self.exception = None
+
+    @property
+    def finished(self):
+        """Whether the end of the section has been reached (or an exception was raised)."""
+        return self.outcome is not None or self.exception is not None
+
+    def feed(self, lineno, line, lines):
+        """Parse a single line of the section.
+
+        Parameters
+        ----------
+        lineno: int
+        line: str
+        lines: LineBuffer
+            for look-ahead to subsequent lines
+
+        """
+        if self.finished:
+            return
+        self.last_lineno = lineno
+        try:
+            self.outcome = self.parse_line(lineno, line, lines)
+        except Exception as err:
+            traceback.print_exc()
+            self.exception = err
+
+    def parse_line(self, lineno, line, lines):
+        """Parse a single line, returning a ``ParsedSection`` if the section is finished."""
+        raise NotImplementedError
+
+    def original_lineno(self, lineno):
+        """Convert a program line number to the line number in the original file."""
+        return to_original_lineno(self.line_filter, lineno)
+
+    def finish(self):
+        """Return the ``ParsedSection``, if the end of the file is reached before the end of the section."""
+        raise NotImplementedError
+
+    def get_outcome(self):
+        """Return the current outcome of the section.
+
+        Returns
+        -------
+        ParsedSection or None
+            None if an exception was raised
+
+        """
+        if self.exception is not None:
+            return None
+        if self.outcome is not None:
+            return self.outcome
+        return self.finish()
+
+
+class PreHeaderHandler(SectionHandler):
+    """Parse any data before the program header (see ``parse_pre_header``)."""
+
+    error_msg = "couldn't find start of program header (denoted *****)"
+
+    def __init__(self, start_lineno):
+        super(PreHeaderHandler, self).__init__(start_lineno)
+        self.data = {}
+
+    def parse_line(self, lineno, line, lines):
+        # consistent with parse_pre_header, the final line is never checked
+        if lineno > 0 and not lines.has(lineno + 1):
+            return ParsedSection(lineno, self.data, self.error_msg)
+        if "************************" in line:
+            # found start of crystal binary stdout
+            return ParsedSection(lineno, self.data, None)
+        elif fnmatch(line, "date:*"):
+            self.data["date"] = line.replace("date:", "").strip()
+        elif fnmatch(line, "resources_used.ncpus =*"):
+            self.data["nprocs"] = int(line.replace("resources_used.ncpus =", ""))
+        if lineno == 0 and not lines.has(1):
+            return ParsedSection(1, self.data, self.error_msg)
+        return None
+
+    def finish(self):
+        return ParsedSection(self.last_lineno, self.data, self.error_msg)
+
+
+class HeaderHandler(SectionHandler):
+    """Parse the calculation header (see ``parse_calculation_header``)."""
+
+    def __init__(self, start_lineno):
+        super(HeaderHandler, self).__init__(start_lineno)
+        self.data = {}
+
+    def parse_line(self, lineno, line, lines):
+        if line.strip().startswith("****************") and lineno != self.start_lineno:
+            return ParsedSection(lineno, self.data, None)
+        if re.findall(r"\s\s\s\s\sCRYSTAL\d{2}(.*)\*", line):
+            self.data["crystal_version"] = int(
+                re.findall(r"\s\s\s\s\sCRYSTAL(\d{2})", line)[0]
+            )
+        if re.findall("public\\s\\:\\s(.+)\\s\\-", line):
+            self.data["crystal_subversion"] = re.findall(
+                "public\\s\\:\\s(.+)\\s\\-", line
+            )[0]
+        return None
+
+    def finish(self):
+        return ParsedSection(
+            self.start_lineno, self.data, "couldn't find end of program header"
+        )
+
+
+class GeometryInputHandler(SectionHandler):
+    """Parse the geometry input data (see ``parse_geometry_input``)."""
+
+    def parse_line(self, lineno, line, lines):
+        if line.strip().startswith("* GEOMETRY EDITING"):
+            return ParsedSection(lineno, {}, None)
+        # TODO parse relevant data
+        return None
+
+    def finish(self):
+        return ParsedSection(
+            self.start_lineno,
+            {},
+            "couldn't find end of geometry input (denoted * GEOMETRY EDITING)",
+        )
+
+
+class SetupHandler(SectionHandler):
+    """Parse the initial setup data (see ``parse_calculation_setup``)."""
+
+    def __init__(self, start_lineno):
+        super(SetupHandler, self).__init__(start_lineno)
+        self.data = {"calculation": {"spin": False}, "initial_geometry": {}}
+        self._content = []
+
+    def parse_line(self, lineno, line, lines):
+        data = self.data
+        stripped = line.strip()
+        if stripped.startswith("CRYSTAL - SCF - TYPE OF CALCULATION :"):
+            content = "\n".join(self._content)
+            for name, regex in SYSTEM_INFO_REGEXES:
+                match = regex.search(content)
+                if match is not None:
+                    data["calculation"][name] = int(match.groups()[0])
+            return ParsedSection(lineno, data, None)
+
+        self._content.append(line)
+
+        if stripped.startswith("TYPE OF CALCULATION :"):
+            data["calculation"]["type"] = (
+                stripped.replace("TYPE OF CALCULATION :", "").strip().lower()
+            )
+            if "HAMILTONIAN" in lines[lineno + 1]:
+                regex = r"\(EXCHANGE\)\[CORRELATION\] FUNCTIONAL:\((.*)\)\[(.*)\]"
+                string = lines[lineno + 3].strip()
+                if re.match(regex, string):
+                    data["calculation"]["functional"] = {
+                        "exchange": re.search(regex, string).group(1),
+                        "correlation": re.search(regex, string).group(2),
+                    }
+
+        elif "SPIN POLARIZ" in stripped:
+            data["calculation"]["spin"] = True
+
+        parse_geometry_section(data["initial_geometry"], lineno, stripped, lines)
+        parse_symmetry_section(data["initial_geometry"], lineno, stripped, lines)
+        return None
+
+    def finish(self):
+        return ParsedSection(
+            self.last_lineno,
+            self.data,
+            "couldn't find start of initial scf calculation",
+        )
+
+
+class ScfHandler(SectionHandler):
+    """Parse the SCF cycles data (see ``parse_scf_section``)."""
+
+    def __init__(self, start_lineno):
+        super(ScfHandler, self).__init__(start_lineno)
+        self.scf = []
+        self.scf_cyc = None
+        self.last_cyc_num = None
+
+    def parse_line(self, lineno, line, lines):
+        scf = self.scf
+
+        if "SCF ENDED" in line:
+            # add last scf cycle
+            if self.scf_cyc:
+                scf.append(self.scf_cyc)
+            if "CONVERGE" not in line:
+                return ParsedSection(lineno, scf, None, line.strip())
+            return ParsedSection(lineno, scf, None)
+
+        line = line.strip()
+
+        if fnmatch(line, "CYC*"):
+
+            # start new cycle
+            if self.scf_cyc is not None:
+                scf.append(self.scf_cyc)
+            self.scf_cyc = {}
+
+            # check we are adding them in sequential order
+            cur_cyc_num = split_numbers(line)[0]
+            if self.last_cyc_num is not None:
+                if cur_cyc_num != self.last_cyc_num + 1:
+                    return ParsedSection(
+                        lineno,
+                        scf,
+                        "was expecting the SCF cyle number to be {0} in line {1}: {2}".format(
+                            int(self.last_cyc_num + 1),
+                            self.original_lineno(lineno),
+                            line,
+                        ),
+                    )
+            self.last_cyc_num = cur_cyc_num
+
+            if fnmatch(line, "*ETOT*"):
+                _, energy = parse_scf_cycle_line(line, self.original_lineno(lineno))
+                if scf:
+                    scf[-1]["energy"] = scf[-1].get("energy", {})
+                    scf[-1]["energy"]["total"] = energy
+
+        elif self.scf_cyc is None:
+            return None
+
+        scf_cyc = self.scf_cyc
+
+        if line.startswith("CHARGE NORMALIZATION FACTOR"):
+            scf_cyc["charge_normalization_factor"] = split_numbers(line)[0]
+        if line.startswith("SUMMED SPIN DENSITY"):
+            scf_cyc["spin_density_total"] = split_numbers(line)[0]
+
+        if line.startswith("TOTAL ATOMIC CHARGES"):
+            scf_cyc["atomic_charges_peratom"], _ = split_numeric_lines(
+                lines, lineno + 1
+            )
+        if line.startswith("TOTAL ATOMIC SPINS"):
+            scf_cyc["spin_density_peratom"], _ = split_numeric_lines(lines, lineno + 1)
+            scf_cyc["spin_density_absolute"] = sum(
+                [abs(s) for s in split_numbers(lines[lineno + 1])]
+            )
+
+        return None
+
+    def finish(self):
+        scf = self.scf + ([self.scf_cyc] if self.scf_cyc else [])
+        return ParsedSection(
+            self.last_lineno,
+            scf,
+            "Did not find end of SCF section (starting on line {})".format(
+                self.original_lineno(self.start_lineno)
+            ),
+        )
+
+
+class ScfFinalEnergyHandler(SectionHandler):
+    """Parse the post initial SCF data (see ``parse_scf_final_energy``)."""
+
+    def __init__(self, start_lineno):
+        super(ScfFinalEnergyHandler, self).__init__(start_lineno)
+        self.scf_energy = {}
+
+    def parse_line(self, lineno, line, lines):
+        if line.strip().startswith("TTTTTTT") or line.strip().startswith("******"):
+            return ParsedSection(None, self.scf_energy)
+        if fnmatch(line.strip(), "TOTAL ENERGY*DE*"):
+            if not fnmatch(line.strip(), "TOTAL ENERGY*AU*DE*"):
+                raise IOError(
+                    "was expecting units in a.u. on line:"
+                    " {0}, got: {1}".format(self.original_lineno(lineno), line)
+                )
+            if "total_corrected" in self.scf_energy:
+                raise IOError(
+                    "total corrected energy found twice, on line:"
+                    " {0}, got: {1}".format(self.original_lineno(lineno), line)
+                )
+            self.scf_energy["total_corrected"] = convert_units(
+                split_numbers(line)[1], "hartree", "eV"
+            )
+        return None
+
+    def finish(self):
+        return ParsedSection(
+            None,
+            self.scf_energy,
+            "Did not find end of Post SCF section (starting on line {})".format(
+                self.original_lineno(self.start_lineno)
+            ),
+        )
+
+
+class OptimisationHandler(SectionHandler):
+    """Parse the geometric optimisation (see ``parse_optimisation``)."""
+
+    def __init__(self, start_lineno):
+        super(OptimisationHandler, self).__init__(start_lineno)
+        self.first_cycle_only = None
+        self.opt_cycles = []
+        self.opt_cyc = None
+        self.scf_start_no = None
+        self.scf = None
+        self.failed_opt_step = False
+
+    def parse_line(self, lineno, line, lines):
+        if self.first_cycle_only is None:
+            self.first_cycle_only = (
+                "CONVERGENCE ON GRADIENTS SATISFIED AFTER THE FIRST OPTIMIZATION CYCLE"
+                in line
+            )
+        if self.first_cycle_only:
+            return self._parse_first_cycle_line(lineno, line.strip())
+
+        raw_line = line
+        line = line.strip()
+
+        if "OPT END -" in line:
+            if self.opt_cyc and not self.failed_opt_step:
+                self.opt_cycles.append(self.opt_cyc)
+            return ParsedSection(lineno, self.opt_cycles)
+
+        if fnmatch(line, "*OPTIMIZATION*POINT*"):
+            if self.opt_cyc is not None and not self.failed_opt_step:
+                self.opt_cycles.append(self.opt_cyc)
+            self.opt_cyc = {}
+            self.scf_start_no = None
+            self.scf = None
+            self.failed_opt_step = False
+        elif self.opt_cyc is None:
+            return None
+
+        opt_cyc = self.opt_cyc
+
+        # when using ONELOG optimisation key word
+        if "CRYSTAL - SCF - TYPE OF CALCULATION :" in line:
+            if self.scf_start_no is not None:
+                return ParsedSection(
+                    lineno,
+                    self.opt_cycles,
+                    "found two lines starting scf ('CRYSTAL - SCF - ') in opt step {0}:".format(
+                        len(self.opt_cycles)
+                    )
+                    + " {0} and {1}".format(
+                        self.original_lineno(self.scf_start_no),
+                        self.original_lineno(lineno),
+                    ),
+                )
+            self.scf_start_no = lineno
+            self.scf = ScfHandler(lineno + 1)
+            self.scf.line_filter = self.line_filter
+        elif "SCF ENDED" in line:
+            if self.scf is None:
+                raise IOError(
+                    "found 'SCF ENDED' before the start of the scf in opt step {0}, "
+                    "on line: {1}".format(
+                        len(self.opt_cycles), self.original_lineno(lineno)
+                    )
+                )
+            self.scf.feed(lineno, raw_line, lines)
+            if self.scf.exception is not None:
+                raise self.scf.exception
+            # TODO test if error
+            opt_cyc["scf"] = self.scf.get_outcome().data
+        elif self.scf is not None:
+            self.scf.feed(lineno, raw_line, lines)
+
+        parse_geometry_section(opt_cyc, lineno, line, lines)
+
+        # TODO move to read_post_scf?
+        if fnmatch(line, "TOTAL ENERGY*DE*"):
+            if not fnmatch(line, "TOTAL ENERGY*AU*DE*AU*"):
+                return ParsedSection(
+                    lineno,
+                    self.opt_cycles,
+                    "was expecting units in a.u. on line:"
+                    " {0}, got: {1}".format(self.original_lineno(lineno), line),
+                )
+            opt_cyc["energy"] = opt_cyc.get("energy", {})
+            opt_cyc["energy"]["total_corrected"] = convert_units(
+                split_numbers(line)[1], "hartree", "eV"
+            )
+
+        for param in ["MAX GRADIENT", "RMS GRADIENT", "MAX DISPLAC", "RMS DISPLAC"]:
+            if fnmatch(line, "{}*CONVERGED*".format(param)):
+                if "convergence" not in opt_cyc:
+                    opt_cyc["convergence"] = {}
+                opt_cyc["convergence"][param.lower().replace(" ", "_")] = bool(
+                    strtobool(line.split()[-1])
+                )
+
+        if fnmatch(line, "*SCF DID NOT CONVERGE. RETRYING WITH A SMALLER OPT STEP*"):
+            # TODO add failed optimisation steps with dummy energy and extra parameter?
+            # for now discard this optimisation step
+            self.failed_opt_step = True
+
+        return None
+
+    def _parse_first_cycle_line(self, lineno, line):
+        if "OPT END -" in line:
+            if not fnmatch(line, "*E(AU)*"):
+                raise IOError(
+                    "was expecting units in a.u. on line:"
+                    " {0}, got: {1}".format(self.original_lineno(lineno), line)
+                )
+            data = [
+                {
+                    "energy": {
+                        "total_corrected": convert_units(
+                            split_numbers(line)[0], "hartree", "eV"
+                        )
+                    }
+                }
+            ]
+            return ParsedSection(lineno, data)
+        return None
+
+    def finish(self):
+        opt_cycles = list(self.opt_cycles)
+        if not self.first_cycle_only and self.opt_cyc and not self.failed_opt_step:
+            opt_cycles.append(self.opt_cyc)
+        return ParsedSection(
+            self.last_lineno,
+            opt_cycles,
+            "did not find 'OPT END', after optimisation start at line {}".format(
+                self.original_lineno(self.start_lineno)
+            ),
+        )
+
+
+class BandGapsHandler(SectionHandler):
+    """Parse the band gap information (see ``parse_band_gaps``)."""
+
+    def __init__(self, start_lineno):
+        super(BandGapsHandler, self).__init__(start_lineno)
+        self.band_gaps = {}
+
+    def parse_line(self, lineno, line, lines):
+        line = line.strip()
+        if "BAND GAP" in line:
+            if fnmatch(line, "ALPHA BAND GAP:*eV"):
+                bgvalue = split_numbers(line)[0]
+                bgtype = "alpha"
+            elif fnmatch(line, "BETA BAND GAP:*eV"):
+                bgvalue = split_numbers(line)[0]
+                bgtype = "beta"
+            elif fnmatch(line, "BAND GAP:*eV"):
+                bgvalue = split_numbers(line)[0]
+                bgtype = "all"
+            else:
+                return ParsedSection(
+                    self.start_lineno,
+                    self.band_gaps,
+                    "found a band gap of unknown format at line {0}: {1}".format(
+                        self.original_lineno(lineno), line
+                    ),
+                )
+            if bgtype in self.band_gaps:
+                return ParsedSection(
+                    self.start_lineno,
+                    self.band_gaps,
+                    "band gap data already contains {0} value before line {1}: {2}".format(
+                        bgtype, self.original_lineno(lineno), line
+                    ),
+                )
+            self.band_gaps[bgtype] = bgvalue
+        return None
+
+    def finish(self):
+        return ParsedSection(self.start_lineno, self.band_gaps)
+
+
+class FinalGeometryHandler(SectionHandler):
+    """Parse the final optimized geometry (see ``parse_final_geometry``)."""
+
+    def __init__(self, start_lineno):
+        super(FinalGeometryHandler, self).__init__(start_lineno)
+        self.data = {}
+
+    def parse_line(self, lineno, line, lines):
+        line = line.strip()
+        parse_geometry_section(self.data, lineno, line, lines)
+        parse_symmetry_section(self.data, lineno, line, lines)
+        return None
+
+    def finish(self):
+        return ParsedSection(self.last_lineno, self.data)
+
+
+class MullikenHandler(SectionHandler):
+    """Parse the Mulliken population analyses (see ``parse_mulliken_analysis``).
+
+    ``start_analysis`` should be called on each line starting an analysis,
+    and ``feed`` on all subsequent lines.
+    """
+
+    def __init__(self, start_lineno):
+        super(MullikenHandler, self).__init__(start_lineno)
+        self.mulliken = {}
+        self._key_name = None
+        self._data_ao = None
+        self._data_shell = None
+
+    def start_analysis(self, lineno, previous_line):
+        """Start a new analysis, whose type is denoted in the previous line."""
+        if self.finished:
+            return
+        self._store_analysis(self.mulliken)
+        self._key_name = None
+        name = previous_line.strip().lower()
+        if not (
+            name == "ALPHA+BETA ELECTRONS".lower()
+            or name == "ALPHA-BETA ELECTRONS".lower()
+        ):
+            self.outcome = ParsedSection(
+                self.start_lineno,
+                self.mulliken,
+                "was expecting mulliken to be alpha+beta or alpha-beta on line:"
+                " {0}, got: {1}".format(
+                    self.original_lineno(lineno - 1), previous_line
+                ),
+            )
+            return
+        self._key_name = name.replace(" ", "_")
+        self._data_ao = {}
+        self._data_shell = {}
+
+    def _store_analysis(self, mulliken):
+        if self._key_name is None:
+            return
+        data_ao = dict(self._data_ao)
+        # TODO check consistency of ids, ...
+        data_ao.update(self._data_shell)
+        mulliken[self._key_name] = data_ao
+
+    def parse_line(self, lineno, line, lines):
+        if self._key_name is None:
+            return None
+        if fnmatch(line.strip(), "*ATOM*Z*CHARGE*A.O.*POPULATION*"):
+            self._read_block(lineno + 2, lines, self._data_ao, "aos")
+        elif fnmatch(line.strip(), "*ATOM*Z*CHARGE*SHELL*POPULATION*"):
+            self._read_block(lineno + 2, lines, self._data_shell, "shells")
+        return None
+
+    @staticmethod
+    def _read_block(charge_line, lines, data, key):
+        while (
+            lines[charge_line].strip() and not lines[charge_line].strip()[0].isalpha()
+        ):
+            fields = lines[charge_line].strip().split()
+            numbers = split_numbers(lines[charge_line])
+            # populations can wrap multiple lines
+            if len(fields) != len(numbers):
+                data.setdefault("ids", []).append(int(fields[0]))
+                data.setdefault("symbols", []).append(fields[1].lower().capitalize())
+                data.setdefault("atomic_numbers", []).append(int(fields[2]))
+                data.setdefault("charges", []).append(float(fields[3]))
+                data.setdefault(key, []).append([float(f) for f in fields[4:]])
+            else:
+                data[key][-1].extend(numbers)
+            charge_line += 1
+
+    def finish(self):
+        mulliken = dict(self.mulliken)
+        self._store_analysis(mulliken)
+        return ParsedSection(self.start_lineno, mulliken)
+
+
+# the sequential sections: (handler, output key, abort on error)
+SECTION_CHAIN = (
+    (PreHeaderHandler, "non_program", True),
+    (HeaderHandler, "header", True),
+    (GeometryInputHandler, "geometry_input", True),
+    (SetupHandler, None, True),
+    (ScfHandler, ("initial_scf", "cycles"), True),
+    (ScfFinalEnergyHandler, ("initial_scf", "final_energy"), False),
+)
+
+
+class StdoutStreamParser(object):
+    """A single-pass parser of the stdout from a CRYSTAL SCF/optimization computation.
+
+    Lines are dispatched to the handler of each active section,
+    and the output dict is assembled (in the same order as ``read_crystal_stdout``)
+    by ``get_output``.
+    """
+
+    def __init__(self):
+        self.warnings = []
+        self.line_filter = ProgramLineFilter(self.warnings)
+        self.scan = InitialScan(self.line_filter)
+        self.num_lines = 0
+        self.chain = []
+        self.aborted = False
+        self.optimisation = None
+        self.band_gaps = None
+        self.final_geometry = None
+        self.mulliken = None
+        self._previous_line = ""
+
+    def parse(self, handle):
+        """Parse all lines of a file handle."""
+        lines = LineBuffer(self.line_filter.iter_lines(handle), self.num_lines)
+        lineno = self.num_lines
+        while lines.has(lineno):
+            self.parse_line(lineno, lines[lineno], lines)
+            lineno += 1
+            lines.release(lineno)
+
+    def parse_line(self, lineno, line, lines):
+        """Parse a single line, and dispatch it to the active sections.
+
+        Parameters
+        ----------
+        lineno: int
+        line: str
+        lines: LineBuffer
+            for look-ahead to subsequent lines
+
+        """
+        section_start = self.scan.add_line(lineno, line)
+        self.num_lines = lineno + 1
+
+        if not self.aborted:
+            self._parse_chain(lineno, line, lines)
+        if not self.aborted:
+            self._parse_non_sequential(section_start, lineno, line, lines)
+
+        self._previous_line = line
+
+    def _new_handler(self, handler_cls, lineno):
+        """Create a section handler, starting on the line number."""
+        handler = handler_cls(lineno)
+        handler.line_filter = self.line_filter
+        return handler
+
+    def _parse_chain(self, lineno, line, lines):
+        """Parse the sequential sections, each starting on the last line of the previous."""
+        if not self.chain:
+            self.chain.append(self._new_handler(SECTION_CHAIN[0][0], lineno))
+        while True:
+            handler = self.chain[-1]
+            if handler.finished:
+                return
+            handler.feed(lineno, line, lines)
+            if not handler.finished:
+                return
+            abort = SECTION_CHAIN[len(self.chain) - 1][2]
+            if abort and (
+                handler.exception is not None
+                or handler.outcome.parser_error is not None
+            ):
+                self.aborted = True
+                return
+            if len(self.chain) == len(SECTION_CHAIN):
+                return
+            self.chain.append(
+                self._new_handler(SECTION_CHAIN[len(self.chain)][0], lineno)
+            )
+
+    def _parse_non_sequential(self, section_start, lineno, line, lines):
+        """Parse the sections, whose start lines are found by the initial scan."""
+        # consistent with read_crystal_stdout, the last start line is used
+        if section_start == "optimization":
+            self.optimisation = self._new_handler(OptimisationHandler, lineno)
+            self.band_gaps = None
+        elif section_start == "final_geometry":
+            self.final_geometry = self._new_handler(FinalGeometryHandler, lineno)
+        elif section_start == "mulliken":
+            if self.mulliken is None:
+                self.mulliken = self._new_handler(MullikenHandler, lineno)
+            self.mulliken.start_analysis(lineno, self._previous_line)
+        if self.mulliken is not None and section_start != "mulliken":
+            self.mulliken.feed(lineno, line, lines)
+
+        if self.optimisation is not None and not self.optimisation.finished:
+            self.optimisation.feed(lineno, line, lines)
+            if (
+                self.optimisation.outcome is not None
+                and self.optimisation.outcome.parser_error is None
+            ):
+                # TODO do band gaps only com after optimisation?
+                self.band_gaps = self._new_handler(BandGapsHandler, lineno)
+        if self.band_gaps is not None:
+            self.band_gaps.feed(lineno, line, lines)
+        if self.final_geometry is not None:
+            self.final_geometry.feed(lineno, line, lines)
+
+    def get_output(self):
+        """Return the output dict, for the lines parsed so far."""
+        output = {
+            "units": {
+                "conversion": "CODATA2014",
+                "energy": "eV",
+                "length": "angstrom",
+                "angle": "degrees",
+            },
+            "errors": [],
+            "warnings": list(self.warnings),
+            "parser_errors": [],
+            "parser_exceptions": [],
+        }
+        if self.line_filter.num_omitted:
+            output["warnings"].append(self.line_filter.omitted_warning())
+
+        if not self.num_lines:
+            output["parser_errors"] += ["the file is empty"]
+            return assign_exit_code(output)
+
+        errors, run_warnings, _, telapse_seconds, _ = self.scan.result()
+        output["errors"] += errors
+        output["warnings"] += run_warnings
+        output["parser_errors"] += errors
+        if telapse_seconds is not None:
+            output["execution_time_seconds"] = telapse_seconds
+
+        for handler, (_, key_name, abort) in zip(self.chain, SECTION_CHAIN):
+            if not self._add_outcome(handler, output, key_name) and abort:
+                return assign_exit_code(output)
+
+        if self.optimisation is not None:
+            if self._add_outcome(self.optimisation, output, "optimisation"):
+                if self.band_gaps is not None:
+                    self._add_outcome(self.band_gaps, output, "band_gaps")
+
+        if self.final_geometry is not None:
+            self._add_outcome(self.final_geometry, output, "final_geometry")
+
+        if self.mulliken is not None:
+            self._add_outcome(self.mulliken, output, "mulliken")
+
+        return assign_exit_code(output)
+
+    @staticmethod
+    def _add_outcome(handler, output, key_name):
+        """Add the outcome of a section to the output, returning True if successful."""
+        outcome = handler.get_outcome()
+        if outcome is None:
+            output["parser_exceptions"].append(str(handler.exception))
+            return False
+        assign_section_outcome(outcome, output, key_name)
+        return outcome.parser_error is None
@@ -17,8 +17,22 @@
 
 The specification can be found at:
 http://h5cube-spec.readthedocs.io/en/latest/cubeformat.html
+
+The density grid is parsed in chunks (of a fixed number of bytes of text),
+directly into a preallocated array,
+and may optionally be cached in a binary ``.npy`` file, alongside the cube file,
+which is memory-mapped on subsequent reads (rather than re-parsing the text).
+
+Cube files can also be written (from a header and density array or chunks),
+with the density values in the standard ``%13.5E`` format.
+
+Statistics of the density can be computed from an iterable of slabs
+(i.e. without reading the full density into memory), by ``reduce_density``,
+and the density can be coarsened to a smaller grid by ``coarsen_gaussian_cube``.
 """
 from collections import namedtuple
+import os
+import warnings
 
 import numpy as np
 
@@ -40,8 +54,29 @@ GcubeResult = namedtuple(
     ],
 )
 
+# the (approximate) number of bytes of text to read, per chunk of density values
+DEFAULT_CHUNK_BYTES = 2 ** 24
+
+SIDECAR_EXTENSION = ".npy"
+
+REDUCTION_OPS = (
+    "integral",
+    "mean",
+    "min",
+    "max",
+    "histogram",
+    "planar_average",
+    "fraction_above",
+)
+
 
-def read_gaussian_cube(handle, return_density=False, dist_units="angstrom"):
+def read_gaussian_cube(
+    handle,
+    return_density=False,
+    dist_units="angstrom",
+    dtype=np.float64,
+    chunk_bytes=DEFAULT_CHUNK_BYTES,
+):
     """Parse gaussian cube files to a data structure.
 
     The specification can be found at:
@@ -57,16 +92,48 @@ def read_gaussian_cube(handle, return_density=False, dist_units="angstrom"):
         whether to read and return the density values
     dist_units : str
         the distance units to return
+    dtype : numpy.dtype
+        the dtype of the density array (e.g. float64 or float32)
+    chunk_bytes : int
+        the (approximate) number of bytes of text to parse at a time,
+        which bounds the memory used in addition to the density array
 
     Returns
     -------
     aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
 
+    """
+    result = read_gaussian_cube_header(handle, dist_units=dist_units)
+    if not return_density:
+        return result
+
+    density = np.empty(int(np.prod(result.voxel_grid)), dtype=dtype)
+    _fill_density(handle, density, chunk_bytes)
+    return result._replace(density=density.reshape(result.voxel_grid))
+
+
+def read_gaussian_cube_header(handle, dist_units="angstrom"):
+    """Parse the header section of a gaussian cube file.
+
+    On return, the handle is positioned at the start of the density values.
+
+    Parameters
+    ----------
+    handle : file-like
+        an open file handle
+    dist_units : str
+        the distance units to return
+
+    Returns
+    -------
+    aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
+        with ``density=None``
+
     """
     in_dunits = "bohr"
 
-    header = [handle.readline().strip(), handle.readline().strip()]
-    settings = split_numbers(handle.readline().strip())
+    header = [_decode(handle.readline()).strip(), _decode(handle.readline()).strip()]
+    settings = split_numbers(_decode(handle.readline()).strip())
 
     if len(settings) > 4 and settings[4] != 1:
         # TODO implement NVAL != 1
@@ -77,9 +144,9 @@ def read_gaussian_cube(handle, return_density=False, dist_units="angstrom"):
     if natoms < 0:
         # TODO implement DSET_IDS
         raise NotImplementedError("not yet implemented DSET_IDS")
-    an, ax, ay, az = split_numbers(handle.readline().strip())
-    bn, bx, by, bz = split_numbers(handle.readline().strip())
-    cn, cx, cy, cz = split_numbers(handle.readline().strip())
+    an, ax, ay, az = split_numbers(_decode(handle.readline()).strip())
+    bn, bx, by, bz = split_numbers(_decode(handle.readline()).strip())
+    cn, cx, cy, cz = split_numbers(_decode(handle.readline()).strip())
 
     voxel_cell = convert_units(
         np.array([[ax, ay, az], [bx, by, bz], [cx, cy, cz]]), in_dunits, dist_units
@@ -93,19 +160,12 @@ def read_gaussian_cube(handle, return_density=False, dist_units="angstrom"):
     nuclear_charges = []
     ccoords = []
     for _ in range(int(natoms)):
-        anum, ncharge, x, y, z = split_numbers(handle.readline().strip())
+        anum, ncharge, x, y, z = split_numbers(_decode(handle.readline()).strip())
         atomic_numbers.append(int(anum))
         nuclear_charges.append(ncharge)
         ccoord = convert_units(np.asarray([x, y, z]), in_dunits, dist_units) - origin
         ccoords.append(ccoord.tolist())
 
-    density = None
-    if return_density:
-        values = []
-        for line in handle:
-            values += line.split()
-        density = np.array(values, dtype=float).reshape((int(an), int(bn), int(cn)))
-
     return GcubeResult(
         header,
         [avec.tolist(), bvec.tolist(), cvec.tolist()],
@@ -116,5 +176,607 @@ def read_gaussian_cube(handle, return_density=False, dist_units="angstrom"):
         nuclear_charges,
         atomic_numbers,
         {"conversion": "CODATA2014", "length": dist_units},
-        density,
+        None,
+    )
+
+
+def iter_gaussian_cube_density(
+    handle, num_values, dtype=np.float64, chunk_bytes=DEFAULT_CHUNK_BYTES
+):
+    """Iterate over chunks of the density values of a gaussian cube file.
+
+    Parameters
+    ----------
+    handle : file-like
+        an open file handle, positioned at the start of the density values
+        (i.e. after ``read_gaussian_cube_header``)
+    num_values : int
+        the number of density values (i.e. the product of the voxel grid)
+    dtype : numpy.dtype
+        the dtype of the arrays
+    chunk_bytes : int
+        the (approximate) number of bytes of text to parse per chunk
+
+    Yields
+    ------
+    numpy.ndarray
+        1D arrays of consecutive values, in the (C-ordered) order of the grid
+
+    Raises
+    ------
+    ValueError
+        if a value cannot be parsed,
+        or the number of values is not equal to ``num_values``
+
+    """
+    count = 0
+    remainder = None
+    while True:
+        text = handle.read(chunk_bytes)
+        final = not text
+        if remainder is not None:
+            text = remainder + text
+        if not final:
+            # only parse up to the last whitespace, since a value may span two chunks
+            newline, space = ("\n", " ") if isinstance(text, str) else (b"\n", b" ")
+            split = max(text.rfind(newline), text.rfind(space))
+            if split < 0:
+                remainder = text
+                continue
+            text, remainder = text[:split], text[split:]
+        if not text.strip():
+            # NB: np.fromstring returns [-1.] for whitespace only text
+            values = np.empty(0, dtype=dtype)
+        else:
+            values = _parse_values(text, dtype, count)
+        count += values.size
+        if count > num_values:
+            raise ValueError(
+                "expected {} density values, found more".format(num_values)
+            )
+        if values.size:
+            yield values
+        if final:
+            break
+    if count != num_values:
+        raise ValueError(
+            "expected {} density values, found {}".format(num_values, count)
+        )
+
+
+def iter_gaussian_cube_slabs(
+    handle, voxel_grid, slab_size, dtype=np.float64, chunk_bytes=DEFAULT_CHUNK_BYTES
+):
+    """Iterate over slabs of the density values of a gaussian cube file.
+
+    Parameters
+    ----------
+    handle : file-like
+        an open file handle, positioned at the start of the density values
+        (i.e. after ``read_gaussian_cube_header``)
+    voxel_grid : list[int]
+        the number of voxels along each axis
+    slab_size : int
+        the number of planes (along the first axis) per slab
+    dtype : numpy.dtype
+        the dtype of the arrays
+    chunk_bytes : int
+        the (approximate) number of bytes of text to parse per chunk
+
+    Yields
+    ------
+    numpy.ndarray
+        arrays of shape (slab_size, b, c), the last of which may be smaller
+
+    """
+    _, bn, cn = voxel_grid
+    buffer = np.empty(slab_size * bn * cn, dtype=dtype)
+    filled = 0
+    for values in iter_gaussian_cube_density(
+        handle, int(np.prod(voxel_grid)), dtype=dtype, chunk_bytes=chunk_bytes
+    ):
+        while values.size:
+            size = min(values.size, buffer.size - filled)
+            buffer[filled : filled + size] = values[:size]
+            filled += size
+            values = values[size:]
+            if filled == buffer.size:
+                yield buffer.reshape((slab_size, bn, cn))
+                buffer = np.empty(slab_size * bn * cn, dtype=dtype)
+                filled = 0
+    if filled:
+        yield buffer[:filled].reshape((-1, bn, cn))
+
+
+def _parse_values(text, dtype, count):
+    """Parse a block of whitespace separated values."""
+    with warnings.catch_warnings():
+        # unparsable text only emits a DeprecationWarning (and truncates the array)
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=dtype, sep=" ")
+        except DeprecationWarning:
+            raise ValueError(
+                "could not parse the density values, after value {}".format(count)
+            )
+
+
+def _fill_density(handle, density, chunk_bytes):
+    """Parse the density values into a preallocated 1D array."""
+    position = 0
+    for values in iter_gaussian_cube_density(
+        handle, density.size, dtype=density.dtype, chunk_bytes=chunk_bytes
+    ):
+        density[position : position + values.size] = values
+        position += values.size
+
+
+def _decode(line):
+    if isinstance(line, bytes):
+        return line.decode("utf8")
+    return line
+
+
+def write_gaussian_cube(handle, cube_data, density):
+    """Write a gaussian cube file.
+
+    Parameters
+    ----------
+    handle : file-like
+        a file handle, opened in text mode
+    cube_data : aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
+        the header data (the density field is ignored)
+    density : numpy.ndarray or iterable[numpy.ndarray]
+        the density array, or an iterable of chunks of the array (in C-order),
+        each of which must contain a whole number of rows (along the last axis)
+
+    """
+    dist_units = cube_data.units["length"]
+    origin = np.array(cube_data.origin, dtype=float)
+    natoms = len(cube_data.atoms_atomic_number)
+
+    lines = [" " + line for line in cube_data.header]
+    lines.append(
+        "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(
+            natoms, *convert_units(origin, dist_units, "bohr")
+        )
+    )
+    for num, vector in zip(cube_data.voxel_grid, cube_data.voxel_cell):
+        lines.append(
+            "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(
+                num, *convert_units(np.array(vector), dist_units, "bohr")
+            )
+        )
+    for anum, ncharge, position in zip(
+        cube_data.atoms_atomic_number,
+        cube_data.atoms_nuclear_charge,
+        cube_data.atoms_positions,
+    ):
+        ccoord = convert_units(np.array(position) + origin, dist_units, "bohr")
+        lines.append(
+            "{:5d}{:12.6f}{:12.6f}{:12.6f}{:12.6f}".format(anum, ncharge, *ccoord)
+        )
+    handle.write("\n".join(lines) + "\n")
+
+    # each row (along the last axis) is written over lines of (up to) 6 values
+    cn = cube_data.voxel_grid[2]
+    row_format = "\n".join(["%13.5E" * min(6, cn - i) for i in range(0, cn, 6)]) + "\n"
+    if isinstance(density, np.ndarray):
+        density = [density]
+    for chunk in density:
+        rows = np.asarray(chunk).reshape((-1, cn)).tolist()
+        handle.write("".join([row_format % tuple(row) for row in rows]))
+
+
+def get_sidecar_path(filepath):
+    """Return the path to the binary density file, for a gaussian cube file."""
+    return filepath + SIDECAR_EXTENSION
+
+
+def read_gaussian_cube_file(
+    filepath,
+    return_density=False,
+    dist_units="angstrom",
+    dtype=np.float64,
+    chunk_bytes=DEFAULT_CHUNK_BYTES,
+    use_sidecar=False,
+):
+    """Parse a gaussian cube file to a data structure, given its path.
+
+    If ``use_sidecar=True``, the density is read from a binary ``.npy`` file,
+    alongside the cube file, as a read-only memory-mapped array.
+    This file is (re)created if it does not exist,
+    is older than the cube file, or its shape/dtype do not match.
+
+    Parameters
+    ----------
+    filepath : str
+        the path to the file
+    return_density : bool
+        whether to read and return the density values
+    dist_units : str
+        the distance units to return
+    dtype : numpy.dtype
+        the dtype of the density array (e.g. float64 or float32)
+    chunk_bytes : int
+        the (approximate) number of bytes of text to parse at a time
+    use_sidecar : bool
+        whether to read/write the density from/to a memory-mapped binary file
+
+    Returns
+    -------
+    aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
+
+    """
+    with open(filepath, "r") as handle:
+        result = read_gaussian_cube_header(handle, dist_units=dist_units)
+        if not return_density:
+            return result
+        if not use_sidecar:
+            density = np.empty(int(np.prod(result.voxel_grid)), dtype=dtype)
+            _fill_density(handle, density, chunk_bytes)
+            return result._replace(density=density.reshape(result.voxel_grid))
+
+        sidecar_path = get_sidecar_path(filepath)
+        density = _load_sidecar(
+            sidecar_path, os.path.getmtime(filepath), result.voxel_grid, dtype
+        )
+        if density is None:
+            _write_sidecar(sidecar_path, handle, result.voxel_grid, dtype, chunk_bytes)
+            density = np.load(sidecar_path, mmap_mode="r")
+
+    return result._replace(density=density)
+
+
+def _load_sidecar(path, mtime, shape, dtype):
+    """Memory-map the binary density file, or return None if it is missing or stale."""
+    if not os.path.exists(path) or os.path.getmtime(path) < mtime:
+        return None
+    try:
+        density = np.load(path, mmap_mode="r")
+    except ValueError:
+        return None
+    if list(density.shape) != list(shape) or density.dtype != np.dtype(dtype):
+        return None
+    return density
+
+
+def _write_sidecar(path, handle, shape, dtype, chunk_bytes):
+    """Parse the density values directly to a binary density file."""
+    temp_path = path + ".tmp"
+    try:
+        density = np.lib.format.open_memmap(
+            temp_path, mode="w+", dtype=dtype, shape=tuple(shape)
+        )
+        _fill_density(handle, density.reshape(-1), chunk_bytes)
+        density.flush()
+        del density
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def integrate_spheres(
+    density,
+    voxel_cell,
+    origin,
+    positions,
+    radii,
+    pbc=(True, True, True),
+    subdivisions=None,
+):
+    """Integrate the density within spheres.
+
+    For each sphere, only the sub-grid of voxels within its bounding box is evaluated,
+    with the voxel indices extended beyond the grid in periodic dimensions
+    (and wrapped back onto the density), up to one cell length either side.
+
+    Parameters
+    ----------
+    density : numpy.ndarray
+        the density grid, shape (a, b, c)
+    voxel_cell : list
+        the voxel vectors, shape (3, 3)
+    origin : list
+        the origin, shape (3,)
+    positions : list
+        the centres of the spheres, shape (n, 3),
+        in the same coordinate frame as ``GcubeResult.atoms_positions``
+    radii : float or list[float]
+        the radius of all spheres, or the radius of each sphere
+    pbc : list[bool]
+        periodic dimensions
+    subdivisions : int or None
+        if not None, voxels that are partially within a sphere
+        are weighted by the fraction of (subdivisions^3) points,
+        evenly distributed within the voxel, that are within the sphere.
+        Otherwise, a voxel is included only if its grid point is within the sphere.
+
+    Returns
+    -------
+    numpy.ndarray
+        shape (n,)
+
+    """
+    density = np.asarray(density)
+    voxel_cell = np.asarray(voxel_cell, dtype=float)
+    origin = np.asarray(origin, dtype=float)
+    positions = np.asarray(positions, dtype=float).reshape((-1, 3))
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(positions),))
+    grid = np.array(density.shape)
+
+    voxel_volume = np.linalg.det(voxel_cell)
+    inverse = np.linalg.inv(voxel_cell)
+    # the extent, in voxel indices along each axis, of a sphere of unit radius
+    extent = np.linalg.norm(inverse, axis=0)
+    lower = np.where(pbc, -grid, 0)
+    upper = np.where(pbc, 2 * grid - 1, grid - 1)
+
+    half_diagonal = 0.0
+    sub_offsets = None
+    if subdivisions is not None:
+        corners = np.array(
+            [[i, j, k] for i in (-0.5, 0.5) for j in (-0.5, 0.5) for k in (-0.5, 0.5)]
+        )
+        half_diagonal = np.linalg.norm(corners.dot(voxel_cell), axis=1).max()
+        fractions = (np.arange(subdivisions) + 0.5) / subdivisions - 0.5
+        sub_offsets = (
+            np.stack(np.meshgrid(fractions, fractions, fractions, indexing="ij"), -1)
+            .reshape((-1, 3))
+            .dot(voxel_cell)
+        )
+
+    results = np.zeros(len(positions))
+    for index, (position, radius) in enumerate(zip(positions, radii)):
+        centre = (position + origin).dot(inverse)
+        reach = (radius + half_diagonal) * extent
+        start = np.maximum(np.ceil(centre - reach).astype(int), lower)
+        end = np.minimum(np.floor(centre + reach).astype(int), upper)
+        if np.any(end < start):
+            continue
+        ranges = [np.arange(s, e + 1) for s, e in zip(start, end)]
+
+        # the vectors from the centre to each voxel grid point, shape (a, b, c, 3)
+        vectors = (
+            ranges[0][:, None, None, None] * voxel_cell[0]
+            + ranges[1][None, :, None, None] * voxel_cell[1]
+            + ranges[2][None, None, :, None] * voxel_cell[2]
+            - origin
+            - position
+        )
+        dist_sq = (vectors ** 2).sum(axis=-1)
+        values = density[
+            np.ix_(ranges[0] % grid[0], ranges[1] % grid[1], ranges[2] % grid[2])
+        ]
+
+        if sub_offsets is None:
+            results[index] = values[dist_sq <= radius ** 2].sum()
+            continue
+
+        distance = np.sqrt(dist_sq)
+        inside = distance + half_diagonal <= radius
+        partial = ~inside & (distance - half_diagonal <= radius)
+        sub_vectors = vectors[partial][:, None, :] + sub_offsets[None, :, :]
+        weights = ((sub_vectors ** 2).sum(axis=-1) <= radius ** 2).mean(axis=1)
+        results[index] = values[inside].sum() + (values[partial] * weights).sum()
+
+    return results * voxel_volume
+
+
+def reduce_density(
+    slabs,
+    voxel_cell,
+    ops,
+    axis=2,
+    bins=100,
+    value_range=None,
+    isovalue=0.0,
+):
+    """Compute statistics of the density, from consecutive slabs of the grid.
+
+    Only a single slab is held in memory at any time.
+
+    Parameters
+    ----------
+    slabs : iterable[numpy.ndarray]
+        consecutive slabs of planes along the first axis, each of shape (n, b, c)
+    voxel_cell : list
+        the voxel vectors, shape (3, 3)
+    ops : list[str]
+        the reductions to compute (see ``REDUCTION_OPS``):
+
+        - integral: the sum of the density multiplied by the voxel volume
+        - mean, min, max: of the density values
+        - histogram: a dict of 'counts' and bin 'edges'
+        - planar_average: the mean of each plane of the grid, along ``axis``
+        - fraction_above: the fraction of values greater than ``isovalue``
+
+    axis : int
+        the axis of the grid, along which to compute planar averages
+    bins : int
+        the number of histogram bins
+    value_range : tuple[float, float]
+        the range of the histogram bins (required for the histogram)
+    isovalue : float
+        the value for ``fraction_above``
+
+    Returns
+    -------
+    dict
+
+    """
+    unknown = set(ops).difference(REDUCTION_OPS)
+    if unknown:
+        raise ValueError("ops must be in {}: {}".format(REDUCTION_OPS, sorted(unknown)))
+    if axis not in (0, 1, 2):
+        raise ValueError("axis must be 0, 1 or 2: {}".format(axis))
+    if "histogram" in ops:
+        if value_range is None:
+            raise ValueError("a value_range is required for the histogram")
+        edges = np.linspace(value_range[0], value_range[1], bins + 1)
+        counts = np.zeros(bins, dtype=np.int64)
+
+    total = 0.0
+    count = 0
+    minimum = np.inf
+    maximum = -np.inf
+    above = 0
+    planes = []
+    plane_sums = None
+    for slab in slabs:
+        if not slab.size:
+            continue
+        total += slab.sum(dtype=np.float64)
+        count += slab.size
+        if "min" in ops:
+            minimum = min(minimum, slab.min())
+        if "max" in ops:
+            maximum = max(maximum, slab.max())
+        if "fraction_above" in ops:
+            above += np.count_nonzero(slab > isovalue)
+        if "histogram" in ops:
+            counts += np.histogram(slab, bins=edges)[0]
+        if "planar_average" in ops:
+            if axis == 0:
+                planes.append(slab.mean(axis=(1, 2), dtype=np.float64))
+            else:
+                sums = slab.sum(axis=(0, 3 - axis), dtype=np.float64)
+                plane_sums = sums if plane_sums is None else plane_sums + sums
+
+    results = {}
+    if "integral" in ops:
+        results["integral"] = total * np.linalg.det(voxel_cell)
+    if "mean" in ops:
+        results["mean"] = total / count if count else np.nan
+    if "min" in ops:
+        results["min"] = float(minimum)
+    if "max" in ops:
+        results["max"] = float(maximum)
+    if "fraction_above" in ops:
+        results["fraction_above"] = above / float(count) if count else np.nan
+    if "histogram" in ops:
+        results["histogram"] = {"counts": counts, "edges": edges}
+    if "planar_average" in ops:
+        if axis == 0:
+            results["planar_average"] = np.concatenate(planes)
+        else:
+            results["planar_average"] = plane_sums * plane_sums.size / count
+    return results
+
+
+def get_coarsen_stride(voxel_grid, target_voxels, min_voxels=4):
+    """Return the strides, for which the coarsened grid has at most ``target_voxels``.
+
+    The smallest stride is used along every axis,
+    except that no axis is coarsened to fewer than ``min_voxels`` voxels
+    (or its original number of voxels, if fewer).
+    If the target cannot be reached, the largest strides within this limit are returned.
+
+    Parameters
+    ----------
+    voxel_grid : list[int]
+        the number of voxels along each axis
+    target_voxels : int
+        the maximum number of voxels in the coarsened grid
+    min_voxels : int
+        the minimum number of voxels along each axis of the coarsened grid
+
+    Returns
+    -------
+    list[int]
+
+    """
+    voxel_grid = np.array(voxel_grid, dtype=int)
+    min_grid = np.minimum(voxel_grid, min_voxels)
+    max_strides = np.array(
+        [
+            max(s for s in range(1, n + 1) if -(-n // s) >= m)
+            for n, m in zip(voxel_grid, min_grid)
+        ]
+    )
+    for stride in range(1, max_strides.max() + 1):
+        strides = np.minimum(stride, max_strides)
+        if np.prod(-(-voxel_grid // strides)) <= max(target_voxels, 1):
+            return strides.tolist()
+    return max_strides.tolist()
+
+
+def coarsen_gaussian_cube(cube_data, slabs, stride):
+    """Coarsen the density grid, by averaging blocks of voxels.
+
+    The coarsened grid has ``ceil(n / stride)`` voxels along each axis,
+    with each value the mean of its block.
+    Where the stride does not divide the number of voxels,
+    the last block along that axis is averaged over the voxels it contains,
+    and the coarsened cell is larger than the original cell.
+    The origin is shifted to the centre of the first block,
+    and the atom positions (relative to the origin) are shifted to compensate.
+
+    Parameters
+    ----------
+    cube_data : aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult
+        the header data (the density field is ignored)
+    slabs : iterable[numpy.ndarray]
+        consecutive slabs of planes along the first axis, each of shape (n, b, c)
+    stride : int or list[int]
+        the number of voxels per block, for all or each axis
+
+    Returns
+    -------
+    tuple[aiida_crystal17.parsers.raw.gaussian_cube.GcubeResult, iterable[numpy.ndarray]]
+        the coarsened header data, and an iterator over the coarsened planes
+
+    Raises
+    ------
+    ValueError
+        if a stride is not a positive integer
+
+    """
+    strides = np.broadcast_to(np.asarray(stride, dtype=int), (3,))
+    if (strides < 1).any():
+        raise ValueError("the stride must be a positive integer: {}".format(stride))
+    voxel_grid = np.array(cube_data.voxel_grid)
+    voxel_cell = np.array(cube_data.voxel_cell, dtype=float)
+    shift = np.dot((strides - 1) / 2.0, voxel_cell)
+    new_data = cube_data._replace(
+        voxel_grid=(-(-voxel_grid // strides)).tolist(),
+        voxel_cell=(voxel_cell * strides[:, None]).tolist(),
+        origin=(np.asarray(cube_data.origin, dtype=float) + shift).tolist(),
+        atoms_positions=(
+            np.asarray(cube_data.atoms_positions, dtype=float).reshape((-1, 3)) - shift
+        ).tolist(),
+        density=None,
+    )
+    return new_data, _iter_coarsened_planes(slabs, voxel_grid, strides)
+
+
+def _iter_coarsened_planes(slabs, voxel_grid, strides):
+    """Iterate over the coarsened planes, averaging the slabs block by block."""
+    starts_b = np.arange(0, voxel_grid[1], strides[1])
+    starts_c = np.arange(0, voxel_grid[2], strides[2])
+    # the number of voxels in each block of a plane
+    plane_voxels = np.outer(
+        np.diff(np.append(starts_b, voxel_grid[1])),
+        np.diff(np.append(starts_c, voxel_grid[2])),
     )
+    block_sum = None
+    position = 0
+    for slab in slabs:
+        reduced = np.add.reduceat(
+            np.add.reduceat(slab, starts_b, axis=1, dtype=np.float64),
+            starts_c,
+            axis=2,
+        )
+        offset = 0
+        while offset < len(reduced):
+            block_start = (position // strides[0]) * strides[0]
+            block_end = min(block_start + strides[0], voxel_grid[0])
+            size = min(block_end - position, len(reduced) - offset)
+            part = reduced[offset : offset + size].sum(axis=0)
+            block_sum = part if block_sum is None else block_sum + part
+            offset += size
+            position += size
+            if position == block_end:
+                yield (block_sum / ((block_end - block_start) * plane_voxels))[None]
+                block_sum = None
@@ -21,7 +21,7 @@ from aiida.plugins import DataFactory
 
 from aiida_crystal17 import __version__
 from aiida_crystal17.calculations.cry_main import CryMainCalculation
-from aiida_crystal17.parsers.raw import crystal_stdout
+from aiida_crystal17.parsers.raw import crystal_stdout, crystal_stdout_stream
 from aiida_crystal17.symmetry import convert_structure
 
 
@@ -29,7 +29,13 @@ class OutputNodes(Mapping):
     """A mapping of output nodes, with attribute access."""
 
     def __init__(self):
-        self._dict = {"results": None, "structure": None, "symmetry": None}
+        self._dict = {
+            "results": None,
+            "structure": None,
+            "symmetry": None,
+            "history": None,
+            "mulliken": None,
+        }
 
     def _get_results(self):
         return self._dict["results"]
@@ -58,6 +64,24 @@ class OutputNodes(Mapping):
 
     symmetry = property(_get_symmetry, _set_symmetry)
 
+    def _get_history(self):
+        return self._dict["history"]
+
+    def _set_history(self, value):
+        assert isinstance(value, DataFactory("array"))
+        self._dict["history"] = value
+
+    history = property(_get_history, _set_history)
+
+    def _get_mulliken(self):
+        return self._dict["mulliken"]
+
+    def _set_mulliken(self, value):
+        assert isinstance(value, DataFactory("array"))
+        self._dict["mulliken"] = value
+
+    mulliken = property(_get_mulliken, _set_mulliken)
+
     def __getitem__(self, value):
         out = self._dict[value]
         if out is None:
@@ -80,13 +104,17 @@ class ParserResult(object):
 
 
 # pylint: disable=too-many-locals,too-many-statements
-def parse_main_out(fileobj, parser_class, init_struct=None, init_settings=None):
+def parse_main_out(
+    fileobj, parser_class, init_struct=None, init_settings=None, streaming=False
+):
     """Parse the main output file and create the required output nodes.
 
     :param fileobj: handle to main output file
     :param parser_class: a string denoting the parser class
     :param init_struct: input structure
     :param init_settings: input structure settings
+    :param streaming: parse the file in a single pass, line by line,
+        rather than reading the full content into memory
 
     :return parse_result
 
@@ -105,7 +133,10 @@ def parse_main_out(fileobj, parser_class, init_struct=None, init_settings=None):
     }
 
     try:
-        data = crystal_stdout.read_crystal_stdout(fileobj.read())
+        if streaming:
+            data = crystal_stdout_stream.read_crystal_stdout_stream(fileobj)
+        else:
+            data = crystal_stdout.read_crystal_stdout(fileobj.read())
     except IOError as err:
         # should never happen
         traceback.print_exc()
@@ -131,6 +162,13 @@ def parse_main_out(fileobj, parser_class, init_struct=None, init_settings=None):
         traceback.print_exc()
         final_info = {}
 
+    history_arrays = crystal_stdout.extract_history_arrays(data)
+    if history_arrays:
+        parser_result.nodes.history = _create_array_data(history_arrays)
+    mulliken_arrays = crystal_stdout.extract_mulliken_arrays(data)
+    if mulliken_arrays:
+        parser_result.nodes.mulliken = _create_array_data(mulliken_arrays)
+
     results_data.pop("initial_geometry", None)
     initial_scf = results_data.pop("initial_scf", None)
     optimisation = results_data.pop("optimisation", None)
@@ -161,7 +199,6 @@ def parse_main_out(fileobj, parser_class, init_struct=None, init_settings=None):
     )
 
     if mulliken_analysis is not None:
-        # TODO output Mulliken analysis as separate ArrayData node
         _extract_mulliken(mulliken_analysis, results_data)
 
     parser_result.nodes.results = DataFactory("dict")(dict=results_data)
@@ -172,6 +209,14 @@ def parse_main_out(fileobj, parser_class, init_struct=None, init_settings=None):
     return parser_result
 
 
+def _create_array_data(arrays):
+    """Create an ArrayData node from a dict of name -> numpy.ndarray."""
+    array_data = DataFactory("array")()
+    for name, array in arrays.items():
+        array_data.set_array(name, array)
+    return array_data
+
+
 def _extract_symmetry(final_data, init_settings, param_data, parser_result, exit_codes):
     """Extract symmetry operations."""
     if "primitive_symmops" not in final_data:
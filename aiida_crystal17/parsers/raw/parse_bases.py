@@ -16,6 +16,8 @@
 from collections import namedtuple
 import copy
 
+import numpy as np
+
 from aiida_crystal17.common.atoms import (
     ELECTRON_CONFIGURATIONS,
     GAUSSIAN_ORBITALS,
@@ -267,63 +269,146 @@ OrbitalResult = namedtuple(
     ["electrons", "core_electrons", "number_ao", "orbital_types", "ao_indices"],
 )
 
+#: the dtype of the ``ao_indices`` array, returned by ``compute_orbitals(as_arrays=True)``
+AO_INDICES_DTYPE = np.dtype(
+    [("atom", np.int64), ("element", "U3"), ("type", "U2"), ("index", np.int64)]
+)
+
+
+def _compute_element_orbitals(symbol, basis_set):
+    """compute the atomic orbitals for a single element
+
+    Returns
+    -------
+    tuple
+        (electrons, core_electrons, orbital_types, ao_types, ao_type_indices),
+        where the last two give the type and (per type) index of each atomic orbital
+
+    """
+    if basis_set["type"] == "valence-electron":
+        raise NotImplementedError("computing for bases with core pseudopotentials")
+    electrons = SYMBOLS_R[symbol]
+    outer_electrons = sum([i for n, i in ELECTRON_CONFIGURATIONS[electrons]["outer"]])
+    orbital_types = []
+    ao_types = []
+    ao_type_indices = []
+    type_count = {}
+    for orbital in basis_set["bs"]:
+        type_count.setdefault(orbital["type"], 0)
+        type_count[orbital["type"]] += 1
+        orbital_types.append((symbol, orbital["type"], type_count[orbital["type"]]))
+        ao_types.extend([orbital["type"]] * GAUSSIAN_ORBITALS[orbital["type"]])
+        ao_type_indices.extend(
+            [type_count[orbital["type"]]] * GAUSSIAN_ORBITALS[orbital["type"]]
+        )
+    return (
+        electrons,
+        electrons - outer_electrons,
+        orbital_types,
+        ao_types,
+        ao_type_indices,
+    )
+
 
-def compute_orbitals(atoms, basis_sets):
-    # type: (list, dict) -> OrbitalResult
+def compute_orbitals(atoms, basis_sets, as_arrays=False):
+    # type: (list, dict, bool) -> OrbitalResult
     """compute data for all atomic orbitals in a structure,
     given elemental representations by crystal basis sets
 
+    The orbitals are computed once per element, then tiled across the atoms.
+
     Parameters
     ----------
     atoms : list[str] or list[int]
         list of atomic numbers or symbols which the structure comprises of
     basis_sets : dict[str, dict]
         basis set data, in the format returned from ``parse_bsets_stdin``
+    as_arrays : bool
+        if True, return ``ao_indices`` as a structured array (of dtype ``AO_INDICES_DTYPE``),
+        where row i gives the (atom, element, type, index) of atomic orbital i + 1,
+        otherwise return the dict view of this array (see ``ao_indices_to_dict``)
 
     Returns
     -------
     OrbitalResult
 
     """
-    total_electrons = total_core_electrons = total_aos = 0
-    aos_indices = {}
-    orbital_types = []
-
+    symbols = {}
+    elements = []
+    atom_elements = np.empty(len(atoms), dtype=np.int64)
     for atom_index, atom in enumerate(atoms):
-        try:
-            electrons = int(atom)
-            symbol = SYMBOLS[int(atom)]
-        except (TypeError, ValueError):
-            symbol = atom
-            electrons = SYMBOLS_R[atom]
-        if basis_sets[symbol]["type"] == "valence-electron":
-            raise NotImplementedError("computing for bases with core pseudopotentials")
-        outer_electrons = sum(
-            [i for n, i in ELECTRON_CONFIGURATIONS[electrons]["outer"]]
-        )
-        total_electrons += electrons
-        total_core_electrons += electrons - outer_electrons
-        type_count = {}
-        for orbital in basis_sets[symbol]["bs"]:
-            type_count.setdefault(orbital["type"], 0)
-            type_count[orbital["type"]] += 1
-            for i in range(GAUSSIAN_ORBITALS[orbital["type"]]):
-                total_aos += 1
-                if (
-                    symbol,
-                    orbital["type"],
-                    type_count[orbital["type"]],
-                ) not in orbital_types:
-                    orbital_types.append(
-                        (symbol, orbital["type"], type_count[orbital["type"]])
-                    )
-                aos_indices[total_aos] = {
-                    "atom": atom_index,
-                    "element": symbol,
-                    "type": orbital["type"],
-                    "index": type_count[orbital["type"]],
-                }
+        if atom not in symbols:
+            try:
+                symbol = SYMBOLS[int(atom)]
+            except (TypeError, ValueError):
+                symbol = atom
+            if symbol not in elements:
+                elements.append(symbol)
+            symbols[atom] = elements.index(symbol)
+        atom_elements[atom_index] = symbols[atom]
+
+    element_data = [
+        _compute_element_orbitals(symbol, basis_sets[symbol]) for symbol in elements
+    ]
+    element_counts = np.bincount(atom_elements, minlength=len(elements))
+    total_electrons = int(np.dot(element_counts, [d[0] for d in element_data]))
+    total_core_electrons = int(np.dot(element_counts, [d[1] for d in element_data]))
+    orbital_types = [otype for d in element_data for otype in d[2]]
+
+    # tile the per-element tables of atomic orbitals across the atoms
+    element_num_aos = np.array([len(d[3]) for d in element_data], dtype=np.int64)
+    element_starts = np.concatenate([[0], np.cumsum(element_num_aos)[:-1]])
+    atom_num_aos = element_num_aos[atom_elements]
+    total_aos = int(atom_num_aos.sum())
+    atom_starts = np.cumsum(atom_num_aos) - atom_num_aos
+    sources = np.repeat(element_starts[atom_elements] - atom_starts, atom_num_aos)
+    sources += np.arange(total_aos)
+
+    ao_indices = np.empty(total_aos, dtype=AO_INDICES_DTYPE)
+    ao_indices["atom"] = np.repeat(np.arange(len(atoms)), atom_num_aos)
+    ao_indices["element"] = np.repeat(
+        np.array(elements, dtype=AO_INDICES_DTYPE["element"])[atom_elements],
+        atom_num_aos,
+    )
+    ao_indices["type"] = np.array(
+        [t for d in element_data for t in d[3]], dtype=AO_INDICES_DTYPE["type"]
+    )[sources]
+    ao_indices["index"] = np.array(
+        [i for d in element_data for i in d[4]], dtype=np.int64
+    )[sources]
+
+    if not as_arrays:
+        ao_indices = ao_indices_to_dict(ao_indices)
 
     return OrbitalResult(
-        total_electrons, total_core_electrons, total_aos, orbital_types, aos_indices
+        total_electrons, total_core_electrons, total_aos, orbital_types, ao_indices
     )
+
+
+def ao_indices_to_dict(ao_indices):
+    """convert the ``ao_indices`` array, returned by ``compute_orbitals(as_arrays=True)``,
+    to a dict view
+
+    Parameters
+    ----------
+    ao_indices : numpy.ndarray
+
+    Returns
+    -------
+    dict
+        {ao_number: {"atom": int, "element": str, "type": str, "index": int}},
+        with atomic orbitals numbered from 1
+
+    """
+    return {
+        number: {"atom": atom, "element": element, "type": otype, "index": index}
+        for number, (atom, element, otype, index) in enumerate(
+            zip(
+                ao_indices["atom"].tolist(),
+                ao_indices["element"].tolist(),
+                ao_indices["type"].tolist(),
+                ao_indices["index"].tolist(),
+            ),
+            1,
+        )
+    }
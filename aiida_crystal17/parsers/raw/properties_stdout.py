@@ -14,17 +14,19 @@
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # GNU Lesser General Public License for more details.
 """Parse the stdout content from a CRYSTAL Properties computation."""
+import io
 import re
 
 from aiida_crystal17.common.parsing import convert_units, split_numbers
 from .crystal_stdout import (
     SYSTEM_INFO_REGEXES,
+    KeywordClassifier,
     ParsedSection,
+    ProgramLineFilter,
     assign_exit_code,
     parse_calculation_header,
     parse_pre_header,
     parse_section,
-    strip_non_program_output,
 )
 
 INPUT_WF_REGEXES = (
@@ -53,6 +55,8 @@ def read_properties_stdout(content):
     """Parse the stdout content from a CRYSTAL Properties computation to a dict.
 
     NOTE: this function expects that NEWK is the initial part of the computation
+
+    :param content: the stdout content (or a handle to the stdout file)
     """
     output = {
         "units": {"conversion": "CODATA2014", "energy": "eV"},
@@ -62,10 +66,10 @@ def read_properties_stdout(content):
         "parser_exceptions": [],
     }
 
-    # strip non program output
-    content, warnings = strip_non_program_output(content)
-    output["warnings"] += warnings
-    lines = content.splitlines()
+    # omit non program output
+    if isinstance(content, str):
+        content = io.StringIO(content)
+    lines = list(ProgramLineFilter(output["warnings"]).iter_lines(content))
 
     if not lines:
         output["parser_errors"] += ["the file is empty"]
@@ -112,6 +116,18 @@ def read_properties_stdout(content):
     return output
 
 
+INITIAL_SCAN_CLASSIFIER = KeywordClassifier(
+    [
+        "warning",
+        "error",
+        "mpi_abort",
+        "convergence_unsatisfied",
+        "telapse",
+        "endprop",
+    ]
+)
+
+
 def initial_parse(lines):
     """Scan the file for errors, and find the final elapsed time value."""
     errors = []
@@ -122,24 +138,25 @@ def initial_parse(lines):
     start_lines = {}
     found_endprop = False
 
-    for lineno, line in enumerate(lines):
+    for lineno, keyword in INITIAL_SCAN_CLASSIFIER.scan(lines):
 
-        if "WARNING" in line.upper():
+        line = lines[lineno]
+        if keyword == "warning":
             warnings.append(line.strip())
-        elif "ERROR" in line:
+        elif keyword == "error":
             # TODO ignore errors before program execution (e.g. in mpiexec setup)?
             if "open_hca: getaddr_netdev ERROR" not in line:
                 errors.append(line.strip())
-        elif "MPI_Abort" in line:
+        elif keyword == "mpi_abort":
             # only record one mpi_abort event (to not clutter output)
             if not mpi_abort:
                 errors.append(line.strip())
                 mpi_abort = True
-        elif "CONVERGENCE TESTS UNSATISFIED" in line.upper():
+        elif keyword == "convergence_unsatisfied":
             errors.append(line.strip())
-        elif "TELAPSE" in line:
+        elif keyword == "telapse":
             telapse_line = lineno
-        elif line.strip().startswith("ENDPROP"):
+        elif keyword == "endprop":
             found_endprop = True
 
     total_seconds = None
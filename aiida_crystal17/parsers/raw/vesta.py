@@ -20,9 +20,6 @@ import os
 import shutil
 from textwrap import dedent
 
-import ase
-
-from aiida_crystal17.parsers.raw.gaussian_cube import read_gaussian_cube
 from aiida_crystal17.validation import validate_against_schema
 
 SymbolInfo = namedtuple("SymbolInfo", ["radius", "r2", "r3", "r", "g", "b"])
@@ -195,7 +192,7 @@ def create_vesta_input(atoms, cube_filepath=None, settings=None):
     lines.append("STRUC")
     for i, ((x, y, z), symbol) in enumerate(
         zip(atoms.get_scaled_positions(), atoms.get_chemical_symbols())
-    ):  # type: (int, ase.Atom)
+    ):
         label = (
             settings["sites"]
             .get(str(i + 1), {})
@@ -213,7 +210,7 @@ def create_vesta_input(atoms, cube_filepath=None, settings=None):
 
     # isotropic displacement parameter
     lines.append("THERI 0")
-    for i, atom in enumerate(atoms):  # type: (int, ase.Atom)
+    for i, atom in enumerate(atoms):
         label = (
             settings["sites"]
             .get(str(i + 1), {})
@@ -536,6 +533,8 @@ def write_gcube_to_vesta(
     folder_path,
     file_name,
     settings=None,
+    stride=None,
+    target_voxels=None,
 ):
     """Use an ``crystal17.gcube`` data node to create the input files for VESTA.
 
@@ -548,28 +547,32 @@ def write_gcube_to_vesta(
     settings: dict
         Settings that will be merged with the default settings,
         and validated against 'vesta_input.schema.json'
+    stride: int or list[int] or None
+        If not None, coarsen the density grid,
+        by averaging blocks of voxels, with this number of voxels per axis
+    target_voxels: int or None
+        If not None (and stride is None), coarsen the density grid,
+        using the smallest strides that give at most this number of voxels
+        (see ``get_coarsen_stride``)
 
     """
     cube_filepath = os.path.join(folder_path, "{}.cube".format(file_name))
     vesta_filepath = os.path.join(folder_path, "{}.vesta".format(file_name))
-    with aiida_gcube.open_cube_file() as handle:
-        cube_data = read_gaussian_cube(
-            handle, return_density=False, dist_units="angstrom"
-        )
-        atoms = ase.Atoms(
-            cell=cube_data.cell,
-            positions=cube_data.atoms_positions,
-            numbers=cube_data.atoms_atomic_number,
-            pbc=True,
-        )
-        content = create_vesta_input(
-            atoms, cube_filepath=os.path.basename(cube_filepath), settings=settings
-        )
-        with io.open(vesta_filepath, "w") as out_handle:
-            out_handle.write(content)
-    with aiida_gcube.open_cube_file(binary=True) as handle:
-        with io.open(cube_filepath, "wb") as out_handle:
-            shutil.copyfileobj(handle, out_handle)
+    atoms = aiida_gcube.get_ase(pbc=True)
+    content = create_vesta_input(
+        atoms, cube_filepath=os.path.basename(cube_filepath), settings=settings
+    )
+    with io.open(vesta_filepath, "w") as out_handle:
+        out_handle.write(content)
+    if stride is None and target_voxels is None:
+        with aiida_gcube.open_cube_file(binary=True) as handle:
+            with io.open(cube_filepath, "wb") as out_handle:
+                shutil.copyfileobj(handle, out_handle)
+    else:
+        with io.open(cube_filepath, "w") as out_handle:
+            aiida_gcube.write_cube_file(
+                out_handle, stride=stride, target_voxels=target_voxels
+            )
 
 
 VESTA_ELEMENT_INFO = {
@@ -7,6 +7,8 @@ import pytest
 from aiida_crystal17.calcfunctions.band_gap import (
     calcfunction_band_gap,
     calculate_band_gap,
+    calculate_band_gaps,
+    query_band_gaps,
 )
 from aiida_crystal17.common import recursive_round
 
@@ -378,6 +380,21 @@ def test_band_gap(dtype):
     assert result.right_edge == pytest.approx(data.right_edge, nan_ok=True)
 
 
+def test_band_gaps_stacked():
+    names = ("zero", "non-zero", "no-left", "no-right", "normal")
+    datas = [get_test_data(name) for name in names]
+    result = calculate_band_gaps(
+        np.array([d.energies for d in datas]),
+        np.array([d.densities for d in datas]),
+        np.array([d.fermi for d in datas]),
+    )
+    assert result.left_edge == pytest.approx([d.left_edge for d in datas], nan_ok=True)
+    assert result.right_edge == pytest.approx(
+        [d.right_edge for d in datas], nan_ok=True
+    )
+    assert result.non_zero_fermi.tolist() == [False, True, False, False, False]
+
+
 @pytest.mark.cry17_calls_executable
 def test_calcfunction_band_gap(db_test_app, data_regression):
     data = get_test_data("edge_at_fermi")
@@ -413,3 +430,54 @@ def test_calcfunction_band_gap_with_spin(db_test_app, data_regression):
     assert node.is_finished_ok, node.exit_status
     assert "results" in node.outputs
     data_regression.check(recursive_round(node.outputs.results.attributes, 4))
+
+
+def test_query_band_gaps(db_test_app):
+    from aiida.common.links import LinkType
+    from aiida.orm import CalcJobNode, QueryBuilder
+
+    def create_calc(name=None, fermi=True):
+        calc = db_test_app.generate_calcjob_node("crystal17.doss")
+        if name is None:
+            return calc
+        data = get_test_data(name)
+        results = Dict(
+            dict={"fermi_energy": data.fermi, "units": {"energy": "eV"}}
+            if fermi
+            else {"units": {"energy": "eV"}}
+        )
+        arrays = ArrayData()
+        arrays.set_array("energies", np.array(data.energies))
+        arrays.set_array("total", np.array(data.densities))
+        for label, node in (("results", results), ("arrays", arrays)):
+            node.add_incoming(calc, link_type=LinkType.CREATE, link_label=label)
+            node.store()
+        return calc
+
+    # DoS with different numbers of points (100 and 300)
+    normal = create_calc("normal")
+    edge = create_calc("edge_at_fermi")
+    no_outputs = create_calc()
+    no_fermi = create_calc("normal", fermi=False)
+
+    query = QueryBuilder()
+    query.append(
+        CalcJobNode,
+        filters={"id": {"in": [normal.pk, edge.pk, no_outputs.pk, no_fermi.pk]}},
+        tag="calc",
+    )
+    queryhelp = query.queryhelp
+    rows = {row["pk"]: row for row in query_band_gaps(query, try_fshifts=[0.01])}
+    # the input query is not modified
+    assert query.queryhelp == queryhelp
+
+    assert set(rows) == {normal.pk, edge.pk, no_outputs.pk, no_fermi.pk}
+    for calc, name in ((normal, "normal"), (edge, "edge_at_fermi")):
+        data = get_test_data(name)
+        assert "error" not in rows[calc.pk]
+        assert rows[calc.pk]["energy_units"] == "eV"
+        assert rows[calc.pk]["total_bandgap"] == pytest.approx(
+            data.right_edge - data.left_edge
+        )
+    assert rows[no_outputs.pk]["error"] == "missing output `arrays`"
+    assert rows[no_fermi.pk]["error"] == "missing fermi energy or energies array"
@@ -0,0 +1,71 @@
+from aiida.orm import Str
+import numpy as np
+import pytest
+
+from aiida_crystal17.calcfunctions.cube_arithmetic import (
+    calcfunction_cube_arithmetic,
+    evaluate_cube_expression,
+    parse_cube_expression,
+)
+from aiida_crystal17.data.gcube import GaussianCube
+from aiida_crystal17.tests import open_resource_binary
+
+
+def test_evaluate_cube_expression():
+    arrays = {"a": np.array([1.0, 4.0]), "b": np.array([2.0, 2.0])}
+    tree = parse_cube_expression("-a + 2 * sqrt(maximum(a, b)) ** 2 / b", ["a", "b"])
+    assert np.allclose(evaluate_cube_expression(tree, arrays), [1.0, 0.0])
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "a + c",
+        "a.real",
+        "a[0]",
+        "a // b",
+        "min(a, b)",
+        "abs",
+        "a + 'x'",
+        "__import__('os')",
+    ],
+)
+def test_parse_cube_expression_invalid(expression):
+    with pytest.raises(ValueError):
+        parse_cube_expression(expression, ["a", "b"])
+
+
+def test_calcfunction_cube_arithmetic(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        text_node = GaussianCube(handle)
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        array_node = GaussianCube(handle, storage="array")
+    results, node = calcfunction_cube_arithmetic.run_get_node(
+        Str("2 * a - b"), a=text_node, b=array_node
+    )
+    assert node.is_finished_ok, node.exit_message
+    data = results["cube"].get_cube_data(return_density=True)
+    assert data.header[0] == "Cube arithmetic: 2 * a - b"
+    assert np.allclose(
+        data.density, text_node.get_cube_data(return_density=True).density
+    )
+
+
+def test_evaluate_cube_expression_overflow():
+    tree = parse_cube_expression("a + 9**9**9", ["a"])
+    with pytest.raises(FloatingPointError):
+        evaluate_cube_expression(tree, {"a": np.ones(2)})
+
+
+def test_calcfunction_cube_arithmetic_invalid(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    _, calc_node = calcfunction_cube_arithmetic.run_get_node(Str("a - b"), a=node)
+    assert calc_node.exit_status == 103
+
+
+def test_calcfunction_cube_arithmetic_overflow(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    _, calc_node = calcfunction_cube_arithmetic.run_get_node(Str("a + 9**9**9"), a=node)
+    assert calc_node.exit_status == 201
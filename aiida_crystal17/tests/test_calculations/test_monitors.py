@@ -0,0 +1,121 @@
+"""Tests for monitoring running CRYSTAL17 calculations."""
+import base64
+import json
+
+from aiida_crystal17.calculations.monitors import (
+    MONITOR_EXTRA_KEY,
+    monitor_scf_divergence,
+    update_stdout_monitor,
+)
+from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+from aiida_crystal17.tests import read_resource_binary, read_resource_text
+
+
+class FakeNode(object):
+    """A stand-in for a running ``CalcJobNode``, whose extras are stored as JSON."""
+
+    def __init__(self):
+        self.extras = {}
+
+    def get_extra(self, key, default=None):
+        if key not in self.extras:
+            return default
+        return json.loads(self.extras[key])
+
+    def set_extra(self, key, value):
+        self.extras[key] = json.dumps(value)
+
+    @staticmethod
+    def get_remote_workdir():
+        return "/scratch/calc"
+
+    @staticmethod
+    def get_option(name):
+        assert name == "output_main_file_name"
+        return "main.out"
+
+
+class FakeTransport(object):
+    """A stand-in for a transport, to a stdout file which is appended to on each command."""
+
+    def __init__(self, content, chunk_size):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.written = 0
+        self.commands = []
+
+    def exec_command_wait(self, command):
+        self.commands.append(command)
+        if not self.written:
+            # the file has not yet been created
+            self.written = 1
+            return 0, "", "tail: cannot open 'main.out'"
+        self.written = min(self.written + self.chunk_size, len(self.content))
+        assert command.startswith("tail -c +")
+        assert command.endswith(" | base64")
+        start = int(command.split()[2][1:]) - 1
+        return 0, base64.encodebytes(self.content[start : self.written]).decode(), ""
+
+
+def test_update_stdout_monitor():
+    """Test the monitor resumes from its checkpoint, only retrieving the appended content."""
+    # the offset must be exact, even if multi-byte characters are split between polls
+    content = "\u00c5" * 1000 + "\n"
+    content = content.encode("utf8") + read_resource_binary(
+        "crystal", "mgo_sto3g_scf", "main.out"
+    )
+    node = FakeNode()
+    transport = FakeTransport(content, 997)
+
+    monitor = update_stdout_monitor(node, transport)
+    assert monitor.offset == 0
+    assert node.get_extra(MONITOR_EXTRA_KEY) is None
+
+    offset = 0
+    while transport.written < len(content):
+        monitor = update_stdout_monitor(node, transport)
+        assert transport.commands[
+            -1
+        ] == "tail -c +{} '/scratch/calc/main.out' | base64".format(offset + 1)
+        assert offset <= monitor.offset <= transport.written
+        assert monitor.offset == 0 or content[: monitor.offset].endswith(b"\n")
+        offset = monitor.offset
+        # the checkpoint is only stored once lines have been scanned
+        checkpoint = node.get_extra(MONITOR_EXTRA_KEY) or {"offset": 0}
+        assert checkpoint["offset"] == offset
+
+    expected = read_crystal_stdout(
+        read_resource_text("crystal", "mgo_sto3g_scf", "main.out")
+    )
+    assert monitor.offset == len(content)
+    assert monitor.errors == []
+    assert monitor.energies == [
+        cycle["energy"]["total"]
+        for cycle in expected["initial_scf"]["cycles"]
+        if "energy" in cycle
+    ]
+
+
+def test_monitor_scf_divergence():
+    """Test a rise in the SCF energy over consecutive cycles is reported."""
+    lines = read_resource_text("crystal", "mgo_sto3g_scf", "main.out").splitlines(True)
+    start = next(i for i, line in enumerate(lines) if line.startswith(" CYC   0"))
+    energies = [-270.5, -271.0, -270.9, -270.8, -270.7, -270.6, -270.5]
+    cycles = [
+        " CYC {0:3d} ETOT(AU) {1:.12E} DETOT -1.00E-01 tst  0.00E+00 PX  1.00E+00\n".format(
+            i, e
+        )
+        for i, e in enumerate(energies)
+    ]
+    content = "".join(lines[:start] + cycles).encode("utf8")
+
+    node = FakeNode()
+    transport = FakeTransport(content, len(cycles[0]))
+    messages = []
+    while transport.written < len(content):
+        messages.append(monitor_scf_divergence(node, transport, num_cycles=5))
+
+    assert not any(messages[:-1])
+    assert messages[-1] == "the SCF total energy rose over the last 5 cycles"
+    # only the energies required to test for divergence are checkpointed
+    assert len(node.get_extra(MONITOR_EXTRA_KEY)["energies"]) == 6
@@ -3,9 +3,16 @@ from textwrap import dedent
 from click.testing import CliRunner
 
 from aiida_crystal17.cmndline.basis_set import basisset
+from aiida_crystal17.cmndline.gcube import gcube
 from aiida_crystal17.cmndline.symmetry import symmetry
 from aiida_crystal17.data.basis_set import BasisSetData
-from aiida_crystal17.tests import open_resource_text, resource_context
+from aiida_crystal17.data.gcube import GaussianCube
+from aiida_crystal17.parsers.raw.gaussian_cube import read_gaussian_cube
+from aiida_crystal17.tests import (
+    open_resource_binary,
+    open_resource_text,
+    resource_context,
+)
 
 
 def test_symmetry_show(db_test_app):
@@ -102,3 +109,26 @@ def test_basis_upload(db_test_app):
     assert result2.exit_code == 0
 
     assert "sto3g" in result2.output
+    assert "Mg,Ni,O" in result2.output
+
+    result3 = runner.invoke(basisset, ["listfamilies", "-e", "O", "-e", "Zn"])
+
+    assert result3.exit_code == 0
+    assert "No Basis Set family contains all given elements" in result3.output
+
+
+def test_gcube_vesta(db_test_app):
+
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    node.store()
+
+    runner = CliRunner()
+    with db_test_app.sandbox_folder() as folder:
+        result = runner.invoke(
+            gcube, ["vesta", str(node.pk), folder.abspath, "--target-voxels", "1000"]
+        )
+        assert result.exit_code == 0, result.output
+        assert sorted(folder.get_content_list()) == ["gcube.cube", "gcube.vesta"]
+        with folder.open("gcube.cube") as handle:
+            assert read_gaussian_cube(handle).voxel_grid == [10, 10, 10]
@@ -1,6 +1,15 @@
+import json
+
 from click.testing import CliRunner
+import pytest
 
-from aiida_crystal17.cmndline.cmd_parser import doss_f25, stdin, stdout
+from aiida_crystal17.cmndline.cmd_parser import (
+    batch,
+    doss_f25,
+    records_f25,
+    stdin,
+    stdout,
+)
 from aiida_crystal17.tests import resource_context
 
 
@@ -34,9 +43,65 @@ def test_parse_stdout():
     assert result.exit_code == 0, result.stdout
 
 
+def test_parse_stdout_keys():
+    """Test parsing good stdout file, filtered by keys."""
+    runner = CliRunner()
+    with resource_context("crystal", "mgo_sto3g_scf", "main.out") as path:
+        result = runner.invoke(stdout, [str(path), "-k", "header", "-f", "json"])
+    assert result.exit_code == 0, result.stdout
+    assert json.loads(result.stdout) == {
+        "header": {"crystal_version": 17, "crystal_subversion": "1.0.1"}
+    }
+
+
 def test_parse_doss_f25():
     """Test parsing good fort.25 file."""
     runner = CliRunner()
     with resource_context("doss", "mgo_sto3g_scf", "fort.25") as path:
         result = runner.invoke(doss_f25, [str(path)])
     assert result.exit_code == 0, result.stdout
+
+
+def test_parse_records_f25():
+    """Test summarising the records of a fort.25 file."""
+    runner = CliRunner()
+    with resource_context("doss", "nio_sto3g_afm", "fort.25") as path:
+        result = runner.invoke(records_f25, [str(path), "-f", "json"])
+    assert result.exit_code == 0, result.stdout
+    records = json.loads(result.stdout)["records"]
+    assert [r["type"] for r in records] == ["DOSS"] * 6
+    assert records[0]["shape"] == [1002, 1]
+
+
+@pytest.mark.parametrize("processes", (1, 2))
+def test_parse_batch(processes, tmp_path):
+    """Test parsing a directory of stdout files to JSON Lines."""
+    runner = CliRunner()
+    output = tmp_path.joinpath("output.jsonl")
+    args = ["-o", str(output), "-n", str(processes), "-k", "energy", "exit_code"]
+    with resource_context("crystal", "stdout_parser") as path:
+        path.joinpath("bad.out").write_bytes(b"\xff\xfe")
+        result = runner.invoke(batch, [str(path)] + args)
+        assert result.exit_code == 0, result.stdout
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert len(records) == 8
+        assert {r["path"] for r in records} == {
+            str(p.absolute()) for p in path.glob("*.out")
+        }
+        bad_record = [r for r in records if r["path"].endswith("bad.out")][0]
+        assert "UnicodeDecodeError" in bad_record["parser_exceptions"][0]
+        empty_record = [r for r in records if r["path"].endswith("empty.out")][0]
+        assert empty_record["parser_errors"] == ["the file is empty"]
+        assert set(empty_record.keys()) == {
+            "path",
+            "exit_code",
+            "parser_errors",
+            "parser_exceptions",
+        }
+
+        # simulate an interrupted run
+        output.write_text("".join(output.read_text().splitlines(True)[:3]) + '{"pa')
+        result = runner.invoke(batch, [str(path)] + args)
+        assert result.exit_code == 0, result.stdout
+        assert "parsed 5 files" in result.stdout
+        assert len(output.read_text().splitlines()) == 8
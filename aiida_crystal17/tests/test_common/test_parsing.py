@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from aiida_crystal17.common.parsing import (
+    split_fixed_width,
+    split_numbers,
+    split_numbers_array,
+    split_numeric_lines,
+)
+from aiida_crystal17.tests import read_resource_text
+
+
+def test_split_numbers_array():
+    lines = read_resource_text("doss", "mgo_sto3g_scf", "fort.25").splitlines()
+    expected = [num for line in lines for num in split_numbers(line)]
+    assert np.array_equal(split_numbers_array(lines), expected)
+    assert np.array_equal(split_numbers_array("\n".join(lines)), expected)
+
+
+def test_split_fixed_width():
+    lines = [
+        " 0.00000E+00-7.73683E-01 1.23464E+00",
+        "-1.85017E+00",
+    ]
+    assert split_fixed_width(lines, 12).tolist() == [
+        0.0,
+        -0.773683,
+        1.23464,
+        -1.85017,
+    ]
+    with pytest.raises(ValueError):
+        split_fixed_width(["   a.00000E+00"], 12)
+
+
+def test_split_numeric_lines():
+    lines = ["1 2 3", "-4 -5", "ATOM 1", "6"]
+    assert split_numeric_lines(lines, 0) == ([1.0, 2.0, 3.0, -4.0, -5.0], 2)
+    assert split_numeric_lines(lines, 2) == ([], 2)
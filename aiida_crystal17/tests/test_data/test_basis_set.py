@@ -4,7 +4,13 @@ from io import StringIO
 from aiida.plugins import DataFactory
 import pytest
 
-from aiida_crystal17.data.basis_set import BasisSetData
+from aiida_crystal17.data.basis_set import (
+    BASIS_PARSE_CACHE,
+    BasisParseCache,
+    BasisSetData,
+    parse_basis,
+    parse_basis_files,
+)
 from aiida_crystal17.tests import (
     open_resource_text,
     read_resource_text,
@@ -105,6 +111,12 @@ def test_create_group(db_test_app):
     # print(groups)
     assert len(groups) == 1
 
+    summaries = BasisSetData.get_basis_groups(filter_elements="O", counts=True)
+    assert [(s.label, s.count, s.elements) for s in summaries] == [
+        ("sto3g", 3, ["Mg", "Ni", "O"])
+    ]
+    assert sorted(summaries[0].pks) == sorted(n.pk for n in group.nodes)
+
     # try uploading the files to a second group
     with pytest.raises(ValueError):
         with resource_context("basis_sets", "sto3g") as path:
@@ -115,14 +127,36 @@ def test_create_group(db_test_app):
                 stop_if_existing=True,
             )
 
+    with resource_context("basis_sets", "sto3g") as path:
+        nfiles, nuploaded, timings = BasisSetData.upload_basisset_family(
+            path,
+            "another_sto3g",
+            "another group of sto3g basis sets",
+            stop_if_existing=False,
+            return_timings=True,
+        )
+    assert (nfiles, nuploaded) == (3, 0)
+    assert set(timings) == {"parse", "query", "store", "group"}
+
+    # re-uploading to an existing group should not duplicate its nodes
     with resource_context("basis_sets", "sto3g") as path:
         nfiles, nuploaded = BasisSetData.upload_basisset_family(
             path,
             "another_sto3g",
             "another group of sto3g basis sets",
             stop_if_existing=False,
+            max_workers=2,
         )
     assert (nfiles, nuploaded) == (3, 0)
+    assert len(BasisSetData.get_basis_group_map("another_sto3g")) == 3
+
+
+def test_parse_basis_files():
+    with resource_context("basis_sets", "sto3g") as path:
+        files = sorted(path.glob("*.basis"))
+        serial = parse_basis_files(files)
+        parallel = parse_basis_files(files, max_workers=2)
+        assert serial == parallel == [parse_basis(f) for f in files]
 
 
 def test_bases_from_struct(db_test_app):
@@ -157,3 +191,68 @@ def test_bases_from_struct(db_test_app):
     assert set(bases_dict.keys()) == set(["Mg", "Mg1", "O"])
 
     assert bases_dict["Mg"].get_basis_family_names() == ["sto3g"]
+
+
+def test_basis_group_map(db_test_app):
+    with resource_context("basis_sets", "sto3g") as path:
+        BasisSetData.upload_basisset_family(path, "sto3g", "group of sto3g basis sets")
+
+    family_map = BasisSetData.get_basis_group_map("sto3g")
+    assert set(family_map) == {"Mg", "Ni", "O"}
+    assert BasisSetData.get_basis_group_map("sto3g", elements=["O", "Zn"]) == {
+        "O": family_map["O"]
+    }
+
+    BasisSetData.get_basis_group("sto3g").remove_nodes([family_map["O"]])
+    assert set(BasisSetData.get_basis_group_map("sto3g")) == {"Mg", "Ni"}
+
+
+def test_basis_parse_cache():
+    cache = BasisParseCache(max_entries=2)
+    cache.set("basis", "a", ({"element": "O"}, "content"))
+    cache.get("basis", "a")[0]["element"] = "Mg"
+    assert cache.get("basis", "a") == ({"element": "O"}, "content")
+    cache.set("basis", "b", 1)
+    cache.set("basis", "c", 2)
+    assert cache.get("basis", "a") is None
+    assert cache.info() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "entries": 2,
+        "max_entries": 2,
+    }
+
+
+def test_parse_basis_cached():
+    BASIS_PARSE_CACHE.clear()
+    content = read_resource_text("basis_sets", "sto3g", "sto3g_Mg.basis")
+    metadata, basis_content = parse_basis(StringIO(content))
+    assert parse_basis(StringIO(content)) == (metadata, basis_content)
+    assert BASIS_PARSE_CACHE.info()["hits"] == 1
+    assert parse_basis(StringIO(content), cache=False) == (metadata, basis_content)
+    assert BASIS_PARSE_CACHE.info()["hits"] == 1
+
+
+def test_store_uses_parse_cache(db_test_app):
+    BasisSetData.clear_cache()
+    with open_resource_text("basis_sets", "sto3g", "sto3g_Mg.basis") as handle:
+        basis = BasisSetData(filepath=handle)
+    basis.store()
+    basis.get_data()
+    assert basis.get_data()["type"] == "all-electron"
+    # the file is parsed on set_file, then store, _validate and get_data use the cache
+    assert BasisSetData.get_cache_info()["misses"] == 2
+
+
+def test_set_parsed_reparsed_on_store(db_test_app):
+    BasisSetData.clear_cache()
+    metadata, content = parse_basis(
+        StringIO(read_resource_text("basis_sets", "sto3g", "sto3g_O.basis"))
+    )
+    metadata["element"] = "Fe"
+    basis = BasisSetData()
+    basis.set_parsed(metadata, content, "sto3g_O.basis")
+    # the metadata is not taken from the cache, so it is reset from the content
+    basis.store()
+    assert basis.element == "O"
@@ -1,7 +1,9 @@
 from aiida.plugins import DataFactory
+import numpy as np
 
 from aiida_crystal17.common import recursive_round
-from aiida_crystal17.data.gcube import GaussianCube
+from aiida_crystal17.data.gcube import CubeDataCache, GaussianCube
+from aiida_crystal17.parsers.raw.gaussian_cube import GcubeResult
 from aiida_crystal17.tests import open_resource_binary, resource_context
 
 
@@ -78,3 +80,86 @@ def test_compute_integration_atom(db_test_app):
         18.8,
         3.8,
     ]
+    assert [round(v, 1) for v in node.compute_integration_atom((0, 1), [2, 1])] == [
+        18.8,
+        1.2,
+    ]
+
+
+def test_cube_data_cache():
+    cache = CubeDataCache(max_bytes=100, max_entries=2)
+    header = GcubeResult(*([None] * 10))
+    dense = header._replace(density=np.zeros(10))
+    cache.set("a", False, "angstrom", header)
+    cache.set("b", True, "angstrom", dense)
+    assert cache.get("a", False, "angstrom") == header
+    # an entry with the density can be used when it is not requested
+    assert cache.get("b", False, "angstrom").density is None
+    assert cache.get("b", True, "bohr") is None
+    # the least recently used entry is evicted
+    cache.set("c", False, "angstrom", header)
+    assert cache.get("a", False, "angstrom") is None
+    # entries larger than the maximum size are not cached
+    cache.set("d", True, "angstrom", dense._replace(density=np.zeros(20)))
+    assert cache.get("d", True, "angstrom") is None
+    assert cache.info() == {
+        "hits": 2,
+        "misses": 3,
+        "evictions": 1,
+        "entries": 2,
+        "nbytes": 80,
+        "max_bytes": 100,
+        "max_entries": 2,
+    }
+    cache.clear("b")
+    assert cache.info()["entries"] == 1
+    cache.clear()
+    assert cache.info()["hits"] == 0
+
+
+def test_get_cube_data_cached(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    GaussianCube.clear_cache()
+    data = node.get_cube_data(return_density=True)
+    assert not data.density.flags.writeable
+    node.get_cube_data(return_density=True)
+    node.get_ase()
+    info = GaussianCube.get_cache_info()
+    assert (info["hits"], info["misses"]) == (2, 1)
+
+
+def test_array_storage(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        text_node = GaussianCube(handle)
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle, storage="array")
+    assert node.storage_format == "array"
+    data = node.get_cube_data(return_density=True, cache=False)
+    expected = text_node.get_cube_data(return_density=True, cache=False)
+    assert data.atoms_atomic_number == [12, 8]
+    assert np.array_equal(data.density, expected.density)
+    assert [(start, slab.shape) for start, slab in node.iter_density_slabs(5, 12)] == [
+        (5, (7, 20, 20))
+    ]
+    with node.open_cube_file() as handle:
+        line = handle.readline().strip()
+    assert line == "Charge density - 3D GRID - GAUSSIAN CUBE FORMAT MgO Bulk"
+
+
+def test_array_storage_float32(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle, storage="array", dtype="float32")
+    data = node.get_cube_data(return_density=True)
+    assert data.density.dtype == np.float32
+    assert round(node.compute_integration_cell(), 1) == 18.6
+
+
+def test_reduce(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    results = node.reduce(["integral", "max", "histogram", "planar_average"], axis=0)
+    assert round(results["integral"], 1) == 18.6
+    assert results["histogram"]["edges"][-1] == results["max"]
+    assert results["histogram"]["counts"].sum() == 8000
+    assert results["planar_average"].shape == (20,)
@@ -169,3 +169,32 @@ def test_failed_optimisation(db_test_app, plugin_name, data_regression):
 
     assert "optimisation" in results, results
     data_regression.check(results["optimisation"].attributes)
+
+
+@pytest.mark.parametrize(
+    "plugin_name",
+    [
+        "crystal17.main",
+    ],
+)
+def test_parser_streaming(db_test_app, plugin_name):
+    """Test that the streaming parser, selected by an option, gives the same results."""
+    results = {}
+    exit_statuses = {}
+    for streaming in (False, True):
+        retrieved = FolderData()
+        with open_resource_binary("crystal", "mgo_sto3g_scf", "main.out") as handle:
+            retrieved.put_object_from_filelike(handle, "main.out", mode="wb")
+
+        calc_node = db_test_app.generate_calcjob_node(
+            plugin_name, retrieved, options={"parser_streaming": streaming}
+        )
+        results[streaming], calcfunction = db_test_app.parse_from_node(
+            plugin_name, calc_node
+        )
+
+        assert calcfunction.is_finished, calcfunction.exception
+        exit_statuses[streaming] = calcfunction.exit_status
+
+    assert exit_statuses[True] == exit_statuses[False]
+    assert results[True]["results"].get_dict() == results[False]["results"].get_dict()
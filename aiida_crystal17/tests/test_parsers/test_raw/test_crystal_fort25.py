@@ -1,7 +1,20 @@
+import io
 from textwrap import dedent
 
+import numpy as np
+import pytest
+
 from aiida_crystal17.common import recursive_round
-from aiida_crystal17.parsers.raw.crystal_fort25 import parse_crystal_fort25_aiida
+from aiida_crystal17.parsers.raw.crystal_fort25 import (
+    create_bands_data,
+    create_maps_array_data,
+    iter_crystal_fort25,
+    iter_crystal_fort25_maps,
+    parse_crystal_fort25,
+    parse_crystal_fort25_aiida,
+    parse_crystal_fort25_arrays,
+    parse_crystal_fort25_bands,
+)
 from aiida_crystal17.parsers.raw.doss_input import (
     create_doss_content,
     read_doss_contents,
@@ -141,5 +154,138 @@ def test_read_crystal_fort25(data_regression):
         data, arrays = parse_crystal_fort25_aiida(handle)
 
     data_regression.check(
-        {"results": recursive_round(data, 9), "arrays": recursive_round(arrays, 9)}
+        {
+            "results": recursive_round(data, 9),
+            "arrays": recursive_round({k: v.tolist() for k, v in arrays.items()}, 9),
+        }
     )
+
+
+def test_parse_crystal_fort25_arrays():
+    with open_resource_text("doss", "nio_sto3g_afm", "fort.25") as handle:
+        content = handle.read()
+    arrays = parse_crystal_fort25_arrays(content)
+    data = parse_crystal_fort25(content)
+
+    assert arrays["alpha"]["dos"].shape == (len(data["projections_alpha"]) + 1, 1002)
+    assert arrays["beta"]["dos"].shape == arrays["alpha"]["dos"].shape
+    assert np.allclose(arrays["energy"], data["energy"])
+    total_index = np.argmax(arrays["alpha"]["ids"])
+    assert np.allclose(arrays["alpha"]["dos"][total_index], data["total_alpha"]["dos"])
+    assert [p["id"] for p in data["projections_beta"]] == [
+        i for i in arrays["beta"]["ids"] if i != arrays["beta"]["ids"].max()
+    ]
+
+
+BAND_CONTENT = """\
+-%-0BAND    2    4 0.00000E+00 1.00000E-01-1.00000E-01
+ 0.00000E+00 0.00000E+00
+  0  0  0  4  0  0
+-1.00000E+00 1.00000E+00-9.00000E-01 1.10000E+00-8.00000E-01 1.20000E+00
+-7.00000E-01 1.30000E+00
+-%-0BAND    2    3 0.00000E+00 1.00000E-01-1.00000E-01
+ 4.00000E-01 0.00000E+00
+  4  0  0  4  4  0
+-7.00000E-01 1.30000E+00-6.00000E-01 1.40000E+00-5.00000E-01 1.50000E+00
+"""
+
+MAPS_CONTENT = """\
+-%-1MAPS    3    2 1.00000E+00 2.00000E+00 0.00000E+00
+ 0.00000E+00 0.00000E+00 0.00000E+00 2.00000E+00 0.00000E+00 0.00000E+00
+ 2.00000E+00 2.00000E+00 0.00000E+00       1   3
+ 1.00000E+00 2.00000E+00 3.00000E+00 4.00000E+00 5.00000E+00 6.00000E+00
+-%-1MAPS    3    2 1.00000E+00 2.00000E+00 0.00000E+00
+ 0.00000E+00 0.00000E+00 0.00000E+00 2.00000E+00 0.00000E+00 0.00000E+00
+ 2.00000E+00 2.00000E+00 0.00000E+00       1   3
+ 0.00000E+00-1.00000E-01 0.00000E+00 1.00000E-01 0.00000E+00-1.00000E-01
+"""
+
+
+def test_iter_crystal_fort25_doss():
+    with open_resource_text("doss", "nio_sto3g_afm", "fort.25") as handle:
+        records = list(iter_crystal_fort25(handle))
+    with open_resource_text("doss", "nio_sto3g_afm", "fort.25") as handle:
+        arrays = parse_crystal_fort25_arrays(handle.read())
+
+    assert [r.type for r in records] == ["DOSS"] * 6
+    assert records[0].header["ncols"] == 1002
+    assert records[0].grid["projection"] == 1
+    assert np.allclose(
+        np.array([r.data[:, 0] for r in records[:3]]), arrays["alpha"]["dos"]
+    )
+
+    with open_resource_text("doss", "nio_sto3g_afm", "fort.25") as handle:
+        handle_arrays = parse_crystal_fort25_arrays(handle)
+    assert np.array_equal(handle_arrays["beta"]["dos"], arrays["beta"]["dos"])
+
+    with pytest.raises(IOError, match="projection 1 is not of type DOSS"):
+        parse_crystal_fort25_arrays(BAND_CONTENT)
+
+
+def test_parse_crystal_fort25_bands():
+    data = parse_crystal_fort25_bands(io.StringIO(BAND_CONTENT))
+
+    assert data["system_type"] == "closed shell, insulating system"
+    assert data["segments"] == [
+        {"kpoint_start": [0, 0, 0], "kpoint_end": [4, 0, 0], "num_kpoints": 4},
+        {"kpoint_start": [4, 0, 0], "kpoint_end": [4, 4, 0], "num_kpoints": 3},
+    ]
+    assert data["kpoints"].shape == (7, 3)
+    assert np.allclose(data["kpoints"][5], [4, 2, 0])
+    assert data["bands"].shape == (7, 2)
+    assert np.allclose(
+        data["bands"][:, 0] / 27.21138602, [-1, -0.9, -0.8, -0.7, -0.7, -0.6, -0.5]
+    )
+
+
+def test_create_bands_data(db_test_app):
+    data = parse_crystal_fort25_bands(io.StringIO(BAND_CONTENT))
+    bands_data = create_bands_data(data, shrink=4, cell=np.eye(3).tolist())
+
+    # the k-points are scaled by the shrinking factor
+    assert np.allclose(bands_data.get_kpoints()[5], [1.0, 0.5, 0.0])
+    assert bands_data.get_bands().shape == (7, 2)
+    assert bands_data.get_attribute("units") == "eV"
+    assert bands_data.get_attribute("fermi_energy") == data["fermi_energy"]
+
+
+def test_create_bands_data_spin(db_test_app):
+    # the beta segments follow the alpha segments
+    content = BAND_CONTENT.replace("-%-0BAND", "-%-1BAND")
+    data = parse_crystal_fort25_bands(io.StringIO(content + content))
+    assert data["system_type"] == "open shell, insulating system"
+    bands_data = create_bands_data(data)
+
+    assert bands_data.get_kpoints().shape == (7, 3)
+    assert bands_data.get_bands().shape == (2, 7, 2)
+    assert np.allclose(bands_data.get_bands()[0], data["bands_alpha"])
+    assert np.allclose(bands_data.get_bands()[1], data["bands_beta"])
+
+
+def test_create_maps_array_data(db_test_app):
+    maps = iter_crystal_fort25_maps(io.StringIO(MAPS_CONTENT))
+    array_data = create_maps_array_data(maps)
+
+    assert array_data.get_attribute("num_maps") == 2
+    assert sorted(array_data.get_arraynames()) == sorted(
+        "{0}_{1}".format(key, i) for key in ("points", "step", "values") for i in (0, 1)
+    )
+    assert array_data.get_array("values_0").tolist() == [
+        [1.0, 2.0, 3.0],
+        [4.0, 5.0, 6.0],
+    ]
+    assert array_data.get_array("points_1").shape == (3, 3)
+
+
+def test_iter_crystal_fort25_maps():
+    maps = list(iter_crystal_fort25_maps(io.StringIO(MAPS_CONTENT)))
+
+    assert len(maps) == 2
+    assert maps[0]["values"].tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    assert np.allclose(maps[1]["points"][2], [1.0583544, 1.0583544, 0.0])
+
+
+def test_iter_crystal_fort25_incomplete():
+    content = "".join(BAND_CONTENT.splitlines(True)[:4])
+    with pytest.raises(IOError, match="record 1 ended after 6 of 8 values"):
+        list(iter_crystal_fort25(io.StringIO(content)))
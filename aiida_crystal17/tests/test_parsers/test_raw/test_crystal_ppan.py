@@ -1,6 +1,13 @@
 from textwrap import dedent
 
-from aiida_crystal17.parsers.raw.crystal_ppan import parse_crystal_ppan
+import numpy as np
+
+from aiida_crystal17.parsers.raw.crystal_ppan import parse_crystal_ppan, ppan_to_arrays
+from aiida_crystal17.parsers.raw.crystal_stdout import (
+    extract_mulliken_arrays,
+    read_crystal_stdout,
+)
+from aiida_crystal17.tests import read_resource_text
 
 
 def test_read_doss_contents_spin1(data_regression):
@@ -57,3 +64,20 @@ def test_read_doss_contents_spin2(data_regression):
     """
     )
     data_regression.check(parse_crystal_ppan(contents))
+
+
+def test_ppan_to_arrays():
+    """Test the PPAN.DAT and main output Mulliken analyses have the same array layout."""
+    folder = ("crystal", "nio_sto3g_afm_opt_walltime2")
+    ppan_arrays = ppan_to_arrays(
+        parse_crystal_ppan(read_resource_text(*(folder + ("PPAN.DAT",))))
+    )
+    stdout_arrays = extract_mulliken_arrays(
+        read_crystal_stdout(read_resource_text(*(folder + ("main.out",))))
+    )
+    assert ppan_arrays.pop("coordinates").shape == (4, 3)
+    assert set(ppan_arrays) == set(stdout_arrays)
+    for name, array in stdout_arrays.items():
+        assert np.allclose(ppan_arrays[name], array, equal_nan=True), name
+    assert ppan_arrays["num_orbitals"].tolist() == [18, 18, 5, 5]
+    assert np.isnan(ppan_arrays["alpha_plus_beta_orbitals"][2, 5:]).all()
@@ -1,7 +1,21 @@
+import io
+
+import numpy as np
 import pytest
 
 from aiida_crystal17.common import recursive_round
-from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+from aiida_crystal17.parsers.raw.crystal_stdout import (
+    InitialScan,
+    LazyCrystalOutput,
+    ProgramLineFilter,
+    extract_final_info,
+    extract_history_arrays,
+    initial_parse,
+    match_known_error,
+    read_crystal_stdout,
+    strip_non_program_output,
+)
+from aiida_crystal17.parsers.raw.crystal_stdout_stream import read_crystal_stdout_stream
 from aiida_crystal17.tests import read_resource_text
 
 
@@ -37,3 +51,213 @@ def test_crystal_stdout_files(name, filepath, data_regression):
     output = read_crystal_stdout(content)
     output = recursive_round(output, 12)
     data_regression.check(output)
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    (
+        ("crystal", "stdout_parser", "cry17_spin_opt.out"),
+        ("crystal", "nio_sto3g_afm_opt_walltime", "main.out"),
+        ("crystal", "failed", "FAILED_GEOM_mackinawite_opt.out"),
+    ),
+)
+def test_keyword_classifier_scan(filepath):
+    """Test the bulk scan of the classifier gives the same result as classifying each line."""
+    lines = read_resource_text(*filepath).splitlines()
+    lines.insert(10, "warnıng: dotless i is upper-cased to I")
+    classifier = InitialScan.classifier
+    expected = [(i, classifier.classify(line)) for i, line in enumerate(lines)]
+    assert classifier.scan(lines) == [(i, k) for i, k in expected if k is not None]
+
+
+def test_match_known_error():
+    errors = [
+        "ERROR **** CHEMOD **** some message",
+        "SCF ENDED - TOO MANY CYCLES   E(AU) -1.0",
+    ]
+    assert match_known_error(errors) == "UNCONVERGED_SCF"
+    assert match_known_error(errors[:1]) == "CHEMMOD_ERROR"
+    assert match_known_error(["unknown"]) is None
+
+
+def test_extract_history_arrays():
+    data = read_crystal_stdout(
+        read_resource_text("crystal", "nio_sto3g_afm_opt", "main.out")
+    )
+    arrays = extract_history_arrays(data)
+    num_cycles = len(data["initial_scf"]["cycles"])
+    num_steps = len(data["optimisation"])
+    assert {k: v.shape for k, v in arrays.items()} == {
+        "scf_energy": (num_cycles,),
+        "scf_charge_normalization_factor": (num_cycles,),
+        "scf_spin_density_total": (num_cycles,),
+        "scf_spin_density_absolute": (num_cycles,),
+        "scf_atomic_charges": (num_cycles, 4),
+        "scf_atomic_spins": (num_cycles, 4),
+        "opt_energy": (num_steps,),
+        "opt_converged_max_gradient": (num_steps,),
+        "opt_converged_rms_gradient": (num_steps,),
+        "opt_converged_max_displac": (num_steps,),
+        "opt_converged_rms_displac": (num_steps,),
+        "opt_cell_parameters": (num_steps, 6),
+        "opt_fcoords": (num_steps, 4, 3),
+    }
+    assert (
+        arrays["scf_energy"][-1] == data["initial_scf"]["cycles"][-1]["energy"]["total"]
+    )
+    assert arrays["opt_converged_max_gradient"].dtype == bool
+
+
+def test_extract_history_arrays_missing():
+    data = {
+        "initial_scf": {
+            "cycles": [
+                {"energy": {"total": -1.0}, "atomic_charges_peratom": [1.0, 2.0]},
+                {"atomic_charges_peratom": [1.0]},
+            ]
+        }
+    }
+    arrays = extract_history_arrays(data)
+    assert set(arrays) == {"scf_energy", "scf_atomic_charges"}
+    assert np.array_equal(arrays["scf_energy"], [-1.0, np.nan], equal_nan=True)
+    assert np.array_equal(
+        arrays["scf_atomic_charges"], [[1.0, 2.0], [1.0, np.nan]], equal_nan=True
+    )
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    (
+        ("crystal", "nio_sto3g_afm_opt", "main.out"),
+        ("crystal", "failed", "FAILED_SCF_bcc_iron.out"),
+        ("crystal", "stdout_parser", "cry17_incomplete_scf.out"),
+        ("crystal", "stdout_parser", "empty.out"),
+    ),
+)
+def test_lazy_output(filepath):
+    """Test each key of the lazy output is equal to that of the full output."""
+    content = read_resource_text(*filepath)
+    expected = read_crystal_stdout(content)
+    for key in sorted(expected):
+        output = LazyCrystalOutput(content)
+        assert output[key] == expected[key], key
+    for key in ["optimisation", "mulliken", "other"]:
+        assert LazyCrystalOutput(content).get(key, None) == expected.get(key, None)
+    output = LazyCrystalOutput(content)
+    for key in ["mulliken", "header", "optimisation"]:
+        output.get(key, None)
+    assert output.to_dict() == expected
+    assert dict(output) == expected
+
+
+def test_lazy_output_sections():
+    """Test only the required sections are parsed."""
+    content = read_resource_text("crystal", "nio_sto3g_afm_scf", "main.out")
+    output = LazyCrystalOutput(content)
+    assert output["header"]["crystal_version"] == 17
+    assert output.parsed_sections == ["pre_header", "header"]
+    final_info = extract_final_info(output)
+    assert "mulliken" not in output.parsed_sections
+    assert final_info == extract_final_info(read_crystal_stdout(content))
+
+
+def test_program_line_filter():
+    content = (
+        "line 0\n"
+        " PROCESS    1 OF   16 WORKING\n"
+        "line 1\n"
+        "\n"
+        " PROCESS    2 OF   16 WORKING\n"
+        "Note: The following floating-point exceptions are signalling: IEEE_DENORMAL\n"
+        "\n"
+        "line 3\n"
+        " PROCESS    3 OF   16 WORKING"
+    )
+    line_filter = ProgramLineFilter()
+    lines = list(line_filter.iter_lines(content.splitlines(True)))
+    stripped, warnings = strip_non_program_output(content)
+    assert lines == stripped.splitlines()
+    assert line_filter.warnings == warnings
+    assert line_filter.counts == {"mpi_status": 2, "floating_point": 1, "blank": 1}
+    original = content.splitlines()
+    assert [line_filter.original_lineno(i) for i in range(len(lines))] == [
+        0,
+        2,
+        6,
+        7,
+        8,
+    ]
+    assert all(
+        original[line_filter.original_lineno(i)] == line for i, line in enumerate(lines)
+    )
+
+
+def test_error_lineno_after_omitted_lines():
+    """Test errors report the line number of the original file, after omitted lines."""
+    lines = read_resource_text("crystal", "mgo_sto3g_scf", "main.out").splitlines(True)
+    scf_start = next(i for i, line in enumerate(lines) if "CRYSTAL - SCF" in line)
+    mpi_lines = [" PROCESS    {} OF   16 WORKING\n".format(i) for i in range(4)]
+    lines = lines[:scf_start] + mpi_lines + lines[scf_start:]
+    error_lineno = next(
+        i for i, line in enumerate(lines) if line.startswith(" CYC   3")
+    )
+    lines[error_lineno] = lines[error_lineno].replace("CYC   3", "CYC   9")
+    content = "".join(lines)
+
+    for output in (
+        read_crystal_stdout(content),
+        read_crystal_stdout_stream(io.StringIO(content)),
+    ):
+        assert output["parser_errors"] == [
+            "was expecting the SCF cyle number to be 3 in line {0}: {1}".format(
+                error_lineno, lines[error_lineno].strip()
+            )
+        ]
+        assert output["warnings"] == [
+            "omitted 4 lines of non-program output (mpi_status: 4)"
+        ]
+
+
+def test_mulliken_error_lineno_after_omitted_lines():
+    lines = read_resource_text(
+        "crystal", "stdout_parser", "cry17_spin_opt.out"
+    ).splitlines(True)
+    scf_start = next(i for i, line in enumerate(lines) if "CRYSTAL - SCF" in line)
+    mpi_lines = [" PROCESS    {} OF   16 WORKING\n".format(i) for i in range(4)]
+    lines = lines[:scf_start] + mpi_lines + lines[scf_start:]
+    error_lineno = next(
+        i for i, line in enumerate(lines) if "ALPHA+BETA ELECTRONS" in line
+    )
+    lines[error_lineno] = lines[error_lineno].replace("ALPHA+BETA", "GAMMA")
+    content = "".join(lines)
+
+    for output in (
+        read_crystal_stdout(content),
+        read_crystal_stdout_stream(io.StringIO(content)),
+    ):
+        assert [
+            e for e in output["parser_errors"] if e.startswith("was expecting mulliken")
+        ] == [
+            "was expecting mulliken to be alpha+beta or alpha-beta on line:"
+            " {0}, got: {1}".format(error_lineno, lines[error_lineno].rstrip("\n"))
+        ]
+
+
+def test_initial_scan_lineno_after_omitted_lines():
+    content = (
+        "START\n"
+        + " PROCESS    0 OF   16 WORKING\n" * 2
+        + " OPTOPTOPTOPT\n"
+        + " OPTOPTOPTOPT\n"
+        + " FINAL OPTIMIZED GEOMETRY - DIMENSIONALITY OF THE SYSTEM      3\n"
+        + " PROCESS    1 OF   16 WORKING\n"
+        + " OPTOPTOPTOPT\n"
+        + " FINAL OPTIMIZED GEOMETRY - DIMENSIONALITY OF THE SYSTEM      3\n"
+    )
+    line_filter = ProgramLineFilter()
+    lines = list(line_filter.iter_lines(io.StringIO(content)))
+    _, _, parser_errors, _, _ = initial_parse(lines, line_filter)
+    assert parser_errors == [
+        "found two lines starting optimization section: 4 and 7",
+        "found two lines starting 'FINAL OPTIMIZED GEOMETRY': 5 and 8",
+    ]
@@ -0,0 +1,67 @@
+import pytest
+
+from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+from aiida_crystal17.parsers.raw.crystal_stdout_monitor import (
+    ScfMonitor,
+    scf_is_diverging,
+)
+from aiida_crystal17.tests import read_resource_binary
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    (
+        ("crystal", "mgo_sto3g_scf", "main.out"),
+        ("crystal", "failed", "FAILED_SCF_bcc_iron.out"),
+    ),
+)
+def test_scf_monitor_checkpoint(filepath):
+    """Test scanning the file in chunks, restoring from each checkpoint,
+    gives the final energies of the full content parser."""
+    content = read_resource_binary(*filepath)
+    scf_monitor = ScfMonitor(max_energies=3)
+    for end in range(997, len(content) + 997, 997):
+        scf_monitor.update(content[scf_monitor.offset : end])
+        assert scf_monitor.offset <= end
+        checkpoint = scf_monitor.get_checkpoint()
+        assert set(checkpoint) == {"encoding", "offset", "energies", "errors"}
+        scf_monitor = ScfMonitor.from_checkpoint(checkpoint, max_energies=3)
+    assert scf_monitor.offset == len(content)
+
+    expected = read_crystal_stdout(content.decode("utf8"))
+    energies = [cycle["energy"]["total"] for cycle in expected["initial_scf"]["cycles"]]
+    assert scf_monitor.energies == energies[-3:]
+    assert bool(scf_monitor.errors) == bool(expected["errors"])
+
+
+def test_scf_monitor_units_error():
+    scf_monitor = ScfMonitor()
+    scf_monitor.update(
+        b" CYC   0 ETOT(AU) -2.7E+02 DETOT -2.7E+02 tst  0.0E+00 PX  1.0E+00\n"
+        b" CYC   1 ETOT(EV) -7.3E+03 DETOT -1.0E-01 tst  0.0E+00 PX  1.0E+00\n"
+    )
+    assert scf_monitor.energies == []
+    assert scf_monitor.errors == [
+        "was expecting units in a.u., got: "
+        "CYC   1 ETOT(EV) -7.3E+03 DETOT -1.0E-01 tst  0.0E+00 PX  1.0E+00"
+    ]
+
+
+def test_scf_monitor_invalid_checkpoint():
+    with pytest.raises(ValueError):
+        ScfMonitor.from_checkpoint({"offset": 0})
+
+
+@pytest.mark.parametrize(
+    "energies,expected",
+    (
+        ([], False),
+        ([-3, -2, -1], False),
+        ([-6, -5, -4, -3, -2, -1], True),
+        ([-6, -5, -4, -3.5, -3.6, -1], False),
+        ([-6, -5, -7, -6, -5, -4, -3, -2], True),
+    ),
+)
+def test_scf_is_diverging(energies, expected):
+    scf_cycles = [{"energy": {"total": e}} for e in energies]
+    assert scf_is_diverging(scf_cycles, num_cycles=5) is expected
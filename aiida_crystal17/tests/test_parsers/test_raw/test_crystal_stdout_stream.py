@@ -0,0 +1,74 @@
+import io
+
+import pytest
+
+from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+from aiida_crystal17.parsers.raw.crystal_stdout_stream import (
+    LineBuffer,
+    read_crystal_stdout_stream,
+)
+from aiida_crystal17.tests import open_resource_text, read_resource_text
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    (
+        ("crystal", "stdout_parser", "cry14_scf_and_opt.out"),
+        ("crystal", "stdout_parser", "cry14_scf_only.out"),
+        ("crystal", "stdout_parser", "cry14_scf_and_opt_slab.out"),
+        ("crystal", "stdout_parser", "cry17_spin_opt.out"),
+        ("crystal", "stdout_parser", "cry17_incomplete_scf.out"),
+        ("crystal", "stdout_parser", "cry17_opt_converge_1stcycle.out"),
+        ("crystal", "stdout_parser", "empty.out"),
+        ("crystal", "mgo_sto3g_scf", "main.out"),
+        ("crystal", "mgo_sto3g_opt", "main.out"),
+        ("crystal", "nio_sto3g_afm_scf", "main.out"),
+        ("crystal", "nio_sto3g_afm_opt", "main.out"),
+        ("crystal", "nio_sto3g_afm_opt_walltime", "main.out"),
+        ("crystal", "nio_sto3g_afm_scf_maxcyc", "main.out"),
+        ("crystal", "s2_molecule_opt", "main.out"),
+        ("crystal", "slab_testgeom", "main.out"),
+        ("crystal", "failed", "FAILED_SCF_bcc_iron.out"),
+        ("crystal", "failed", "FAILED_GEOM_mackinawite_opt.out"),
+    ),
+)
+def test_stream_same_as_content(filepath):
+    """Test the streaming parser gives the same output as the full content parser."""
+    expected = read_crystal_stdout(read_resource_text(*filepath))
+    with open_resource_text(*filepath) as handle:
+        output = read_crystal_stdout_stream(handle)
+    assert output == expected
+
+
+def test_stream_non_program_output():
+    """Test MPI statuses and floating point exceptions are stripped."""
+    lines = read_resource_text("crystal", "mgo_sto3g_scf", "main.out").splitlines()
+    noisy_lines = []
+    for i, line in enumerate(lines):
+        if i % 7 == 0:
+            noisy_lines.extend(["", "  PROCESS    3 OF   16 WORKING"])
+        if i % 101 == 0:
+            noisy_lines.append(
+                "Note: The following floating-point exceptions are signalling: "
+                "IEEE_INVALID_FLAG"
+            )
+        noisy_lines.append(line)
+    content = "\n".join(noisy_lines) + "\n"
+    expected = read_crystal_stdout(content)
+    output = read_crystal_stdout_stream(io.StringIO(content))
+    assert output == expected
+    assert output["exit_code"] == 0
+    assert "IEEE_INVALID_FLAG" in output["warnings"][0]
+
+
+def test_line_buffer():
+    buffer = LineBuffer(iter(["a", "b", "c", "d"]))
+    assert buffer[2] == "c"
+    assert buffer.has(3)
+    assert not buffer.has(4)
+    buffer.release(2)
+    with pytest.raises(IndexError):
+        buffer[1]
+    assert buffer[2] == "c"
+    with pytest.raises(IndexError):
+        buffer[4]
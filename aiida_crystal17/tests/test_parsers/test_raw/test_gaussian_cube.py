@@ -1,5 +1,20 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
 from aiida_crystal17.common import recursive_round
-from aiida_crystal17.parsers.raw.gaussian_cube import read_gaussian_cube
+from aiida_crystal17.parsers.raw.gaussian_cube import (
+    coarsen_gaussian_cube,
+    get_coarsen_stride,
+    get_sidecar_path,
+    integrate_spheres,
+    read_gaussian_cube,
+    read_gaussian_cube_file,
+    reduce_density,
+    write_gaussian_cube,
+)
 from aiida_crystal17.tests import open_resource_text
 
 
@@ -9,3 +24,182 @@ def test_read_density_cube(data_regression):
         data = read_gaussian_cube(handle, return_density=True)._asdict()
     data.pop("density")
     data_regression.check(recursive_round(data, 2))
+
+
+def test_read_density_cube_chunks():
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        expected = read_gaussian_cube(handle, return_density=True).density
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(
+            handle, return_density=True, dtype=np.float32, chunk_bytes=100
+        )
+    assert data.density.dtype == np.float32
+    assert data.density.shape == tuple(data.voxel_grid)
+    assert np.allclose(data.density, expected)
+
+
+def test_read_density_cube_missing_values():
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        content = handle.read()
+    content = content.rstrip().rsplit("\n", 1)[0]
+    with pytest.raises(ValueError, match="expected 8000 density values"):
+        read_gaussian_cube(io.StringIO(content), return_density=True)
+
+
+def test_read_density_cube_sidecar(tmp_path):
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        content = handle.read()
+        handle.seek(0)
+        expected = read_gaussian_cube(handle, return_density=True).density
+    filepath = str(tmp_path.joinpath("DENS_CUBE.DAT"))
+    with open(filepath, "w") as handle:
+        handle.write(content)
+
+    data = read_gaussian_cube_file(filepath, return_density=True, use_sidecar=True)
+    assert os.path.exists(get_sidecar_path(filepath))
+    assert np.array_equal(data.density, expected)
+
+    data = read_gaussian_cube_file(filepath, return_density=True, use_sidecar=True)
+    assert isinstance(data.density, np.memmap)
+    assert np.array_equal(data.density, expected)
+
+
+def test_integrate_spheres():
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(handle, return_density=True)
+    args = (data.density, data.voxel_cell, data.origin)
+    values = integrate_spheres(*args, [(0, 0, 0)] * 2, [10, 1], (False, False, False))
+    assert [round(v, 1) for v in values] == [18.6, 2.0]
+    values = integrate_spheres(*args, data.atoms_positions, 2, (True, True, True))
+    assert [round(v, 1) for v in values] == [18.8, 3.8]
+
+
+def test_integrate_spheres_partial_voxels():
+
+    density = np.ones((40, 40, 40))
+    voxel_cell = np.eye(3) * 0.25
+    volume = 4.0 / 3.0 * np.pi * 2.03 ** 3
+    whole = integrate_spheres(density, voxel_cell, (0, 0, 0), [(5, 5, 5)], 2.03)[0]
+    partial = integrate_spheres(
+        density, voxel_cell, (0, 0, 0), [(5, 5, 5)], 2.03, subdivisions=8
+    )[0]
+    assert abs(partial - volume) < 0.01
+    assert abs(partial - volume) < abs(whole - volume)
+
+
+def test_write_gaussian_cube():
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(handle, return_density=True)
+    handle = io.StringIO()
+    write_gaussian_cube(handle, data, (data.density[:5], data.density[5:]))
+    handle.seek(0)
+    new_data = read_gaussian_cube(handle, return_density=True)
+    assert new_data.header == data.header
+    assert new_data.voxel_grid == data.voxel_grid
+    assert np.allclose(new_data.cell, data.cell)
+    assert np.allclose(new_data.atoms_positions, data.atoms_positions)
+    assert np.array_equal(new_data.density, data.density)
+
+
+def test_reduce_density():
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(handle, return_density=True)
+    density = data.density
+    slabs = [density[i : i + 3] for i in range(0, 20, 3)]
+    results = reduce_density(
+        slabs,
+        data.voxel_cell,
+        ["integral", "min", "max", "histogram", "planar_average", "fraction_above"],
+        axis=1,
+        bins=5,
+        value_range=(0, 10),
+        isovalue=0.1,
+    )
+    assert round(results["integral"], 1) == 18.6
+    assert (results["min"], results["max"]) == (density.min(), density.max())
+    assert results["histogram"]["counts"].tolist() == (
+        np.histogram(density, 5, (0, 10))[0].tolist()
+    )
+    assert np.allclose(results["planar_average"], density.mean(axis=(0, 2)))
+    assert results["fraction_above"] == (density > 0.1).mean()
+
+
+@pytest.mark.parametrize("stride", [1, 2, 5, [2, 4, 5], 3, [3, 7, 2]])
+def test_coarsen_gaussian_cube(stride):
+
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(handle, return_density=True)
+    slabs = [data.density[i : i + 3] for i in range(0, 20, 3)]
+    new_data, planes = coarsen_gaussian_cube(data, slabs, stride)
+    density = np.concatenate(list(planes))
+    strides = np.broadcast_to(stride, (3,))
+    assert list(density.shape) == new_data.voxel_grid
+    assert new_data.voxel_grid == (-(-20 // strides)).tolist()
+    assert np.allclose(
+        new_data.voxel_cell, np.array(data.voxel_cell) * strides[:, None]
+    )
+    assert np.allclose(
+        new_data.origin,
+        np.array(data.origin) + np.dot((strides - 1) / 2, data.voxel_cell),
+    )
+    # the absolute atom positions are unchanged
+    assert np.allclose(
+        np.array(new_data.atoms_positions) + new_data.origin,
+        np.array(data.atoms_positions) + data.origin,
+    )
+    a, b, c = strides
+    expected = np.array(
+        [
+            [
+                [
+                    data.density[i : i + a, j : j + b, k : k + c].mean()
+                    for k in range(0, 20, c)
+                ]
+                for j in range(0, 20, b)
+            ]
+            for i in range(0, 20, a)
+        ]
+    )
+    assert np.allclose(density, expected)
+    if not (20 % strides).any():
+        assert np.isclose(
+            density.sum() * np.linalg.det(new_data.voxel_cell),
+            data.density.sum() * np.linalg.det(data.voxel_cell),
+        )
+
+
+def test_coarsen_gaussian_cube_uniform():
+    with open_resource_text("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        data = read_gaussian_cube(handle)
+    data = data._replace(voxel_grid=[12, 12, 12])
+    new_data, planes = coarsen_gaussian_cube(data, [np.ones((12, 12, 12))], 3)
+    assert np.allclose(np.concatenate(list(planes)), 1.0)
+    assert np.allclose(
+        new_data.origin, np.array(data.origin) + np.sum(data.voxel_cell, axis=0)
+    )
+    # partial blocks are averaged over the voxels they contain
+    data = data._replace(voxel_grid=[10, 10, 10])
+    new_data, planes = coarsen_gaussian_cube(data, [np.ones((10, 10, 10))], 3)
+    assert new_data.voxel_grid == [4, 4, 4]
+    assert np.allclose(np.concatenate(list(planes)), 1.0)
+    with pytest.raises(ValueError):
+        coarsen_gaussian_cube(data, [], 0)
+
+
+def test_get_coarsen_stride():
+    assert get_coarsen_stride([300, 300, 300], 100 ** 3) == [3, 3, 3]
+    assert get_coarsen_stride([20, 20, 20], 999) == [3, 3, 3]
+    assert get_coarsen_stride([20, 20, 20], 10 ** 6) == [1, 1, 1]
+    # strides need not divide the grid
+    assert get_coarsen_stride([61, 61, 61], 30 ** 3) == [3, 3, 3]
+    assert get_coarsen_stride([75, 75, 75], 40 ** 3) == [2, 2, 2]
+    # no axis is coarsened below the minimum number of voxels
+    assert get_coarsen_stride([4, 300, 300], 10 ** 5) == [1, 2, 2]
+    assert get_coarsen_stride([7, 10, 10], 1) == [2, 3, 3]
+    assert get_coarsen_stride([7, 10, 10], 1, min_voxels=1) == [7, 10, 10]
@@ -41,3 +41,17 @@ def test_compute_orbitals(name, filepath, atoms, data_regression):
     basis_sets = parse_bases.parse_bsets_stdin(content, isolated=False)
     orbitals = parse_bases.compute_orbitals(atoms, basis_sets)
     data_regression.check(dict(orbitals._asdict()))
+
+
+def test_compute_orbitals_arrays():
+    content = read_resource_text("crystal", "nio_sto3g_afm_scf", "INPUT")
+    basis_sets = parse_bases.parse_bsets_stdin(content, isolated=False)
+    atoms = [28, "Ni", 8, "O"] * 10
+    orbitals = parse_bases.compute_orbitals(atoms, basis_sets, as_arrays=True)
+    assert orbitals.ao_indices.dtype == parse_bases.AO_INDICES_DTYPE
+    assert len(orbitals.ao_indices) == orbitals.number_ao
+    assert orbitals.ao_indices["atom"][-1] == len(atoms) - 1
+    assert (
+        parse_bases.ao_indices_to_dict(orbitals.ao_indices)
+        == parse_bases.compute_orbitals(atoms, basis_sets).ao_indices
+    )
@@ -1,4 +1,5 @@
 import ase
+import numpy as np
 
 from aiida_crystal17.data.gcube import GaussianCube
 from aiida_crystal17.parsers.raw.gaussian_cube import read_gaussian_cube
@@ -35,3 +36,23 @@ def test_write_gcube_to_vesta(db_test_app):
     with db_test_app.sandbox_folder() as folder:
         write_gcube_to_vesta(node, folder.abspath, "test")
         assert sorted(folder.get_content_list()) == sorted(["test.cube", "test.vesta"])
+
+
+def test_write_gcube_to_vesta_coarsened(db_test_app):
+    with open_resource_binary("ech3", "mgo_sto3g_scf", "DENS_CUBE.DAT") as handle:
+        node = GaussianCube(handle)
+    with db_test_app.sandbox_folder() as folder:
+        write_gcube_to_vesta(node, folder.abspath, "test", stride=2)
+        with folder.open("test.cube") as handle:
+            cube_data = read_gaussian_cube(handle, return_density=True)
+    original = node.get_cube_data(return_density=False, dist_units="angstrom")
+    assert cube_data.voxel_grid == [10, 10, 10]
+    # the absolute atom positions are unchanged
+    assert np.allclose(
+        np.array(cube_data.atoms_positions) + cube_data.origin,
+        np.array(original.atoms_positions) + original.origin,
+        atol=1e-5,
+    )
+    assert round(
+        cube_data.density.sum() * np.linalg.det(cube_data.voxel_cell), 1
+    ) == round(node.compute_integration_cell(), 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""Benchmark the initial scan of CRYSTAL stdout files, and the exit code assignment.
+
+The keyword classifier is compared against the previous implementation
+(a chain of substring tests per line, and a nested loop over the known errors),
+on the stdout files in ``aiida_crystal17/tests/raw_files/crystal``.
+
+Usage::
+
+    python benchmarks/bench_initial_scan.py [--repeats N]
+
+"""
+import argparse
+import glob
+import os
+import timeit
+
+from aiida_crystal17.common.parsing import split_numbers
+from aiida_crystal17.parsers.raw import crystal_stdout
+from aiida_crystal17.parsers.raw.crystal_stdout import (
+    KNOWN_ERRORS,
+    initial_parse,
+    match_known_error,
+)
+
+RAW_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "aiida_crystal17",
+    "tests",
+    "raw_files",
+    "crystal",
+)
+
+
+def legacy_initial_parse(lines):
+    """The initial scan, prior to the introduction of ``KeywordClassifier``."""
+    errors = []
+    warnings = []
+    parser_errors = []
+    mpi_abort = False
+    telapse_line = None
+    start_lines = {}
+    second_opt_line = False
+
+    for lineno, line in enumerate(lines):
+
+        if "WARNING" in line.upper():
+            warnings.append(line.strip())
+        elif "ERROR" in line:
+            if "open_hca: getaddr_netdev ERROR" not in line:
+                errors.append(line.strip())
+        elif "SCF abnormal end" in line:
+            errors.append(line.strip())
+        elif "MPI_Abort" in line:
+            if not mpi_abort:
+                errors.append(line.strip())
+                mpi_abort = True
+        elif "CONVERGENCE TESTS UNSATISFIED" in line.upper():
+            errors.append(line.strip())
+        elif "TELAPSE" in line:
+            telapse_line = lineno
+        elif (
+            "OPTOPTOPTOPT" in line
+            or "CONVERGENCE ON GRADIENTS SATISFIED AFTER THE FIRST OPTIMIZATION CYCLE"
+            in line
+        ):
+            if "optimization" in start_lines:
+                if second_opt_line:
+                    parser_errors.append(
+                        "found two lines starting optimization section: "
+                        "{0} and {1}".format(start_lines["optimization"], lineno)
+                    )
+                else:
+                    second_opt_line = True
+            start_lines["optimization"] = lineno
+        elif line.strip().startswith("MULLIKEN POPULATION ANALYSIS"):
+            start_lines.setdefault("mulliken", []).append(lineno)
+        elif "FINAL OPTIMIZED GEOMETRY" in line:
+            if "final_geometry" in start_lines:
+                parser_errors.append(
+                    "found two lines starting 'FINAL OPTIMIZED GEOMETRY':"
+                    " {0} and {1}".format(start_lines["final_geometry"], lineno)
+                )
+            start_lines["final_geometry"] = lineno
+
+    total_seconds = None
+    if telapse_line:
+        total_seconds = int(split_numbers(lines[telapse_line].split("TELAPSE")[1])[0])
+
+    return errors, warnings, parser_errors, total_seconds, start_lines
+
+
+def legacy_match_known_error(errors):
+    """The known error matching, prior to the introduction of ``match_known_error``."""
+    for known_error_msg, code_name in KNOWN_ERRORS:
+        for error_msg in errors:
+            if known_error_msg in error_msg:
+                return code_name
+    return None
+
+
+def main(repeats):
+    paths = sorted(glob.glob(os.path.join(RAW_FOLDER, "**", "*.out"), recursive=True))
+    files = []
+    for path in paths:
+        with open(path) as handle:
+            content, _ = crystal_stdout.strip_non_program_output(handle.read())
+        lines = content.splitlines()
+        files.append((os.path.relpath(path, RAW_FOLDER), lines))
+
+    all_errors = []
+    for name, lines in files:
+        result = initial_parse(lines)
+        if result != legacy_initial_parse(lines):
+            raise AssertionError("initial scan differs for: {}".format(name))
+        all_errors.append(result[0])
+        if match_known_error(result[0]) != legacy_match_known_error(result[0]):
+            raise AssertionError("exit code differs for: {}".format(name))
+
+    num_lines = sum(len(lines) for _, lines in files)
+    print("{} files, {} lines, {} repeats".format(len(files), num_lines, repeats))
+    for label, func, args in (
+        ("initial_parse (legacy)", legacy_initial_parse, [l for _, l in files]),
+        ("initial_parse", initial_parse, [l for _, l in files]),
+        ("match_known_error (legacy)", legacy_match_known_error, all_errors),
+        ("match_known_error", match_known_error, all_errors),
+    ):
+        seconds = min(
+            timeit.repeat(lambda: [func(a) for a in args], number=1, repeat=repeats)
+        )
+        print("{:<30} {:10.3f} ms".format(label, seconds * 1000))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    main(parser.parse_args().repeats)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""Benchmark the run time and peak memory of the raw parsers, on synthetic files.
+
+The files are created by the generators in ``benchmarks/synthetic.py``,
+at one of a number of size presets, and the results are compared
+to those stored in ``benchmarks/baseline.json``
+(flagging any that exceed the baseline by more than the tolerance).
+
+``compute_symmetry_dict`` requires an AiiDA profile (to create a ``StructureData``),
+and is skipped if one cannot be loaded.
+
+Usage::
+
+    python benchmarks/bench_parsers.py [--size SIZE] [--repeats N] [--save-baseline]
+
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+from synthetic import (
+    generate_fort25,
+    generate_fort34_trajectory,
+    generate_gaussian_cube,
+    generate_main_out,
+)
+
+from aiida_crystal17.parsers.raw.crystal_fort25 import (
+    parse_crystal_fort25,
+    parse_crystal_fort25_arrays,
+)
+from aiida_crystal17.parsers.raw.crystal_stdout import read_crystal_stdout
+from aiida_crystal17.parsers.raw.gaussian_cube import (
+    read_gaussian_cube,
+    read_gaussian_cube_file,
+)
+from aiida_crystal17.parsers.raw.parse_fort34 import parse_fort34
+from aiida_crystal17.symmetry import compute_symmetry_dict, convert_structure
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+SIZES = {
+    "small": {
+        "main_out": {"opt_steps": 10, "scf_cycles": 10, "atom_repeats": 2},
+        "fort25": {"num_projections": 20, "num_energies": 500},
+        "cube": {"grid": (30, 30, 30)},
+        "fort34": {"num_frames": 10, "num_atoms": 64},
+    },
+    "medium": {
+        "main_out": {"opt_steps": 50, "scf_cycles": 30, "atom_repeats": 8},
+        "fort25": {"num_projections": 100, "num_energies": 2000},
+        "cube": {"grid": (60, 60, 60)},
+        "fort34": {"num_frames": 50, "num_atoms": 216},
+    },
+    "large": {
+        "main_out": {"opt_steps": 200, "scf_cycles": 50, "atom_repeats": 32},
+        "fort25": {"num_projections": 400, "num_energies": 5000},
+        "cube": {"grid": (120, 120, 120)},
+        "fort34": {"num_frames": 200, "num_atoms": 512},
+    },
+}
+
+
+def get_symmetry_structures(frames):
+    """Convert the fort.34 structures to ``StructureData``, or return None if no profile can be loaded."""
+    from aiida import load_profile
+    from aiida.common.exceptions import AiidaException
+
+    try:
+        load_profile()
+        return [
+            convert_structure(parse_fort34(frame.splitlines())[0], "aiida")
+            for frame in frames
+        ]
+    except AiidaException:
+        return None
+
+
+def create_benchmarks(size, temp_folder):
+    """Generate the synthetic files, and return a list of (name, description, func)."""
+    params = SIZES[size]
+    main_out = generate_main_out(**params["main_out"])
+    fort25 = generate_fort25(**params["fort25"])
+    cube = generate_gaussian_cube(**params["cube"])
+    frames = generate_fort34_trajectory(**params["fort34"])
+    frame_lines = [frame.splitlines() for frame in frames]
+    cube_path = os.path.join(temp_folder, "synthetic.cube")
+    with open(cube_path, "w") as handle:
+        handle.write(cube)
+    # create the binary sidecar, so that only repeat reads are measured
+    read_gaussian_cube_file(cube_path, return_density=True, use_sidecar=True)
+
+    benchmarks = [
+        (
+            "read_crystal_stdout",
+            "{} lines".format(main_out.count("\n")),
+            lambda: read_crystal_stdout(main_out),
+        ),
+        (
+            "parse_crystal_fort25",
+            "{} lines".format(fort25.count("\n")),
+            lambda: parse_crystal_fort25(fort25),
+        ),
+        (
+            "parse_crystal_fort25_arrays",
+            "{} lines".format(fort25.count("\n")),
+            lambda: parse_crystal_fort25_arrays(fort25),
+        ),
+        (
+            "read_gaussian_cube",
+            "{}x{}x{} grid".format(*params["cube"]["grid"]),
+            lambda: read_gaussian_cube(io.StringIO(cube), return_density=True),
+        ),
+        (
+            "read_gaussian_cube_float32",
+            "{}x{}x{} grid".format(*params["cube"]["grid"]),
+            lambda: read_gaussian_cube(
+                io.StringIO(cube), return_density=True, dtype=np.float32
+            ),
+        ),
+        (
+            "read_gaussian_cube_sidecar",
+            "{}x{}x{} grid".format(*params["cube"]["grid"]),
+            lambda: read_gaussian_cube_file(
+                cube_path, return_density=True, use_sidecar=True
+            ).density.sum(),
+        ),
+        (
+            "parse_fort34",
+            "{} frames".format(len(frames)),
+            lambda: [parse_fort34(lines) for lines in frame_lines],
+        ),
+    ]
+    structures = get_symmetry_structures(frames)
+    if structures is None:
+        benchmarks.append(("compute_symmetry_dict", "skipped (no profile)", None))
+    else:
+        benchmarks.append(
+            (
+                "compute_symmetry_dict",
+                "{} structures".format(len(structures)),
+                lambda: [compute_symmetry_dict(s, 0.01, None) for s in structures],
+            )
+        )
+    return benchmarks
+
+
+def measure(func, repeats):
+    """Return the minimum run time (seconds) and the peak traced memory (MiB)."""
+    seconds = min(timeit.repeat(func, number=1, repeat=repeats))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 1024.0 ** 2
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as handle:
+        return json.load(handle)
+
+
+def main(size, repeats, tolerance, save_baseline):
+    baseline = load_baseline()
+    size_baseline = baseline.get(size, {})
+    results = {}
+    regressions = []
+
+    print("size: {}, repeats: {}".format(size, repeats))
+    print(
+        "{:<28} {:<20} {:>10} {:>8} {:>10} {:>8}".format(
+            "function", "input", "time (ms)", "ratio", "peak (MiB)", "ratio"
+        )
+    )
+    with tempfile.TemporaryDirectory() as temp_folder:
+        for name, description, func in create_benchmarks(size, temp_folder):
+            if func is None:
+                print("{:<28} {:<20}".format(name, description))
+                continue
+            seconds, peak = measure(func, repeats)
+            results[name] = {"seconds": seconds, "peak_mib": peak}
+            ratios = []
+            for key, value in (("seconds", seconds), ("peak_mib", peak)):
+                if name in size_baseline:
+                    ratio = value / size_baseline[name][key]
+                    ratios.append(
+                        "{:7.2f}{}".format(ratio, "!" if ratio > tolerance else " ")
+                    )
+                    if ratio > tolerance:
+                        regressions.append("{} ({})".format(name, key))
+                else:
+                    ratios.append("{:>8}".format("-"))
+            print(
+                "{:<28} {:<20} {:10.1f} {} {:10.1f} {}".format(
+                    name, description, seconds * 1000, ratios[0], peak, ratios[1]
+                )
+            )
+
+    if save_baseline:
+        baseline[size] = results
+        with open(BASELINE_PATH, "w") as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print("saved baseline to: {}".format(BASELINE_PATH))
+    elif regressions:
+        print(
+            "regressions (> {}x baseline): {}".format(tolerance, ", ".join(regressions))
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="the ratio to the baseline, above which a result is a regression",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the baseline for this size",
+    )
+    args = parser.parse_args()
+    sys.exit(main(args.size, args.repeats, args.tolerance, args.save_baseline))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Benchmark the numeric tokenisers of ``aiida_crystal17.common.parsing``.
+
+The per-line throughput of ``split_numbers`` (and its previous implementation),
+is compared to the bulk ``split_numbers_array`` and ``split_fixed_width``,
+on the numeric lines of the raw test files.
+
+Usage::
+
+    python benchmarks/bench_split_numbers.py [--repeats N]
+
+"""
+import argparse
+import glob
+import os
+import re
+import timeit
+
+from aiida_crystal17.common.parsing import (
+    split_fixed_width,
+    split_numbers,
+    split_numbers_array,
+)
+
+RAW_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "aiida_crystal17",
+    "tests",
+    "raw_files",
+)
+
+
+def legacy_split_numbers(string):
+    """``split_numbers``, prior to caching the compiled pattern."""
+    _match_number = re.compile("-?\\ *[0-9]+\\.?[0-9]*(?:[Ee]\\ *[+-]?\\ *[0-9]+)?")
+    string = string.replace(" .", " 0.")
+    string = string.replace("-.", "-0.")
+    return [float(s) for s in re.findall(_match_number, string)]
+
+
+def read_lines(pattern):
+    lines = []
+    for path in sorted(glob.glob(os.path.join(RAW_FOLDER, pattern), recursive=True)):
+        with open(path) as handle:
+            lines.extend(handle.read().splitlines())
+    return lines
+
+
+def is_numeric(line):
+    try:
+        return bool(split_numbers(line))
+    except ValueError:
+        return False
+
+
+def time_func(func, repeats):
+    return min(timeit.repeat(func, number=1, repeat=repeats))
+
+
+def main(repeats):
+    stdout_lines = [
+        line
+        for line in read_lines(os.path.join("crystal", "**", "*.out"))
+        if is_numeric(line)
+    ]
+    f25_lines = [
+        line
+        for line in read_lines(os.path.join("doss", "**", "*.f25"))
+        + read_lines(os.path.join("doss", "**", "fort.25"))
+        if not line.startswith("-%-") and len(line) in (12, 24, 36, 48, 60, 72)
+    ]
+
+    for label, lines in (("stdout", stdout_lines), ("fort.25", f25_lines)):
+        print("{}: {} numeric lines".format(label, len(lines)))
+        funcs = [
+            (
+                "legacy split_numbers",
+                lambda: [legacy_split_numbers(line) for line in lines],
+            ),
+            ("split_numbers", lambda: [split_numbers(line) for line in lines]),
+            ("split_numbers_array", lambda: split_numbers_array(lines)),
+        ]
+        if label == "fort.25":
+            funcs.append(("split_fixed_width", lambda: split_fixed_width(lines, 12)))
+        for name, func in funcs:
+            seconds = time_func(func, repeats)
+            print(
+                "  {:<22} {:10.3f} ms {:12.0f} lines/s".format(
+                    name, seconds * 1000, len(lines) / seconds
+                )
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10)
+    main(parser.parse_args().repeats)
@@ -0,0 +1,303 @@
+"""Generators of large, synthetic CRYSTAL files, for benchmarking the parsers.
+
+The raw test files are all small (MgO/NiO with an STO-3G basis),
+so these generators scale them up, whilst keeping the file formats realistic:
+
+- ``generate_main_out``: a geometry optimisation stdout file,
+  built from the NiO AFM test output, with a given number of optimisation steps,
+  initial SCF cycles, and repeats of the atoms in every per-atom table
+  (geometries, SCF charges/spins and Mulliken populations).
+- ``generate_fort25``: a DOSS fort.25 file, with a given number of projections
+  and energy points (for one or two spin channels).
+- ``generate_gaussian_cube``: a Gaussian cube file, with a given grid size.
+- ``generate_fort34_trajectory``: a list of fort.34 (.gui) file contents,
+  for a rocksalt supercell with a given number of atoms.
+
+All generators are deterministic.
+"""
+import os
+import re
+
+import numpy as np
+
+RAW_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "aiida_crystal17",
+    "tests",
+    "raw_files",
+)
+MAIN_OUT_TEMPLATE = os.path.join(RAW_FOLDER, "crystal", "nio_sto3g_afm_opt", "main.out")
+
+# a row of a per-atom table, e.g.
+# X/A table:  "      1 T  28 NI    0.000000000000E+00 ..."
+# cartesian:  "    1    28 NI    0.000000000000E+00 ..."
+# Mulliken:   "   1 NI  28 27.637  2.000  1.999 ..."
+_ATOM_ROW_REGEXES = (
+    re.compile(r"^(\s+)(\d+)( [TF]\s+\d+ [A-Z]+\s+[-\d])"),
+    re.compile(r"^(\s+)(\d+)(\s+\d+ [A-Z]+\s+[-\d])"),
+    re.compile(r"^(\s+)(\d+)( [A-Z]+\s+\d+\s+[-\d.]+\s+[-\d])"),
+)
+# the continuation line of a wrapped Mulliken row
+_CONTINUATION_REGEX = re.compile(r"^\s{15,}[-\d.]+(\s+[-\d.]+)*\s*$")
+_ATOM_COUNT_REGEX = re.compile(
+    r"(ATOMS IN THE UNIT CELL:|ASYMMETRIC UNIT|PER CELL)(\s+)(\d+)"
+)
+
+
+def _match_atom_row(line):
+    for regex in _ATOM_ROW_REGEXES:
+        match = regex.match(line)
+        if match:
+            return match
+    return None
+
+
+def _repeat_units(lines, start_indices, num_units, renumber):
+    """Repeat the blocks of lines, that start at each index, to give ``num_units`` blocks.
+
+    The first block and the final block (which extends to the end of the lines)
+    are retained, and the intermediate blocks are cycled.
+    """
+    prefix = lines[: start_indices[0]]
+    units = [
+        lines[start:end] for start, end in zip(start_indices[:-1], start_indices[1:])
+    ]
+    tail = lines[start_indices[-1] :]
+    if not units:
+        units = [tail]
+    middle = units[1:] or units
+    new_units = units[:1] + [middle[i % len(middle)] for i in range(num_units - 2)]
+    output = list(prefix)
+    for number, unit in enumerate(new_units + [tail]):
+        output.extend(renumber(list(unit), number))
+    return output
+
+
+def _repeat_scf_cycles(lines, num_cycles):
+    end = next(i for i, line in enumerate(lines) if "SCF ENDED" in line)
+    starts = [i for i, line in enumerate(lines[:end]) if line.startswith(" CYC ")]
+
+    def renumber(unit, number):
+        unit[0] = re.sub(r"^ CYC\s*\d+", " CYC{:4d}".format(number), unit[0])
+        return unit
+
+    # the first line (CYC 0) is the initial guess, rather than a cycle
+    return _repeat_units(lines, starts, num_cycles + 1, renumber)
+
+
+def _repeat_opt_steps(lines, num_steps):
+    starts = [i - 1 for i, line in enumerate(lines) if "OPTIMIZATION - POINT" in line]
+
+    def renumber(unit, number):
+        unit[1] = re.sub(r"POINT\s*\d+", "POINT{:5d}".format(number + 1), unit[1])
+        return unit
+
+    # the first point is the initial geometry, rather than an optimisation step
+    lines = _repeat_units(lines, starts, num_steps + 1, renumber)
+    return [
+        re.sub(r"POINTS\s*\d+", "POINTS{:5d}".format(num_steps + 1), line)
+        if "OPT END" in line
+        else line
+        for line in lines
+    ]
+
+
+def _format_values(values, per_line=8, fmt="{:12.7f}"):
+    return [
+        " " + "".join(fmt.format(v) for v in values[i : i + per_line])
+        for i in range(0, len(values), per_line)
+    ]
+
+
+def _repeat_atoms(lines, repeats):
+    """Repeat the rows of every per-atom table."""
+    output = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if line.startswith(" TOTAL ATOMIC CHARGES:") or line.startswith(
+            " TOTAL ATOMIC SPINS"
+        ):
+            output.append(line)
+            index += 1
+            values = []
+            while index < len(lines) and re.match(r"^[\s\d.-]+$", lines[index]):
+                values.extend(float(v) for v in lines[index].split())
+                index += 1
+            output.extend(_format_values(values * repeats))
+            continue
+        if _ATOM_COUNT_REGEX.search(line):
+            line = _ATOM_COUNT_REGEX.sub(
+                lambda m: m.group(1)
+                + str(int(m.group(3)) * repeats).rjust(len(m.group(2) + m.group(3))),
+                line,
+            )
+        if _match_atom_row(line) is None:
+            output.append(line)
+            index += 1
+            continue
+        # collect the table, with any continuation lines
+        rows = []
+        while index < len(lines):
+            match = _match_atom_row(lines[index])
+            if match is None:
+                break
+            row = [lines[index]]
+            index += 1
+            while index < len(lines) and _CONTINUATION_REGEX.match(lines[index]):
+                row.append(lines[index])
+                index += 1
+            rows.append((match, row))
+        ids = [int(match.group(2)) for match, _ in rows]
+        if ids != list(range(1, len(rows) + 1)):
+            # not a per-atom table (e.g. a list of neighbours)
+            output.extend(line for _, row in rows for line in row)
+            continue
+        for repeat in range(repeats):
+            for match, row in rows:
+                width = len(match.group(1)) + len(match.group(2))
+                new_id = str(int(match.group(2)) + repeat * len(rows)).rjust(width)
+                output.append(new_id + row[0][width:])
+                output.extend(row[1:])
+    return output
+
+
+def generate_main_out(opt_steps=20, scf_cycles=20, atom_repeats=1):
+    """Generate the stdout of a geometry optimisation.
+
+    :param opt_steps: the number of optimisation steps
+    :param scf_cycles: the number of cycles in the initial SCF
+    :param atom_repeats: the number of times the (4) atoms are repeated
+    :rtype: str
+    """
+    with open(MAIN_OUT_TEMPLATE) as handle:
+        lines = handle.read().splitlines()
+    lines = _repeat_scf_cycles(lines, scf_cycles)
+    lines = _repeat_opt_steps(lines, opt_steps)
+    if atom_repeats > 1:
+        lines = _repeat_atoms(lines, atom_repeats)
+    return "\n".join(lines) + "\n"
+
+
+def _fortran_e(value):
+    """Format a value as the Fortran ``1P,E12.5`` edit descriptor."""
+    return "{:12.5E}".format(value)
+
+
+def generate_fort25(num_projections=50, num_energies=1000, spin=True, seed=0):
+    """Generate a DOSS fort.25 file.
+
+    :param num_projections: the number of projections (per spin channel),
+        the last of which is the total DOS
+    :param num_energies: the number of energy points
+    :param spin: whether to include alpha and beta channels
+    :rtype: str
+    """
+    random = np.random.RandomState(seed)
+    energy_delta = 7.42411e-03
+    initial_energy = -0.5
+    fermi_energy = -0.146501
+    lines = []
+    for _ in range(2 if spin else 1):
+        for proj in range(1, num_projections + 1):
+            lines.append(
+                "-%-{0}DOSS{1:5d}{2:5d}{3}{4}{5}".format(
+                    3 if spin else 0,
+                    1,
+                    num_energies,
+                    _fortran_e(0.0),
+                    _fortran_e(energy_delta),
+                    _fortran_e(fermi_energy),
+                )
+            )
+            lines.append(_fortran_e(0.0) + _fortran_e(initial_energy))
+            lines.append("{:5d}{:5d}{:5d}{:5d}{:5d}{:5d}".format(proj, 9, 0, 0, 0, 0))
+            values = np.abs(random.normal(10.0, 5.0, num_energies))
+            for i in range(0, num_energies, 6):
+                lines.append("".join(_fortran_e(v) for v in values[i : i + 6]))
+    return "\n".join(lines) + "\n"
+
+
+def generate_gaussian_cube(grid=(50, 50, 50), num_atoms=2, seed=0):
+    """Generate a Gaussian cube file (of the format output by CRYSTAL).
+
+    :param grid: the number of voxels along each axis
+    :param num_atoms: the number of atoms
+    :rtype: str
+    """
+    random = np.random.RandomState(seed)
+    voxel = 0.209362
+    lines = [
+        " Charge density - 3D GRID - GAUSSIAN CUBE FORMAT Synthetic",
+        "     5.62556267     5.62556267     5.62556267    60.000000  60.000000  60.000000",
+        "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(num_atoms, 0, 0, 0),
+        "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(grid[0], 0, voxel, voxel),
+        "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(grid[1], voxel, 0, voxel),
+        "{:5d}{:12.6f}{:12.6f}{:12.6f}".format(grid[2], voxel, voxel, 0),
+    ]
+    for i in range(num_atoms):
+        lines.append(
+            "{:5d}{:12.6f}{:12.6f}{:12.6f}{:12.6f}".format(
+                12, 12.0, *(random.uniform(0, voxel * min(grid), 3))
+            )
+        )
+    values = random.lognormal(0.0, 2.0, grid)
+    for row in values.reshape(-1, grid[2]):
+        for i in range(0, grid[2], 6):
+            lines.append("".join("{:13.5E}".format(v) for v in row[i : i + 6]))
+    return "\n".join(lines) + "\n"
+
+
+def generate_fort34_trajectory(num_frames=20, num_atoms=64, seed=0):
+    """Generate the fort.34 (.gui) files of an optimisation trajectory.
+
+    The structure is a cubic rocksalt (MgO) supercell, with P1 symmetry,
+    whose atoms are randomly displaced in each frame.
+
+    :param num_frames: the number of files
+    :param num_atoms: the (approximate) number of atoms,
+        which is rounded to a cubic supercell of the 8 atom conventional cell
+    :rtype: list[str]
+    """
+    random = np.random.RandomState(seed)
+    size = max(1, int(round((num_atoms / 8.0) ** (1.0 / 3))))
+    a = 4.21
+    basis = [
+        (12, (0.0, 0.0, 0.0)),
+        (12, (0.0, 0.5, 0.5)),
+        (12, (0.5, 0.0, 0.5)),
+        (12, (0.5, 0.5, 0.0)),
+        (8, (0.5, 0.0, 0.0)),
+        (8, (0.0, 0.5, 0.0)),
+        (8, (0.0, 0.0, 0.5)),
+        (8, (0.5, 0.5, 0.5)),
+    ]
+    numbers = []
+    positions = []
+    for i in range(size):
+        for j in range(size):
+            for k in range(size):
+                for number, (x, y, z) in basis:
+                    numbers.append(number)
+                    positions.append(((x + i) * a, (y + j) * a, (z + k) * a))
+    positions = np.array(positions)
+    length = a * size
+
+    frames = []
+    for _ in range(num_frames):
+        displaced = positions + random.normal(0.0, 0.01, positions.shape)
+        lines = ["   3   1   1"]
+        for vector in np.eye(3) * length:
+            lines.append("".join("{:20.12E}".format(v) for v in vector))
+        lines.append("{:5d}".format(1))
+        for vector in np.vstack([np.eye(3), np.zeros(3)]):
+            lines.append("".join("{:20.12E}".format(v) for v in vector))
+        lines.append("{:5d}".format(len(numbers)))
+        for number, position in zip(numbers, displaced):
+            lines.append(
+                "{:5d}".format(number)
+                + "".join("{:20.12E}".format(v) for v in position)
+            )
+        lines.append("{:5d}{:5d}".format(1, 1))
+        frames.append("\n".join(lines) + "\n")
+    return frames